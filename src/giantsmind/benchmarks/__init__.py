@@ -0,0 +1 @@
+"""Benchmarks of the ingestion pipeline, run with `giantsmind --benchmark`."""
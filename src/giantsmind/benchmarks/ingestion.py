@@ -0,0 +1,251 @@
+"""Ingestion throughput benchmark.
+
+Each scale runs the streaming ingestion of a synthetic corpus in a fresh process, with
+its own giantsmind data folder, against local stand-ins for LlamaParse, CrossRef and
+arXiv. The process reports the throughput and latency of each pipeline stage and its
+peak memory, which are compared with the baselines recorded on the same machine.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from giantsmind.benchmarks import synthetic
+from giantsmind.benchmarks.stand_ins import StandInServices
+from giantsmind.core.instrumentation import percentile
+from giantsmind.utils import local
+
+SCALES = (10, 1000, 10000)
+BASELINES_PATH = Path(local.get_local_data_path()) / "benchmark_baselines.json"
+DEFAULT_WORKDIR = Path(tempfile.gettempdir()) / "giantsmind-benchmark"
+REGRESSION_TOLERANCE = 0.25
+MIN_LATENCY_REGRESSION = 0.005  # seconds, below which latency changes are noise
+PARSE_LATENCY = 0.2
+LOOKUP_LATENCY = 0.01
+
+
+@dataclass
+class StageReport:
+    name: str
+    items: int
+    throughput: float  # items per second while the stage was active
+    p50: float  # seconds
+    p95: float
+
+
+@dataclass
+class BenchmarkReport:
+    n_papers: int
+    ingested: int
+    failed: int
+    elapsed: float
+    peak_rss_mb: float
+    stages: List[StageReport] = field(default_factory=list)
+
+    @property
+    def papers_per_second(self) -> float:
+        return self.ingested / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "papers_per_second": self.papers_per_second}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BenchmarkReport":
+        stages = [StageReport(**stage) for stage in data["stages"]]
+        fields = ("n_papers", "ingested", "failed", "elapsed", "peak_rss_mb")
+        return cls(**{key: data[key] for key in fields}, stages=stages)
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.n_papers} papers: ingested {self.ingested} ({self.failed} failed) "
+            f"in {self.elapsed:.1f}s, {self.papers_per_second:.1f} papers/s, "
+            f"peak RSS {self.peak_rss_mb:.0f} MB",
+            f"  {'stage':<10}{'items':>8}{'items/s':>10}{'p50 ms':>10}{'p95 ms':>10}",
+        ]
+        for stage in self.stages:
+            lines.append(
+                f"  {stage.name:<10}{stage.items:>8}{stage.throughput:>10.1f}"
+                f"{1000 * stage.p50:>10.1f}{1000 * stage.p95:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+def stage_reports(stage_times: Dict[str, List[Tuple[float, float]]]) -> List[StageReport]:
+    reports = []
+    for name, times in stage_times.items():
+        durations = [end - start for start, end in times]
+        active = max(end for _, end in times) - min(start for start, _ in times)
+        throughput = len(times) / active if active > 0 else 0.0
+        reports.append(
+            StageReport(name, len(times), throughput, percentile(durations, 50), percentile(durations, 95))
+        )
+    return reports
+
+
+async def _ingest(corpus: Path) -> BenchmarkReport:
+    # Imported here, once the environment points giantsmind at the stand-ins
+    from giantsmind.benchmarks.stand_ins import HashEmbeddings
+    from giantsmind.core.review_queue import ReviewQueue
+    from giantsmind.scripts import parse_papers
+    from giantsmind.utils.scanner import scan_files
+
+    n_papers = len(synthetic.load_corpus(corpus)[0])
+    async with parse_papers.open_ingestion_context(
+        local.get_local_data_path(),
+        parser_name="llamaparse",
+        review_queue=ReviewQueue(),
+        embeddings=HashEmbeddings(),
+    ) as context:
+        started_at = time.monotonic()
+        result = await parse_papers.run_ingestion(context, scan_files(corpus))
+        elapsed = time.monotonic() - started_at
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return BenchmarkReport(
+        n_papers,
+        len(result.completed),
+        len(result.failures),
+        elapsed,
+        peak_rss_mb,
+        stage_reports(result.stage_times),
+    )
+
+
+def _environment(services: StandInServices, data_dir: Path) -> Dict[str, str]:
+    env = {
+        **os.environ,
+        "XDG_DATA_HOME": str(data_dir),
+        "LLAMA_API_KEY": "benchmark",
+        "LLAMA_PARSE_BASE_URL": services.url,
+        "GIANTSMIND_CROSSREF_URL": services.crossref_url,
+        "GIANTSMIND_ARXIV_URL": services.arxiv_url,
+        "GIANTSMIND_ARXIV_INTERVAL": "0",
+        "GIANTSMIND_PARSE_CONCURRENCY": "64",
+        "GIANTSMIND_PARSE_RATE_PER_MINUTE": "1000000",
+        "GIANTSMIND_PARSE_BURST": "64",
+        "GIANTSMIND_PARSE_CHECK_INTERVAL": "0.05",
+        "ANONYMIZED_TELEMETRY": "False",
+    }
+    # Would take precedence over the stand-in's URL
+    env.pop("LLAMA_CLOUD_BASE_URL", None)
+    return env
+
+
+def run_benchmark(
+    n_papers: int,
+    workdir: str | Path = DEFAULT_WORKDIR,
+    seed: int = 0,
+    parse_latency: float = PARSE_LATENCY,
+    lookup_latency: float = LOOKUP_LATENCY,
+) -> BenchmarkReport:
+    """Ingest a synthetic corpus of `n_papers` papers in a fresh process and report its performance.
+
+    The corpus is generated in `workdir` once and reused, the data folder of the run is
+    created anew.
+    """
+    workdir = Path(workdir)
+    corpus = workdir / f"corpus-{n_papers}-{seed}"
+    papers = synthetic.generate_corpus(corpus, n_papers, seed)
+    data_dir = workdir / f"data-{n_papers}"
+    shutil.rmtree(data_dir, ignore_errors=True)
+    data_dir.mkdir(parents=True)
+    output = data_dir / "report.json"
+    with StandInServices(papers, seed, parse_latency, lookup_latency) as services:
+        subprocess.run(
+            [sys.executable, "-m", "giantsmind.benchmarks.ingestion", str(corpus), str(output)],
+            env=_environment(services, data_dir),
+            check=True,
+        )
+    return BenchmarkReport.from_dict(json.loads(output.read_text()))
+
+
+def load_baselines(path: str | Path = BASELINES_PATH) -> Dict[str, dict]:
+    path = Path(path)
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def save_baseline(report: BenchmarkReport, path: str | Path = BASELINES_PATH) -> None:
+    baselines = load_baselines(path)
+    machine = f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs"
+    baselines[str(report.n_papers)] = {
+        **report.to_dict(),
+        "machine": f"{machine}, Python {platform.python_version()}",
+    }
+    Path(path).write_text(json.dumps(baselines, indent=2) + "\n")
+
+
+def compare_to_baseline(
+    report: BenchmarkReport, baseline: dict, tolerance: float = REGRESSION_TOLERANCE
+) -> List[str]:
+    """Regressions of a report compared to a baseline, as readable messages."""
+    regressions = []
+    if report.failed:
+        regressions.append(f"{report.failed} papers failed")
+    if report.papers_per_second < baseline["papers_per_second"] * (1 - tolerance):
+        regressions.append(
+            f"throughput fell to {report.papers_per_second:.1f} papers/s "
+            f"from {baseline['papers_per_second']:.1f}"
+        )
+    if report.peak_rss_mb > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak RSS grew to {report.peak_rss_mb:.0f} MB from {baseline['peak_rss_mb']:.0f}")
+    baseline_stages = {stage["name"]: stage for stage in baseline["stages"]}
+    for stage in report.stages:
+        previous = baseline_stages.get(stage.name)
+        if previous is None:
+            continue
+        limit = max(previous["p95"] * (1 + tolerance), previous["p95"] + MIN_LATENCY_REGRESSION)
+        if stage.p95 > limit:
+            regressions.append(
+                f"p95 latency of stage '{stage.name}' grew to {1000 * stage.p95:.1f} ms "
+                f"from {1000 * previous['p95']:.1f}"
+            )
+    return regressions
+
+
+def benchmark(
+    scales: Sequence[int] = SCALES, save_baselines: bool = False, workdir: str | Path = DEFAULT_WORKDIR
+) -> int:
+    """Handle the benchmark operation: run each scale and compare it with its baseline.
+
+    Returns 1 if a scale regressed, 0 otherwise.
+    """
+    baselines = load_baselines()
+    regressed = False
+    for n_papers in scales:
+        report = run_benchmark(n_papers, workdir)
+        print(report.summary())
+        if save_baselines:
+            save_baseline(report)
+            print(f"  saved as the baseline for {n_papers} papers")
+        elif str(n_papers) in baselines:
+            regressions = compare_to_baseline(report, baselines[str(n_papers)])
+            for regression in regressions:
+                print(f"  REGRESSION: {regression}")
+            regressed = regressed or bool(regressions)
+        else:
+            print(f"  no baseline for {n_papers} papers, record one with --save-baseline")
+    return 1 if regressed else 0
+
+
+def main(args: List[str] | None = None) -> None:
+    """Entry point of the process ingesting a corpus, writing its report as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", type=Path)
+    parser.add_argument("output", type=Path)
+    parsed_args = parser.parse_args(args)
+    report = asyncio.run(_ingest(parsed_args.corpus))
+    parsed_args.output.write_text(json.dumps(report.to_dict()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Markdown loading benchmark.
+
+Writes parsed documents of synthetic papers, with page markers and headings like the
+local parser's, and times loading all of them with each markdown loader.
+"""
+
+import argparse
+import importlib.util
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence
+
+from giantsmind.benchmarks import synthetic
+from giantsmind.benchmarks.ingestion import DEFAULT_WORKDIR
+from giantsmind.core import parse_documents
+from giantsmind.core.parser_backend import page_marker
+
+N_FILES = 1000
+
+
+@dataclass
+class LoaderReport:
+    loader: str
+    n_files: int
+    n_bytes: int
+    elapsed: float
+
+    @property
+    def files_per_second(self) -> float:
+        return self.n_files / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.loader:<13}{self.n_files} files in {self.elapsed:.2f}s: "
+            f"{self.files_per_second:.0f} files/s, {self.n_bytes / 1e6 / self.elapsed:.1f} MB/s"
+        )
+
+
+def paper_document(paper: synthetic.SyntheticPaper, seed: int = 0) -> str:
+    """Markdown of a paper as parsed by the local parser, each section on its own page."""
+    parts = []
+    for page, (heading, paragraphs) in enumerate(synthetic.paper_sections(paper, seed), 1):
+        if page == 1:
+            parts += [page_marker(page), f"# {paper.title}", ", ".join(paper.authors)]
+        else:
+            parts.append(page_marker(page))
+        parts += [f"## {heading}", *paragraphs]
+    return "\n\n".join(parts) + "\n"
+
+
+def write_documents(folder: str | Path, n_files: int, seed: int = 0) -> List[Path]:
+    """Write the parsed documents of `n_files` synthetic papers, reusing those written before."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(n_files):
+        path = folder / f"paper_{index:06d}.md"
+        if not path.exists():
+            path.write_text(paper_document(synthetic.make_paper(index, seed), seed))
+        paths.append(path)
+    return paths
+
+
+def available_loaders() -> List[str]:
+    """Markdown loaders whose dependencies are installed."""
+    return [
+        loader
+        for loader in parse_documents.MARKDOWN_LOADERS
+        if loader != "unstructured" or importlib.util.find_spec("unstructured") is not None
+    ]
+
+
+def time_loader(loader: str, paths: Sequence[Path]) -> LoaderReport:
+    started_at = time.perf_counter()
+    n_bytes = sum(len(parse_documents.load_markdown(str(path), loader)[0].page_content) for path in paths)
+    return LoaderReport(loader, len(paths), n_bytes, time.perf_counter() - started_at)
+
+
+def benchmark_loaders(
+    n_files: int = N_FILES, workdir: str | Path = DEFAULT_WORKDIR, loaders: Sequence[str] | None = None
+) -> List[LoaderReport]:
+    paths = write_documents(Path(workdir) / f"markdown-{n_files}", n_files)
+    return [time_loader(loader, paths) for loader in (loaders or available_loaders())]
+
+
+def main(args: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--files", type=int, default=N_FILES, help=f"number of documents (default: {N_FILES})"
+    )
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR)
+    parsed_args = parser.parse_args(args)
+    for loader in parse_documents.MARKDOWN_LOADERS:
+        if loader not in available_loaders():
+            print(f"{loader:<13}not installed")
+    for report in benchmark_loaders(parsed_args.files, parsed_args.workdir):
+        print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
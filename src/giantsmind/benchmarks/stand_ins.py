@@ -0,0 +1,195 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+from langchain_core.embeddings import Embeddings
+
+from giantsmind.benchmarks.synthetic import SyntheticPaper, paper_markdown
+
+_FILE_NAME = re.compile(rb'filename="([^"]+)"')
+_VERSION = re.compile(r"v\d+$")
+
+
+def crossref_message(paper: SyntheticPaper) -> dict:
+    """A paper as the `message` of a CrossRef works response."""
+    year, month, day = (int(part) for part in paper.publication_date.split("-"))
+    return {
+        "DOI": paper.doi,
+        "title": [paper.title],
+        "author": [
+            {"given": given, "family": family}
+            for given, family in (author.split(" ", 1) for author in paper.authors)
+        ],
+        "URL": f"https://doi.org/{paper.doi}",
+        "container-title": [paper.journal],
+        "published": {"date-parts": [[year, month, day]]},
+    }
+
+
+def arxiv_feed(papers: Sequence[SyntheticPaper]) -> str:
+    """Papers as the Atom feed answering an arXiv API query."""
+    entries = [
+        "<entry>"
+        f"<id>http://arxiv.org/abs/{paper.arxiv_id}v1</id>"
+        f"<title>{escape(paper.title)}</title>"
+        f"<published>{paper.publication_date}T00:00:00Z</published>"
+        + "".join(f"<author><name>{escape(author)}</name></author>" for author in paper.authors)
+        + "</entry>"
+        for paper in papers
+    ]
+    return f'<feed xmlns="http://www.w3.org/2005/Atom">{"".join(entries)}</feed>'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: str | dict, content_type: str = "application/json") -> None:
+        data = (json.dumps(body) if isinstance(body, dict) else body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        services = self.server.services
+        url = urlsplit(self.path)
+        if url.path.startswith("/crossref/works/"):
+            services.count("crossref")
+            time.sleep(services.lookup_latency)
+            paper = services.by_doi.get(unquote(url.path[len("/crossref/works/") :]).lower())
+            if paper is None:
+                self._send(404, "Resource not found.", "text/plain")
+            else:
+                self._send(200, {"status": "ok", "message": crossref_message(paper)})
+        elif url.path == "/arxiv/query":
+            services.count("arxiv")
+            time.sleep(services.lookup_latency)
+            ids = parse_qs(url.query).get("id_list", [""])[0].split(",")
+            # Versioned IDs are answered with the paper, like arXiv does
+            papers = [services.by_arxiv_id.get(_VERSION.sub("", arxiv_id)) for arxiv_id in ids]
+            papers = [paper for paper in papers if paper is not None]
+            self._send(200, arxiv_feed(papers), "application/atom+xml")
+        elif url.path.startswith("/api/parsing/job/"):
+            job_id, _, result = url.path[len("/api/parsing/job/") :].partition("/")
+            ready_at, markdown = services.jobs.get(job_id, (0.0, None))
+            if markdown is None:
+                self._send(200, {"status": "ERROR"})
+            elif time.monotonic() < ready_at:
+                self._send(200, {"status": "PENDING"})
+            elif result:
+                self._send(200, {"markdown": markdown})
+            else:
+                self._send(200, {"status": "SUCCESS"})
+        else:
+            self._send(404, "Not found.", "text/plain")
+
+    def do_POST(self) -> None:
+        services = self.server.services
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if urlsplit(self.path).path != "/api/parsing/upload":
+            self._send(404, "Not found.", "text/plain")
+            return
+        services.count("llamaparse")
+        match = _FILE_NAME.search(body)
+        paper = services.by_file_name.get(match.group(1).decode()) if match else None
+        job_id = str(uuid.uuid4())
+        markdown = paper_markdown(paper, services.seed) if paper is not None else None
+        services.jobs[job_id] = (time.monotonic() + services.parse_latency, markdown)
+        self._send(200, {"id": job_id})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    services: "StandInServices"
+
+
+class StandInServices:
+    """Local HTTP stand-ins for CrossRef, arXiv and LlamaParse answering for a synthetic corpus.
+
+    The stand-ins speak the subset of each API that giantsmind uses, so the ingestion
+    runs unchanged against them. `lookup_latency` and `parse_latency` add the given
+    number of seconds to each metadata lookup and parse job. Use as a context manager.
+    """
+
+    def __init__(
+        self,
+        papers: Sequence[SyntheticPaper],
+        seed: int = 0,
+        parse_latency: float = 0.0,
+        lookup_latency: float = 0.0,
+    ):
+        self.seed = seed
+        self.parse_latency = parse_latency
+        self.lookup_latency = lookup_latency
+        self.by_doi = {paper.doi.lower(): paper for paper in papers if paper.doi}
+        self.by_arxiv_id = {paper.arxiv_id: paper for paper in papers if paper.arxiv_id}
+        self.by_file_name = {paper.file_name: paper for paper in papers}
+        self.jobs: Dict[str, Tuple[float, str | None]] = {}
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server: _Server | None = None
+        self._thread: threading.Thread | None = None
+
+    def count(self, service: str) -> None:
+        with self._lock:
+            self.requests[service] += 1
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def crossref_url(self) -> str:
+        return f"{self.url}/crossref"
+
+    @property
+    def arxiv_url(self) -> str:
+        return f"{self.url}/arxiv/query"
+
+    def start(self) -> "StandInServices":
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.services = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-ins", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> "StandInServices":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic embeddings derived from a hash of the text, standing in for the embedding model."""
+
+    def __init__(self, size: int = 384):
+        self.size = size
+
+    def embed_query(self, text: str) -> List[float]:
+        digest = hashlib.shake_256(text.encode()).digest(self.size)
+        return [byte / 255 - 0.5 for byte in digest]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
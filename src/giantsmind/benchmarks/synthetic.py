@@ -0,0 +1,126 @@
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from typing import List, Tuple
+
+import fitz
+
+MANIFEST_NAME = "corpus.json"
+JOURNALS = ("Journal of Synthetic Results", "Physical Review Benchmarks", "Annals of Stand-in Science")
+FIRST_NAMES = ("Ada", "Alan", "Grace", "Claude", "Emmy", "Kurt", "Lise", "Niels", "Rosalind", "Paul")
+LAST_NAMES = ("Lovelace", "Turing", "Hopper", "Shannon", "Noether", "Godel", "Meitner", "Bohr", "Franklin")
+SECTIONS = ("Introduction", "Methods", "Results", "Discussion")
+WORDS = (
+    "neural activity cortex model signal response stimulus network dynamics population data analysis "
+    "memory learning representation decoding encoding trial task behavior spike rate region layer "
+    "theory experiment measurement estimate variance error bias sample distribution parameter "
+    "inference prediction observation feature structure function process mechanism effect result "
+    "significant robust consistent temporal spatial recurrent feedforward latent manifold state"
+).split()
+
+
+@dataclass(frozen=True)
+class SyntheticPaper:
+    """A generated paper, identified by a DOI or an arXiv ID printed on its first page."""
+
+    index: int
+    file_name: str
+    title: str
+    authors: Tuple[str, ...]
+    journal: str
+    publication_date: str
+    doi: str | None = None
+    arxiv_id: str | None = None
+
+
+def make_paper(index: int, seed: int = 0) -> SyntheticPaper:
+    """Paper number `index` of the corpus generated from `seed`, every other paper being on arXiv."""
+    rng = random.Random(f"{seed}:{index}")
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 10))).capitalize()
+    authors = tuple(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(1, 5)))
+    publication_date = f"{rng.randint(1990, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    file_name = f"paper_{index:06d}.pdf"
+    if index % 2:
+        arxiv_id = f"2301.{index % 100000:05d}"
+        return SyntheticPaper(index, file_name, title, authors, "arXiv", publication_date, arxiv_id=arxiv_id)
+    doi = f"10.5555/giantsmind.bench.{index:06d}"
+    return SyntheticPaper(index, file_name, title, authors, rng.choice(JOURNALS), publication_date, doi=doi)
+
+
+def paper_sections(paper: SyntheticPaper, seed: int = 0) -> List[Tuple[str, List[str]]]:
+    """Headings and paragraphs of a paper's body."""
+    rng = random.Random(f"{seed}:{paper.index}:body")
+    return [
+        (
+            heading,
+            [" ".join(rng.choice(WORDS) for _ in range(rng.randint(80, 140))) + "." for _ in range(3)],
+        )
+        for heading in SECTIONS
+    ]
+
+
+def paper_markdown(paper: SyntheticPaper, seed: int = 0) -> str:
+    """Markdown a parser would return for a paper."""
+    parts = [f"# {paper.title}", ", ".join(paper.authors)]
+    for heading, paragraphs in paper_sections(paper, seed):
+        parts.append(f"## {heading}")
+        parts.extend(paragraphs)
+    return "\n\n".join(parts) + "\n"
+
+
+def write_pdf(paper: SyntheticPaper, folder: Path, seed: int = 0) -> Path:
+    """Write a paper as a PDF, with its title, authors and identifier on the first page."""
+    identifier = f"doi: {paper.doi}" if paper.doi else f"arXiv:{paper.arxiv_id}v1"
+    path = Path(folder) / paper.file_name
+    with fitz.open() as document:
+        page = document.new_page()
+        authors = ", ".join(paper.authors)
+        header = f"{paper.title}\n\n{authors}\n{paper.journal}, {paper.publication_date}\n{identifier}"
+        page.insert_textbox(fitz.Rect(72, 72, 540, 240), header, fontsize=12)
+        for i, (heading, paragraphs) in enumerate(paper_sections(paper, seed)):
+            if i:
+                page = document.new_page()
+            top = 250 if i == 0 else 72
+            page.insert_textbox(
+                fitz.Rect(72, top, 540, 770), f"{heading}\n\n" + "\n\n".join(paragraphs), fontsize=9
+            )
+        document.save(path)
+    return path
+
+
+def _write_pdfs(indices: range, folder: Path, seed: int) -> None:
+    for index in indices:
+        write_pdf(make_paper(index, seed), folder, seed)
+
+
+def load_corpus(folder: str | Path) -> Tuple[List[SyntheticPaper], int]:
+    """Papers of a generated corpus and the seed they were generated from."""
+    manifest = json.loads((Path(folder) / MANIFEST_NAME).read_text())
+    papers = [SyntheticPaper(**{**paper, "authors": tuple(paper["authors"])}) for paper in manifest["papers"]]
+    return papers, manifest["seed"]
+
+
+def generate_corpus(
+    folder: str | Path, n_papers: int, seed: int = 0, workers: int | None = None
+) -> List[SyntheticPaper]:
+    """Generate `n_papers` PDFs in `folder` on a process pool, reusing a corpus generated before.
+
+    A `corpus.json` manifest lists the papers, so stand-in services can answer for them.
+    """
+    folder = Path(folder)
+    if (folder / MANIFEST_NAME).exists():
+        papers, corpus_seed = load_corpus(folder)
+        if len(papers) == n_papers and corpus_seed == seed:
+            return papers
+    folder.mkdir(parents=True, exist_ok=True)
+    batch = 200
+    batches = [range(start, min(start + batch, n_papers)) for start in range(0, n_papers, batch)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(partial(_write_pdfs, folder=folder, seed=seed), batches))
+    papers = [make_paper(index, seed) for index in range(n_papers)]
+    manifest = {"seed": seed, "papers": [asdict(paper) for paper in papers]}
+    (folder / MANIFEST_NAME).write_text(json.dumps(manifest))
+    return papers
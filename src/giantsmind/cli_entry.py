@@ -4,8 +4,14 @@ import os
 import sys
 from typing import List, Optional
 
+from giantsmind.core import config
+from giantsmind.core.parser_backend import PARSER_BACKENDS
 from giantsmind.scripts.interact_papers import one_question_chain
+from giantsmind.scripts.migrate_parsed_docs import migrate_parsed_docs
 from giantsmind.scripts.parse_papers import parse_papers
+from giantsmind.scripts.review_papers import review_papers
+from giantsmind.scripts.stamp_papers import stamp_papers
+from giantsmind.scripts.watch_papers import watch_papers
 from giantsmind.utils.logging import logger
 
 
@@ -19,6 +25,60 @@ def parse_arguments(args: Optional[List[str]] = None) -> argparse.Namespace:
         nargs="?",
         const=os.getenv("DEFAULT_PDF_PATH"),
     )
+    parser.add_argument(
+        "--watch",
+        metavar="PDF_PATH",
+        help="Watch a folder and ingest new, modified and deleted PDFs as they appear",
+        nargs="?",
+        const=os.getenv("DEFAULT_PDF_PATH"),
+    )
+    parser.add_argument(
+        "--stamp",
+        metavar="PDF_PATH",
+        help="Write the resolved metadata of the papers into the PDFs of the specified folder",
+        nargs="?",
+        const=os.getenv("DEFAULT_PDF_PATH"),
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="With --parse, process the folder stage by stage instead of streaming papers",
+    )
+    parser.add_argument(
+        "--non-interactive",
+        action="store_true",
+        help="With --parse, queue papers with missing metadata for --review instead of asking for the fields "
+        "(the default when not run from a terminal)",
+    )
+    parser.add_argument(
+        "--review",
+        action="store_true",
+        help="Complete the metadata of the papers queued for review and ingest them",
+    )
+    parser.add_argument(
+        "--migrate-parsed-docs",
+        action="store_true",
+        help="Move the parsed documents into the fan-out folder layout and index them",
+    )
+    parser.add_argument(
+        "--benchmark",
+        metavar="N_PAPERS",
+        type=int,
+        nargs="*",
+        help="Benchmark the ingestion of synthetic corpora of N_PAPERS papers (default: 10 1000 10000) "
+        "against local stand-in services, and compare with the baselines",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="With --benchmark, record the results as the new baselines",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSER_BACKENDS,
+        default=config.PARSER_BACKEND,
+        help="PDF parser: the LlamaParse service or the local, offline PyMuPDF engine",
+    )
 
     args = parser.parse_args(args)
     return args
@@ -29,8 +89,25 @@ def main(args: Optional[List[str]] = None) -> int:
     parsed_args = parse_arguments(args)
 
     try:
+        if parsed_args.benchmark is not None:
+            from giantsmind.benchmarks.ingestion import SCALES, benchmark
+
+            return benchmark(parsed_args.benchmark or SCALES, parsed_args.save_baseline)
+        if parsed_args.migrate_parsed_docs:
+            return migrate_parsed_docs()
+        if parsed_args.review:
+            return review_papers()
+        if parsed_args.stamp is not None:
+            return stamp_papers(parsed_args.stamp)
+        if parsed_args.watch is not None:
+            return watch_papers(parsed_args.watch, parsed_args.parser)
         if parsed_args.parse is not None:
-            return parse_papers(parsed_args.parse)
+            return parse_papers(
+                parsed_args.parse,
+                streaming=not parsed_args.batch,
+                parser_name=parsed_args.parser,
+                interactive=sys.stdin.isatty() and not parsed_args.non_interactive,
+            )
         else:
             one_question_chain(1)
             return 0
@@ -0,0 +1,122 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+from giantsmind.utils.logging import logger
+
+INDEX_NAME = "index.db"
+# Artifacts are named after a SHA-256 key, e.g. `<key>.md.gz` and its `<key>.md.gz.sha256` checksum
+_KEYED_NAME = re.compile(r"[0-9a-f]{64}\..+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    paper_id TEXT,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_sha256 ON artifacts (sha256);
+CREATE INDEX IF NOT EXISTS artifacts_paper_id ON artifacts (paper_id);
+"""
+
+
+def fan_out(key: str) -> Path:
+    """Two-level folder of an artifact, from the first four hex digits of its key."""
+    return Path(key[:2]) / key[2:4]
+
+
+class ArtifactStore:
+    """Files derived from PDFs, such as parsed documents, stored by content key under `folder`.
+
+    An artifact keyed `k` lives in `k[:2]/k[2:4]/`, so no folder holds more than a few
+    files even for hundreds of thousands of papers. An index in `folder` maps the
+    content hash of each PDF, and the ID of its paper once known, to its artifacts.
+    """
+
+    def __init__(self, folder: str | Path, clock: Callable[[], float] = time.time):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        self._conn = sqlite3.connect(self.folder / INDEX_NAME, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._conn:
+            yield self._conn
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def path(self, key: str, suffix: str) -> Path:
+        return self.folder / fan_out(key) / f"{key}{suffix}"
+
+    def flat_path(self, key: str, suffix: str) -> Path:
+        """Path of an artifact stored before the fan-out layout, see `migrate_flat_layout`."""
+        return self.folder / f"{key}{suffix}"
+
+    def record(self, path: str | Path, sha256: str, paper_id: str | None = None) -> None:
+        """Index an artifact of the PDF with content hash `sha256`, keeping a paper ID recorded before."""
+        relative = str(Path(path).relative_to(self.folder))
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO artifacts (path, sha256, paper_id, recorded_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET sha256 = excluded.sha256, "
+                "paper_id = COALESCE(excluded.paper_id, paper_id), recorded_at = excluded.recorded_at",
+                (relative, sha256, paper_id, self.clock()),
+            )
+
+    def _paths(self, column: str, value: str) -> List[Path]:
+        with self._transaction() as conn:
+            rows = conn.execute(f"SELECT path FROM artifacts WHERE {column} = ? ORDER BY path", (value,))
+            return [self.folder / path for (path,) in rows]
+
+    def paths_for_hash(self, sha256: str) -> List[Path]:
+        return self._paths("sha256", sha256)
+
+    def paths_for_paper(self, paper_id: str) -> List[Path]:
+        return self._paths("paper_id", paper_id)
+
+    def hashes_for_paper(self, paper_id: str) -> List[str]:
+        """Content hashes of the PDFs of a paper that have artifacts."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT sha256 FROM artifacts WHERE paper_id = ? ORDER BY sha256", (paper_id,)
+            )
+            return [sha256 for (sha256,) in rows]
+
+    def migrate_flat_layout(self) -> int:
+        """Move the artifacts stored flat in `folder` into their fan-out folders.
+
+        Indexed paths are updated. A flat file whose artifact was written again in the
+        fan-out layout since is dropped. Returns the number of files moved.
+        """
+        moved = 0
+        with os.scandir(self.folder) as entries:
+            names = [entry.name for entry in entries if entry.is_file() and _KEYED_NAME.fullmatch(entry.name)]
+        for name in names:
+            target = self.folder / fan_out(name) / name
+            if target.exists():
+                (self.folder / name).unlink()
+                with self._transaction() as conn:
+                    conn.execute("DELETE FROM artifacts WHERE path = ?", (name,))
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self.folder / name, target)
+            with self._transaction() as conn:
+                conn.execute(
+                    "UPDATE artifacts SET path = ? WHERE path = ?",
+                    (str(target.relative_to(self.folder)), name),
+                )
+            moved += 1
+        if moved:
+            logger.info(f"Moved {moved} files of {self.folder} into fan-out folders")
+        return moved
@@ -0,0 +1,69 @@
+import os
+
+# LlamaParse scheduling
+LLAMA_PARSE_BASE_URL = os.getenv("LLAMA_PARSE_BASE_URL", "https://api.cloud.llamaindex.ai")
+PARSE_MAX_CONCURRENCY = int(os.getenv("GIANTSMIND_PARSE_CONCURRENCY", "8"))
+PARSE_RATE_PER_MINUTE = float(os.getenv("GIANTSMIND_PARSE_RATE_PER_MINUTE", "60"))
+PARSE_BURST = int(os.getenv("GIANTSMIND_PARSE_BURST", "8"))
+PARSE_MAX_RETRIES = int(os.getenv("GIANTSMIND_PARSE_RETRIES", "4"))
+PARSE_BACKOFF_BASE = 2.0
+PARSE_BACKOFF_MAX = 60.0
+PARSE_MAX_TIMEOUT = 20000
+PARSE_CHECK_INTERVAL = float(os.getenv("GIANTSMIND_PARSE_CHECK_INTERVAL", "1"))  # seconds between job polls
+
+# Parsing
+PARSER_BACKEND = os.getenv("GIANTSMIND_PARSER", "llamaparse")  # "llamaparse" or "pymupdf"
+LOCAL_PARSE_WORKERS = None  # defaults to the number of CPUs
+PARSE_SHARD_PAGES = int(os.getenv("GIANTSMIND_PARSE_SHARD_PAGES", "20"))  # 0 parses every PDF whole
+PARSE_SHARD_MIN_PAGES = 50  # PDFs with fewer pages are parsed whole
+PARSE_SHARD_RETRIES = 2
+COMPRESS_PARSED_DOCS = os.getenv("GIANTSMIND_COMPRESS_PARSED", "0") == "1"  # store parsed documents gzipped
+MARKDOWN_LOADER = os.getenv("GIANTSMIND_MARKDOWN_LOADER", "native")  # "native" or "unstructured"
+PARSE_INSTRUCTIONS = (
+    "Extract the text from this scientific article and return it in markdown format without delimiters. "
+    "Do not add any text to the document."
+)
+
+# File hashing
+HASH_PREFILTER = os.getenv("GIANTSMIND_HASH_PREFILTER", "0") == "1"  # recheck the ends of unchanged PDFs
+
+# Streaming ingestion
+INGEST_QUEUE_SIZE = int(os.getenv("GIANTSMIND_INGEST_QUEUE_SIZE", "4"))
+INGEST_CHUNK_WORKERS = 2
+INGEST_SCAN_WORKERS = os.cpu_count() or 1
+
+# Chunking
+CHUNK_SIZE = int(os.getenv("GIANTSMIND_CHUNK_SIZE", "4096"))  # characters
+CHUNK_OVERLAP = int(os.getenv("GIANTSMIND_CHUNK_OVERLAP", "256"))
+CHUNK_PROCESS_WORKERS = None  # defaults to the number of CPUs
+
+# Embedding cache
+EMBEDDING_CACHE_MAX_BYTES = int(
+    float(os.getenv("GIANTSMIND_EMBEDDING_CACHE_MB", "2048")) * 2**20
+)  # 0 disables it
+EMBEDDING_CACHE_DTYPE = os.getenv("GIANTSMIND_EMBEDDING_CACHE_DTYPE", "float32")  # "float32" or "float16"
+
+# Watch mode
+WATCH_DEBOUNCE = float(os.getenv("GIANTSMIND_WATCH_DEBOUNCE", "2"))  # seconds a PDF must be unchanged
+WATCH_POLL_INTERVAL = 1.0
+
+# Metadata extraction
+METADATA_PROCESS_WORKERS = None  # defaults to the number of CPUs
+METADATA_LOOKUP_CONCURRENCY = 32
+
+# Metadata lookups
+CROSSREF_API_URL = os.getenv("GIANTSMIND_CROSSREF_URL", "https://api.crossref.org")
+ARXIV_API_URL = os.getenv("GIANTSMIND_ARXIV_URL", "http://export.arxiv.org/api/query")
+CONTACT_EMAIL = os.getenv("GIANTSMIND_CONTACT_EMAIL", "")
+HTTP_TIMEOUT = float(os.getenv("GIANTSMIND_HTTP_TIMEOUT", "20"))
+CROSSREF_MAX_CONCURRENCY = int(os.getenv("GIANTSMIND_CROSSREF_CONCURRENCY", "16"))
+CROSSREF_MIN_INTERVAL = 0.0
+ARXIV_MAX_CONCURRENCY = 1
+ARXIV_MIN_INTERVAL = float(os.getenv("GIANTSMIND_ARXIV_INTERVAL", "3"))
+ARXIV_BATCH_SIZE = 100
+ARXIV_BATCH_LINGER = 0.5  # seconds to wait for more IDs before the first arXiv request
+
+# Metadata lookup cache
+METADATA_CACHE_TTL = float(os.getenv("GIANTSMIND_METADATA_CACHE_DAYS", "90")) * 24 * 3600
+METADATA_CACHE_NEGATIVE_TTL = 24 * 3600.0
+METADATA_CACHE_MAX_ENTRIES = 100_000
@@ -1,24 +1,37 @@
-from pathlib import Path
 from typing import Dict, List
 
-from giantsmind.metadata_db import collection_operations as col_ops
-from giantsmind.utils import local
+from giantsmind.core import config
+from giantsmind.core.parse_cache import ParseCache, read_document
+from giantsmind.core.parser_backend import backend_cache_tag
+from giantsmind.metadata_db.operations import collection_operations as col_ops
+from giantsmind.utils.logging import logger
 
 
 def load_markdown_paper(file_path: str) -> str:
-    with open(file_path, "r") as f:
-        return f.read()
+    return read_document(file_path)
 
 
-def convert_pdf_path_to_md_fname(pdf_path: str) -> str:
-    markdown_path = Path(local.get_local_data_path()) / "parsed_docs" / (Path(pdf_path).stem + ".md")
-    return str(markdown_path)
+def convert_pdf_path_to_md_fname(
+    pdf_path: str, cache: ParseCache | None = None, paper_id: str | None = None
+) -> str | None:
+    """Path of the parsed document of a PDF, None if it was not parsed."""
+    cache = cache if cache is not None else ParseCache(backend_cache_tag(config.PARSER_BACKEND))
+    document_path = cache.find_documents([pdf_path], [paper_id])[0]
+    return str(document_path) if document_path is not None else None
 
 
 def get_paper_txts_from_collection_id(collection_id: int) -> List[str]:
+    """Parsed text of each paper of a collection, empty for papers without a parsed document."""
     paper_paths = col_ops.get_paper_paths_from_collection_id(collection_id)
-    markdown_paths = [convert_pdf_path_to_md_fname(p) for p in paper_paths]
-    paper_texts = [load_markdown_paper(p) for p in markdown_paths]
+    paper_ids = [metadata["paper_id"] for metadata in col_ops.get_metadata_from_collection_id(collection_id)]
+    cache = ParseCache(backend_cache_tag(config.PARSER_BACKEND))
+    paper_texts = []
+    for pdf_path, document_path in zip(paper_paths, cache.find_documents(paper_paths, paper_ids)):
+        if document_path is None:
+            logger.warning(f"No parsed document found for {pdf_path}")
+            paper_texts.append("")
+        else:
+            paper_texts.append(load_markdown_paper(document_path))
     return paper_texts
 
 
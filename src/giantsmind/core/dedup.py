@@ -0,0 +1,175 @@
+import hashlib
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Set, Tuple
+
+from giantsmind.core.metadata_cache import normalize_arxiv_id, normalize_doi
+
+N_HASHES = 32
+ROWS_PER_BAND = 4
+SHINGLE_SIZE = 4
+MIN_WORDS = 50  # first pages with fewer words, e.g. scans, get no fingerprint
+NEAR_DUPLICATE_SIMILARITY = 0.8
+
+_WORD = re.compile(r"[^\W\d_]{2,}")
+_ARXIV_VERSION = re.compile(r"v\d+$")
+_MASK = (1 << 64) - 1
+# Fixed seeds, so fingerprints computed in different processes compare
+_SEEDS = [
+    int.from_bytes(hashlib.blake2b(str(i).encode(), digest_size=8).digest(), "big") for i in range(N_HASHES)
+]
+
+Fingerprint = Tuple[int, ...]
+
+
+def text_fingerprint(text: str) -> Fingerprint | None:
+    """MinHash signature of the word shingles of a text, e.g. the first page of a PDF.
+
+    Copies of a paper that only differ by a download stamp or a few words get signatures
+    with most values in common, see `similarity`. Numbers are ignored.
+    """
+    words = [word.lower() for word in _WORD.findall(text)]
+    if len(words) < MIN_WORDS:
+        return None
+    shingles = {
+        int.from_bytes(
+            hashlib.blake2b(" ".join(words[i : i + SHINGLE_SIZE]).encode(), digest_size=8).digest(), "big"
+        )
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+    return tuple(
+        min((shingle ^ seed) * 0x9E3779B97F4A7C15 & _MASK for shingle in shingles) for seed in _SEEDS
+    )
+
+
+def similarity(a: Fingerprint, b: Fingerprint) -> float:
+    """Estimated Jaccard similarity of the texts of two fingerprints."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def identifier_key(kind: str, identifier: str) -> str:
+    """Key of a DOI or arXiv ID, the arXiv version left out."""
+    if kind == "doi":
+        return f"doi:{normalize_doi(identifier)}"
+    return f"arxiv:{_ARXIV_VERSION.sub('', normalize_arxiv_id(identifier))}"
+
+
+def paper_id_key(paper_id: str) -> str:
+    """Key of a paper ID, matching the `identifier_key` of its DOI or arXiv ID."""
+    kind, _, identifier = paper_id.partition(":")
+    if kind.lower() in ("doi", "arxiv") and identifier:
+        return identifier_key(kind.lower(), identifier)
+    return paper_id
+
+
+def local_identifiers(doi_candidates: Sequence[str], arxiv_candidates: Sequence[str]) -> List[str]:
+    """Keys of the DOI and arXiv ID a PDF would be looked up with first."""
+    keys = []
+    if doi_candidates:
+        keys.append(identifier_key("doi", doi_candidates[0]))
+    if arxiv_candidates:
+        keys.append(identifier_key("arxiv", arxiv_candidates[0]))
+    return keys
+
+
+@dataclass
+class Duplicate:
+    pdf_path: str
+    original: str
+    reason: str  # "content", "first page" or "identifier"
+
+
+class Deduplicator:
+    """Spot PDFs of a run that hold a paper already seen, before they are parsed or looked up.
+
+    PDFs are checked in three layers, each as soon as its information is known: the
+    content hash, the fingerprint of the first page, and the DOI or arXiv ID found in
+    the PDF or its saved metadata. The first PDF of a paper is kept, the others are
+    reported as duplicates of it. Safe to use from several threads.
+    """
+
+    def __init__(self, similarity_threshold: float = NEAR_DUPLICATE_SIMILARITY):
+        self.similarity_threshold = similarity_threshold
+        self.duplicates: List[Duplicate] = []
+        self.paper_ids: Dict[str, str] = {}
+        self._hashes: Dict[str, str] = {}
+        self._identifiers: Dict[str, str] = {}
+        self._fingerprints: Dict[str, Fingerprint] = {}
+        self._keys: Dict[str, Set[str]] = defaultdict(set)  # identifier keys of each PDF
+        self._bands: Dict[Tuple[int, Fingerprint], List[str]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _duplicate(self, pdf_path: str, original: str, reason: str) -> str:
+        self.duplicates.append(Duplicate(pdf_path, original, reason))
+        return original
+
+    def check_content(self, pdf_path: str, sha256: str) -> str | None:
+        """The PDF with the same content seen first, or None after recording this one."""
+        with self._lock:
+            original = self._hashes.setdefault(sha256, pdf_path)
+            return self._duplicate(pdf_path, original, "content") if original != pdf_path else None
+
+    def _conflict(self, pdf_path: str, identifiers: Sequence[str]) -> bool:
+        """Whether identifiers and those of a recorded PDF hold different DOIs or arXiv IDs."""
+        recorded = self._keys.get(pdf_path, set())
+        for kind in ("doi:", "arxiv:"):
+            ours = {key for key in identifiers if key.startswith(kind)}
+            theirs = {key for key in recorded if key.startswith(kind)}
+            if ours and theirs and ours.isdisjoint(theirs):
+                return True
+        return False
+
+    def _similar(self, fingerprint: Fingerprint, identifiers: Sequence[str]) -> str | None:
+        for band in range(0, N_HASHES, ROWS_PER_BAND):
+            for candidate in self._bands.get((band, fingerprint[band : band + ROWS_PER_BAND]), []):
+                if self._conflict(candidate, identifiers):
+                    continue
+                if similarity(fingerprint, self._fingerprints[candidate]) >= self.similarity_threshold:
+                    return candidate
+        return None
+
+    def check_paper(
+        self, pdf_path: str, identifiers: Sequence[str] = (), fingerprint: Fingerprint | None = None
+    ) -> str | None:
+        """The PDF of the same paper seen first, or None after recording this one.
+
+        `identifiers` are keys of the PDF's DOI, arXiv ID or paper ID, see `local_identifiers`
+        and `paper_id_key`. PDFs with different DOIs or arXiv IDs are never duplicates by
+        their first page, e.g. papers of a series sharing a cover page.
+        """
+        with self._lock:
+            for key in identifiers:
+                original = self._identifiers.get(key)
+                if original is not None and original != pdf_path:
+                    return self._duplicate(pdf_path, original, "identifier")
+            if fingerprint is not None:
+                original = self._similar(fingerprint, identifiers)
+                if original is not None and original != pdf_path:
+                    return self._duplicate(pdf_path, original, "first page")
+            for key in identifiers:
+                self._identifiers[key] = pdf_path
+            self._keys[pdf_path].update(identifiers)
+            if fingerprint is not None:
+                self._fingerprints[pdf_path] = fingerprint
+                for band in range(0, N_HASHES, ROWS_PER_BAND):
+                    self._bands[(band, fingerprint[band : band + ROWS_PER_BAND])].append(pdf_path)
+            return None
+
+    def set_paper_id(self, pdf_path: str, paper_id: str) -> None:
+        with self._lock:
+            self.paper_ids[pdf_path] = paper_id
+
+    def report(self) -> List[dict]:
+        """PDFs kept with their paper ID if known, and the duplicates set aside for each, with a reason."""
+        with self._lock:
+            groups: Dict[str, dict] = {}
+            for duplicate in self.duplicates:
+                original = duplicate.original
+                group = groups.setdefault(
+                    original,
+                    {"paper_id": self.paper_ids.get(original), "pdf_path": original, "duplicates": []},
+                )
+                group["duplicates"].append({"pdf_path": duplicate.pdf_path, "reason": duplicate.reason})
+            return list(groups.values())
@@ -0,0 +1,187 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from giantsmind.core import config
+from giantsmind.utils import local
+from giantsmind.utils.sqlite import batched
+
+DEFAULT_CACHE_PATH = Path(local.get_local_data_path()) / "embedding_cache.db"
+DTYPES = ("float32", "float16")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at);
+-- Total size of the vectors, kept up to date by triggers so writes never scan the table
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    n_bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_size (id, n_bytes)
+    SELECT 0, COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings;
+CREATE TRIGGER IF NOT EXISTS embeddings_insert AFTER INSERT ON embeddings BEGIN
+    UPDATE cache_size SET n_bytes = n_bytes + LENGTH(new.vector);
+END;
+CREATE TRIGGER IF NOT EXISTS embeddings_update AFTER UPDATE OF vector ON embeddings BEGIN
+    UPDATE cache_size SET n_bytes = n_bytes + LENGTH(new.vector) - LENGTH(old.vector);
+END;
+CREATE TRIGGER IF NOT EXISTS embeddings_delete AFTER DELETE ON embeddings BEGIN
+    UPDATE cache_size SET n_bytes = n_bytes - LENGTH(old.vector);
+END;
+"""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent cache of text embeddings, keyed by model name and SHA-256 of the text.
+
+    Vectors are stored as `dtype` blobs, float16 halving the size of float32 at the cost
+    of precision. When the vectors take more than `max_bytes`, the least recently used
+    ones are evicted.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        dtype: str = config.EMBEDDING_CACHE_DTYPE,
+        max_bytes: int = config.EMBEDDING_CACHE_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown embedding cache dtype '{dtype}', expected one of {', '.join(DTYPES)}")
+        self.db_path = Path(db_path) if db_path is not None else DEFAULT_CACHE_PATH
+        self.dtype = dtype
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._conn:
+            yield self._conn
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[List[float] | None]:
+        """Cached embedding of each text, None for texts not cached."""
+        hashes = [text_hash(text) for text in texts]
+        now = self.clock()
+        cached: Dict[str, List[float]] = {}
+        with self._transaction() as conn:
+            for batch in batched(list(dict.fromkeys(hashes))):
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, dtype, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                )
+                hits = {key: np.frombuffer(vector, dtype=dtype).tolist() for key, dtype, vector in rows}
+                conn.executemany(
+                    "UPDATE embeddings SET accessed_at = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, key) for key in hits],
+                )
+                cached.update(hits)
+        return [cached.get(key) for key in hashes]
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        now = self.clock()
+        rows = [
+            (model, text_hash(text), self.dtype, np.asarray(vector, dtype=self.dtype).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO embeddings (model, text_hash, dtype, vector, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (model, text_hash) DO UPDATE SET dtype = excluded.dtype, "
+                "vector = excluded.vector, accessed_at = excluded.accessed_at",
+                rows,
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        excess = self._size(conn) - self.max_bytes
+        if excess <= 0:
+            return
+        to_evict = []
+        rows = conn.execute("SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY accessed_at")
+        for model, key, n_bytes in rows:
+            to_evict.append((model, key))
+            excess -= n_bytes
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", to_evict)
+
+    @staticmethod
+    def _size(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT n_bytes FROM cache_size").fetchone()[0]
+
+    def size_bytes(self) -> int:
+        """Total size of the cached vectors."""
+        with self._transaction() as conn:
+            return self._size(conn)
+
+    def clear(self) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM embeddings")
+
+    def __len__(self) -> int:
+        with self._transaction() as conn:
+            return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings of `model` that only compute the document embeddings missing from `cache`.
+
+    Texts repeated in a call are embedded once. Queries are not cached.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(self.model, texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            computed = dict(zip(missing, self.embeddings.embed_documents(missing)))
+            self.cache.put_many(self.model, missing, list(computed.values()))
+            vectors = [computed[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+_shared_caches: Dict[Path, EmbeddingCache] = {}
+
+
+def get_shared_cache() -> EmbeddingCache:
+    """The cache at `DEFAULT_CACHE_PATH`, opened once per process."""
+    if DEFAULT_CACHE_PATH not in _shared_caches:
+        _shared_caches[DEFAULT_CACHE_PATH] = EmbeddingCache(DEFAULT_CACHE_PATH)
+    return _shared_caches[DEFAULT_CACHE_PATH]
@@ -1,34 +1,46 @@
-import json
+import asyncio
 import os
 import re
+import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import List, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
 import fitz
-import PyPDF2
 import requests
 
+from giantsmind.core import config
+from giantsmind.core.dedup import Fingerprint, text_fingerprint
+from giantsmind.core.metadata_cache import MetadataCache, get_shared_cache, normalize_doi
+from giantsmind.core.metadata_store import get_shared_store
+from giantsmind.core.review_queue import ReviewQueue
 from giantsmind.metadata_db.models import Metadata
-from giantsmind.utils import local, utils
+from giantsmind.utils import utils
+from giantsmind.utils.hash_index import FileHashIndex
+from giantsmind.utils.logging import logger
 
 ATOM_NAMESPACE = "{http://www.w3.org/2005/Atom}"
+MANDATORY_FIELDS = ("title", "authors", "journal", "publication_date")
 
 
-def extract_metadata_from_pdf(pdf_path: str, verbose: bool = False) -> dict:
-    """Open the PDF file."""
-    pdf_document = fitz.open(pdf_path)
-    metadata = pdf_document.metadata
-
-    # Extract embedded metadata if available
-    extracted_metadata = {
+def _embedded_metadata(pdf_document: fitz.Document) -> dict:
+    metadata = pdf_document.metadata or {}
+    return {
         "title": metadata.get("title", ""),
         "authors": metadata.get("author", ""),
         "subject": metadata.get("subject", ""),
     }
-    return extracted_metadata
+
+
+def extract_metadata_from_pdf(pdf_path: str, verbose: bool = False) -> dict:
+    """Open the PDF file."""
+    with fitz.open(pdf_path) as pdf_document:
+        # Extract embedded metadata if available
+        return _embedded_metadata(pdf_document)
 
 
 def match_doi_in_text(text: str, context_length: int = 10) -> Tuple[str, str]:
@@ -44,24 +56,26 @@ def match_doi_in_text(text: str, context_length: int = 10) -> Tuple[str, str]:
     return "", ""
 
 
-def find_doi_in_pdf(pdf_path: str, n_first_pages: int = 5, context_length: int = 10) -> Tuple[str, str]:
-    # Open the PDF file
-    pdf_document = fitz.open(pdf_path)
+def iter_first_pages_text(pdf_document: fitz.Document, n_first_pages: int = 5) -> Iterator[str]:
+    """Lazily extract the text of the first pages of an open PDF document."""
+    for page_num in range(min(len(pdf_document), n_first_pages)):
+        yield pdf_document.load_page(page_num).get_text("text")
+
 
-    # Iterate through the pages of the PDF document
-    for page_num in range(min(len(pdf_document), 5)):
-        page = pdf_document.load_page(page_num)
-        text = page.get_text("text")
+def find_doi_in_pages(pages_text: Iterable[str]) -> Tuple[str, str]:
+    for text in pages_text:
         # Search for DOI pattern in the extracted text
         doi, context = match_doi_in_text(text)
         if doi:
-            doi.rstrip(".")
-            return doi, context
-
-    # If no DOI found in the first 5 pages
+            return doi.rstrip("."), context
     return "", ""
 
 
+def find_doi_in_pdf(pdf_path: str, n_first_pages: int = 5, context_length: int = 10) -> Tuple[str, str]:
+    with fitz.open(pdf_path) as pdf_document:
+        return find_doi_in_pages(iter_first_pages_text(pdf_document, n_first_pages))
+
+
 def find_arxiv_id_in_text(text: str, context_length: int = 5) -> Tuple[str, str]:
     # Regular expression pattern for arXiv ID
     arxiv_pattern = r"arXiv:\d{4}\.\d{4,5}(v\d+)?"
@@ -78,34 +92,76 @@ def find_arxiv_id_in_text(text: str, context_length: int = 5) -> Tuple[str, str]
     return "", ""
 
 
-def find_arxiv_id_in_pdf(pdf_path: str) -> Tuple[str, str]:
-    # Open the PDF file
-    pdf_document = fitz.open(pdf_path)
-
-    # Iterate through the pages of the PDF document, up to 5 pages
-    for page_num in range(min(5, len(pdf_document))):
-        page = pdf_document.load_page(page_num)
-        text = page.get_text("text")
+def find_arxiv_id_in_pages(pages_text: Iterable[str]) -> Tuple[str, str]:
+    for text in pages_text:
         # Search for arXiv ID pattern in the extracted text
         arxiv_id, context = find_arxiv_id_in_text(text)
         if arxiv_id:
             return arxiv_id, context
-
-    # If no arXiv ID found in the first 5 pages
     return "", ""
 
 
-def fetch_metadata_from_doi(doi: str, verbose: bool = False) -> dict:
-    url = f"https://api.crossref.org/works/{doi}"
-    response = requests.get(url)
+def find_arxiv_id_in_pdf(pdf_path: str) -> Tuple[str, str]:
+    with fitz.open(pdf_path) as pdf_document:
+        return find_arxiv_id_in_pages(iter_first_pages_text(pdf_document))
+
+
+@dataclass
+class LocalPdfInfo:
+    """Metadata found locally in a PDF: embedded fields and identifier candidates.
+
+    Candidates are listed in the order they should be looked up. The fingerprint of the
+    first page spots copies of the same paper, see `dedup.text_fingerprint`.
+    """
+
+    pdf_path: str
+    pdf_metadata: dict
+    doi_candidates: List[str] = field(default_factory=list)
+    arxiv_candidates: List[str] = field(default_factory=list)
+    fingerprint: Fingerprint | None = None
 
-    if response.status_code != 200:
-        if verbose:
-            print(f"Failed to fetch metadata from DOI: {doi}")
-        return {}
 
-    data = response.json().get("message", {})
+def _doi_candidates(subject: str, pages_text: Sequence[str]) -> List[str]:
+    candidates = [match_doi_in_text(subject)[0]]
+    doi, context = find_doi_in_pages(pages_text)
+    candidates.append(doi)
+    if doi:
+        # DOIs broken by a space in the extracted text
+        candidates.append(match_doi_in_text(context.replace(" ", "_"))[0])
+    # The same DOI is often found in several places, only look it up once
+    unique = {}
+    for candidate in candidates:
+        if candidate:
+            unique.setdefault(normalize_doi(candidate), candidate)
+    return list(unique.values())
+
+
+def _arxiv_candidates(subject: str, pages_text: Sequence[str]) -> List[str]:
+    candidates = [find_arxiv_id_in_text(subject)[0], find_arxiv_id_in_pages(pages_text)[0]]
+    return list(dict.fromkeys(c for c in candidates if c))
+
+
+def extract_local_metadata(pdf_path: str, n_first_pages: int = 5) -> LocalPdfInfo:
+    """Collect everything needed to look up a paper's metadata, opening the PDF once.
+
+    The text of the first pages is extracted once and shared by the DOI and arXiv
+    scanners. This function only does local work and can run in a process pool.
+    """
+    with fitz.open(pdf_path) as pdf_document:
+        pdf_metadata = _embedded_metadata(pdf_document)
+        pages_text = list(iter_first_pages_text(pdf_document, n_first_pages))
+    subject = pdf_metadata.get("subject", "")
+    return LocalPdfInfo(
+        pdf_path=str(pdf_path),
+        pdf_metadata=pdf_metadata,
+        doi_candidates=_doi_candidates(subject, pages_text),
+        arxiv_candidates=_arxiv_candidates(subject, pages_text),
+        fingerprint=text_fingerprint(pages_text[0]) if pages_text else None,
+    )
 
+
+def parse_crossref_message(data: dict, doi: str, verbose: bool = False) -> dict:
+    """Convert the `message` of a CrossRef works response to our metadata fields."""
     title = data.get("title")[0]
     authors = [f"{author.get('given', '')} {author.get('family', '')}" for author in data.get("author", [])]
     url = data.get("URL", "")
@@ -140,31 +196,43 @@ def fetch_metadata_from_doi(doi: str, verbose: bool = False) -> dict:
         "publication_date": publication_date,
         "paper_id": f"doi:{doi}",
     }
-
-    if verbose:
-        print(f"Successfully fetched metadata from DOI: {doi}")
-
     return metadata
 
 
-def fetch_metadata_from_arxiv(arxiv_id: str, verbose: bool = False) -> dict:
-    base_url = "http://export.arxiv.org/api/query"
-    params = {"id_list": arxiv_id}
-    response = requests.get(base_url, params=params)
+def fetch_metadata_from_doi(doi: str, verbose: bool = False, cache: MetadataCache | None = None) -> dict:
+    cache = cache if cache is not None else get_shared_cache()
+    cached = cache.get("doi", doi)
+    if cached is not None:
+        if verbose:
+            print(f"Found cached metadata for DOI: {doi}" if cached else f"DOI not found (cached): {doi}")
+        return cached
 
-    if response.status_code != 200:
+    url = f"{config.CROSSREF_API_URL}/works/{doi}"
+    try:
+        response = requests.get(url, timeout=config.HTTP_TIMEOUT)
+    except requests.RequestException as e:
         if verbose:
-            print(f"Error: {response.status_code}")
+            print(f"Failed to fetch metadata from DOI: {doi} ({e})")
         return {}
 
-    root = ET.fromstring(response.content)
-    entry = root.find(f"{ATOM_NAMESPACE}entry")
-
-    if entry is None:
+    if response.status_code != 200:
+        if response.status_code == 404:
+            cache.put("doi", doi, {})
         if verbose:
-            print("No entry found for the given arXiv ID.")
+            print(f"Failed to fetch metadata from DOI: {doi}")
         return {}
 
+    metadata = parse_crossref_message(response.json().get("message", {}), doi, verbose=verbose)
+    cache.put("doi", doi, metadata)
+
+    if verbose:
+        print(f"Successfully fetched metadata from DOI: {doi}")
+
+    return metadata
+
+
+def parse_arxiv_entry(entry: ET.Element, arxiv_id: str) -> dict:
+    """Convert an entry of an arXiv Atom feed to our metadata fields."""
     title = entry.find(f"{ATOM_NAMESPACE}title").text.replace("\n", " ")
     title = " ".join(title.split())
     authors = [
@@ -185,98 +253,125 @@ def fetch_metadata_from_arxiv(arxiv_id: str, verbose: bool = False) -> dict:
         "publication_date": publication_date,
         "paper_id": f"arXiv:{arxiv_id}",
     }
+    return metadata
+
+
+def arxiv_base_id(arxiv_id: str) -> str:
+    """arXiv ID without its version suffix, e.g. `2101.00001v2` -> `2101.00001`."""
+    return re.sub(r"v\d+$", "", arxiv_id)
+
+
+def parse_arxiv_feed(content: bytes, arxiv_ids: Sequence[str]) -> Dict[str, dict]:
+    """Map each requested arXiv ID to the metadata of its entry in an Atom feed.
+
+    Entries are matched on the ID without version, so a feed answering a multi-ID
+    query can be parsed in one pass. Requested IDs without an entry are left out.
+    """
+    requested = {arxiv_base_id(arxiv_id): arxiv_id for arxiv_id in arxiv_ids}
+    metadatas = {}
+    for entry in ET.fromstring(content).findall(f"{ATOM_NAMESPACE}entry"):
+        entry_id = entry.findtext(f"{ATOM_NAMESPACE}id", "").rsplit("/abs/", 1)[-1]
+        arxiv_id = requested.get(arxiv_base_id(entry_id))
+        if arxiv_id is None:
+            # arXiv reports unknown or malformed IDs as error entries
+            continue
+        try:
+            metadatas[arxiv_id] = parse_arxiv_entry(entry, arxiv_id)
+        except Exception as e:
+            logger.warning(f"Could not parse arXiv entry for ID {arxiv_id}: {e}")
+    return metadatas
+
+
+def arxiv_query_params(arxiv_ids: Sequence[str]) -> dict:
+    return {"id_list": ",".join(arxiv_ids), "max_results": len(arxiv_ids)}
+
+
+def fetch_metadatas_from_arxiv(
+    arxiv_ids: Sequence[str],
+    verbose: bool = False,
+    batch_size: int = config.ARXIV_BATCH_SIZE,
+    cache: MetadataCache | None = None,
+) -> Dict[str, dict]:
+    """Fetch the metadata of many arXiv IDs, querying up to `batch_size` IDs per request.
+
+    Returns a dictionary from arXiv ID to metadata, without the IDs that were not found.
+    """
+    cache = cache if cache is not None else get_shared_cache()
+    arxiv_ids = list(dict.fromkeys(arxiv_ids))
+    cached = cache.get_many("arxiv", arxiv_ids)
+    metadatas = {arxiv_id: metadata for arxiv_id, metadata in cached.items() if metadata}
+    to_fetch = [arxiv_id for arxiv_id in arxiv_ids if arxiv_id not in cached]
+    for start in range(0, len(to_fetch), batch_size):
+        if start:
+            time.sleep(config.ARXIV_MIN_INTERVAL)
+        batch = to_fetch[start : start + batch_size]
+        try:
+            response = requests.get(
+                config.ARXIV_API_URL, params=arxiv_query_params(batch), timeout=config.HTTP_TIMEOUT
+            )
+        except requests.RequestException as e:
+            if verbose:
+                print(f"Error: {e}")
+            continue
+
+        if response.status_code != 200:
+            if verbose:
+                print(f"Error: {response.status_code}")
+            continue
+
+        fetched = parse_arxiv_feed(response.content, batch)
+        cache.put_many("arxiv", {arxiv_id: fetched.get(arxiv_id, {}) for arxiv_id in batch})
+        metadatas.update(fetched)
 
     if verbose:
-        print(f"Successfully fetched metadata from arXiv ID: {arxiv_id}")
+        print(f"Fetched metadata for {len(metadatas)}/{len(arxiv_ids)} arXiv IDs.")
+    return metadatas
 
-    return metadata
 
+def fetch_metadata_from_arxiv(
+    arxiv_id: str, verbose: bool = False, cache: MetadataCache | None = None
+) -> dict:
+    metadata = fetch_metadatas_from_arxiv([arxiv_id], verbose=verbose, cache=cache).get(arxiv_id, {})
+    if not metadata and verbose:
+        print("No entry found for the given arXiv ID.")
+    return metadata
 
-def get_doi_metadata(metadata: dict, pdf_path: str, verbose: bool) -> dict:
-    doi, context = match_doi_in_text(metadata.get("subject", ""))
-    if doi:
-        doi_metadata = fetch_metadata_from_doi(doi, verbose=verbose)
-        if doi_metadata:
-            return doi_metadata
 
-    doi, context = find_doi_in_pdf(pdf_path)
-    if doi:
+def get_doi_metadata(doi_candidates: Sequence[str], verbose: bool) -> dict:
+    for doi in doi_candidates:
         doi_metadata = fetch_metadata_from_doi(doi, verbose=verbose)
         if doi_metadata:
             return doi_metadata
-
-    if doi:
-        new_context = context.replace(" ", "_")
-        doi, _ = match_doi_in_text(new_context)
-        if doi:
-            doi_metadata = fetch_metadata_from_doi(doi, verbose=verbose)
-            if doi_metadata:
-                return doi_metadata
-
     return {}
 
 
-def get_arxiv_metadata(metadata: dict, pdf_path: str, verbose: bool) -> dict:
-    arxiv_id, context = find_arxiv_id_in_text(metadata.get("subject", ""))
-    if arxiv_id:
-        arxiv_metadata = fetch_metadata_from_arxiv(arxiv_id, verbose=verbose)
-        if arxiv_metadata:
-            return arxiv_metadata
-
-    arxiv_id, context = find_arxiv_id_in_pdf(pdf_path)
-    if arxiv_id:
+def get_arxiv_metadata(arxiv_candidates: Sequence[str], verbose: bool) -> dict:
+    for arxiv_id in arxiv_candidates:
         arxiv_metadata = fetch_metadata_from_arxiv(arxiv_id, verbose=verbose)
         if arxiv_metadata:
             return arxiv_metadata
-
     return {}
 
 
-def _check_metadata_exist(pdf_path: str) -> bool:
-    # Check if metadata file exists
-    fname = Path(pdf_path).name
-    metadata_fname = Path(fname).with_suffix(".json")
-    metadata_path = Path(local.get_local_data_path()) / "parsed_docs" / metadata_fname
-    return metadata_path.exists()
-
-
-def get_all_metadata_from_json() -> List[str]:
-    metadata_dir = Path(local.get_local_data_path()) / "parsed_docs"
-    metadata_paths = [str(f) for f in metadata_dir.glob("*.json")]
-    metadatas = []
-    for metadata_path in metadata_paths:
-        with open(metadata_path, "r") as f:
-            metadatas.append(json.load(f))
-    return metadatas
+def get_all_saved_metadata() -> List[dict]:
+    return get_shared_store().all()
 
 
 def check_metadatas_exist(pdf_paths: List[str]) -> List[bool]:
-    return [_check_metadata_exist(pdf_path) for pdf_path in pdf_paths]
-
-
-def _load_metadata_json(pdf_path: str) -> dict:
-    fname = Path(pdf_path).name
-    metadata_fname = Path(fname).with_suffix(".json")
-    metadata_path = Path(local.get_local_data_path()) / "parsed_docs" / metadata_fname
-    with metadata_path.open("r") as f:
-        return json.load(f)
+    return get_shared_store().exists(pdf_paths)
 
 
-def get_metadata(pdf_path: str, verbose: bool = False) -> dict:
-    # Extract metadata from the PDF file
-    if verbose:
-        print(f"Extracting metadata from PDF: {pdf_path}")
-    metadata_pdf = extract_metadata_from_pdf(pdf_path, verbose=verbose)
-
+def resolve_metadata(info: LocalPdfInfo, verbose: bool = False) -> dict:
+    """Look up a paper's metadata online from its DOI or arXiv ID candidates."""
     # Try to fetch DOI metadata
-    doi_metadata = get_doi_metadata(metadata_pdf, pdf_path, verbose)
+    doi_metadata = get_doi_metadata(info.doi_candidates, verbose)
     if doi_metadata:
         if verbose:
             print("    Extracted metadata from DOI.")
         return doi_metadata
 
     # Try to fetch arXiv metadata
-    arxiv_metadata = get_arxiv_metadata(metadata_pdf, pdf_path, verbose)
+    arxiv_metadata = get_arxiv_metadata(info.arxiv_candidates, verbose)
     if arxiv_metadata:
         if verbose:
             print("    Extracted metadata from arXiv ID.")
@@ -284,16 +379,44 @@ def get_metadata(pdf_path: str, verbose: bool = False) -> dict:
 
     if verbose:
         print("    No metadata found from DOI or arXiv ID")
+    return pdf_fallback_metadata(info)
+
 
+def pdf_fallback_metadata(info: LocalPdfInfo) -> dict:
+    """Metadata embedded in the PDF, used when no DOI or arXiv ID could be resolved."""
     # Remove extra fields from the metadata
     all_fields = ["title", "authors", "journal", "publication_date", "paper_id", "url"]
-    metadata_pdf = {key: metadata_pdf.get(key, "") for key in metadata_pdf if key in all_fields}
-    return metadata_pdf
+    return {key: info.pdf_metadata.get(key, "") for key in info.pdf_metadata if key in all_fields}
+
+
+def load_saved_metadata(pdf_path: str, sha256: str | None = None) -> dict | None:
+    """Load the metadata saved for a PDF, or None if it has not been processed yet."""
+    return get_shared_store().get(pdf_path, sha256)
+
+
+def load_saved_metadatas(pdf_paths: Sequence[str]) -> List[dict | None]:
+    """Like `load_saved_metadata` for many PDFs, read at once."""
+    return get_shared_store().get_many(pdf_paths)
+
+
+def get_metadata(pdf_path: str, verbose: bool = False) -> dict:
+    # Extract metadata from the PDF file
+    if verbose:
+        print(f"Extracting metadata from PDF: {pdf_path}")
+    return resolve_metadata(extract_local_metadata(pdf_path), verbose=verbose)
+
+
+def get_missing_fields(metadata: dict) -> List[str]:
+    """Mandatory fields that are absent or empty."""
+    return [key for key in MANDATORY_FIELDS if key not in metadata.keys() or not metadata[key]]
+
+
+def open_pdf(pdf_path: str) -> None:
+    os.system(f'xdg-open "{pdf_path}"&')
 
 
 def deal_with_missing_fields(metadata: dict, pdf_path: str) -> dict:
-    mandatory_fields = ["title", "authors", "journal", "publication_date"]
-    missing_fields = [key for key in mandatory_fields if key not in metadata.keys() or not metadata[key]]
+    missing_fields = get_missing_fields(metadata)
 
     if not missing_fields:
         return metadata
@@ -310,7 +433,7 @@ def deal_with_missing_fields(metadata: dict, pdf_path: str) -> dict:
             f"Otherwise press ENTER to manually enter these data.\n"
         )
         if choice == "open":
-            os.system(f'xdg-open "{pdf_path}"&')
+            open_pdf(pdf_path)
             continue
         if choice == "d":
             doi = input("Please enter the DOI: ")
@@ -341,35 +464,74 @@ def deal_with_missing_fields(metadata: dict, pdf_path: str) -> dict:
         else:
             print("Invalid choice. Please try again.\n")
 
-    missing_fields = [key for key in mandatory_fields if key not in metadata.keys() or not metadata[key]]
+    missing_fields = get_missing_fields(metadata)
     if not missing_fields:
         return metadata
     print("Please enter the missing fields manually. Type 'open' to open the file.")
-    for field in missing_fields:
-        value = input(f"Please enter the {field}: ")
+    for field_name in missing_fields:
+        value = input(f"Please enter the {field_name}: ")
         while value == "open":
-            os.system(f'xdg-open "{pdf_path}"&')
-            value = input(f"Please enter the {field}: ")
-        metadata[field] = value
+            open_pdf(pdf_path)
+            value = input(f"Please enter the {field_name}: ")
+        metadata[field_name] = value
     return metadata
 
 
-def edit_pdf_metadata(pdf_path: str, output_path: str, new_metadata: dict):
-    # Open the existing PDF
-    with open(pdf_path, "rb") as input_pdf:
-        reader = PyPDF2.PdfReader(input_pdf)
-        writer = PyPDF2.PdfWriter()
+def pdf_info_metadata(metadata: dict) -> dict:
+    """Title, author and subject to write into a PDF's info dictionary from resolved metadata.
+
+    The subject carries the paper ID, so a DOI written there is found again without
+    looking through the pages.
+    """
+    authors = metadata.get("authors", "")
+    if not isinstance(authors, str):
+        authors = "; ".join(authors)
+    return {
+        "title": metadata.get("title", ""),
+        "author": authors,
+        "subject": f"{metadata.get('journal', '')} ({metadata.get('publication_date', '')}) "
+        f"ID: {metadata.get('paper_id', '')}",
+    }
+
+
+def edit_pdf_metadata(pdf_path: str, output_path: str, new_metadata: dict) -> bool:
+    """Update the info dictionary of a PDF, returning False if it already had these values.
+
+    `new_metadata` uses PyMuPDF's keys ("title", "author", "subject"...). Editing a PDF
+    in place appends the new info dictionary to the file with an incremental save, so
+    the pages are neither copied nor rewritten. PDFs that cannot be saved incrementally,
+    e.g. after MuPDF repaired them, are rewritten to a temporary file that replaces them.
+    """
+    tmp_path = None
+    with fitz.open(pdf_path) as document:
+        metadata = {key: value for key, value in document.metadata.items() if value is not None}
+        if all(metadata.get(key, "") == value for key, value in new_metadata.items()):
+            return False
+        document.set_metadata({**metadata, **new_metadata})
+        if Path(output_path).resolve() != Path(pdf_path).resolve():
+            document.save(output_path)
+        elif document.can_save_incrementally():
+            document.saveIncr()
+        else:
+            tmp_path = Path(pdf_path).with_name(f".{Path(pdf_path).name}.tmp")
+            document.save(tmp_path, garbage=1)
+    if tmp_path is not None:
+        os.replace(tmp_path, pdf_path)
+    return True
 
-        # Add all pages to the writer
-        for page_num in range(len(reader.pages)):
-            writer.add_page(reader.pages[page_num])
 
-        # Update the metadata
-        writer.add_metadata(new_metadata)
+def stamp_pdf_metadata(pdf_path: str, metadata: dict, hash_index: FileHashIndex | None = None) -> bool:
+    """Write resolved metadata into a PDF, returning False if it was already there.
 
-        # Write out the updated PDF
-        with open(output_path, "wb") as output_pdf:
-            writer.write(output_pdf)
+    The PDF keeps its former hash in the hash index, so its parsed document and the
+    ingestion state recorded for it still apply.
+    """
+    hash_index = hash_index if hash_index is not None else FileHashIndex()
+    sha256 = hash_index.get_hash(pdf_path)
+    if not edit_pdf_metadata(pdf_path, pdf_path, pdf_info_metadata(metadata)):
+        return False
+    hash_index.record(pdf_path, sha256)
+    return True
 
 
 def ask_to_edit_metadata_pdf(pdf_path: str, metadata: dict):
@@ -381,18 +543,77 @@ def ask_to_edit_metadata_pdf(pdf_path: str, metadata: dict):
     if not (choice.lower() == "y" or not choice):
         return
 
-    subject = f"{metadata['journal']} ({metadata['publication_date']}) ID: {metadata['id']}"
-    metadata_for_df = {
-        "/Title": metadata["title"],
-        "/Author": metadata["authors"],
-        "/Subject": subject,
-    }
-    edit_pdf_metadata(pdf_path, pdf_path, metadata_for_df)
+    stamp_pdf_metadata(pdf_path, metadata)
     print(f"Metadata for {pdf_path} has been updated.")
 
 
-def fetch_and_process_metadata(files: Sequence[str], verbose: bool) -> List[dict]:
-    metadatas = [get_metadata(file, verbose=verbose) for file in files]
+def try_extract_local_metadata(pdf_path: str) -> LocalPdfInfo:
+    try:
+        return extract_local_metadata(pdf_path)
+    except Exception as e:
+        logger.error(f"Could not read metadata from {pdf_path}: {e}")
+        return LocalPdfInfo(pdf_path=str(pdf_path), pdf_metadata={})
+
+
+async def afetch_metadatas(
+    files: Sequence[str], process_workers: int | None = config.METADATA_PROCESS_WORKERS
+) -> List[dict]:
+    """Get the metadata of PDFs, overlapping local PDF scanning and online lookups.
+
+    PDFs are scanned in a process pool. As soon as a PDF has been scanned, its lookups
+    go through a shared asynchronous client, so CPU and network work run concurrently
+    and many DOIs are fetched at once within the per-service limits.
+    """
+    # Imported here as metadata_client depends on this module
+    from giantsmind.core.metadata_client import MetadataClient
+
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=process_workers) as cpu_pool:
+        async with MetadataClient() as client:
+
+            async def fetch_one(pdf_path: str) -> dict:
+                info = await loop.run_in_executor(cpu_pool, try_extract_local_metadata, pdf_path)
+                return await client.resolve(info)
+
+            return list(await asyncio.gather(*[fetch_one(pdf_path) for pdf_path in files]))
+
+
+def fetch_metadatas(
+    files: Sequence[str], verbose: bool = False, process_workers: int | None = config.METADATA_PROCESS_WORKERS
+) -> List[dict]:
+    if len(files) <= 1:
+        return [resolve_metadata(try_extract_local_metadata(f), verbose=verbose) for f in files]
+    metadatas = asyncio.run(afetch_metadatas(files, process_workers))
+    if verbose:
+        n_resolved = sum(1 for m in metadatas if m.get("paper_id"))
+        print(f"Fetched metadata online for {n_resolved}/{len(files)} PDFs.")
+    return metadatas
+
+
+def queue_for_review(review_queue: ReviewQueue, metadata: dict, pdf_path: str) -> bool:
+    """Queue a paper for review if mandatory fields are missing, returning whether it was queued."""
+    missing_fields = get_missing_fields(metadata)
+    if not missing_fields:
+        return False
+    review_queue.add(pdf_path, metadata, missing_fields)
+    logger.info(f"Fields {missing_fields} are missing for {pdf_path}, queued it for review")
+    return True
+
+
+def fetch_and_process_metadata(
+    files: Sequence[str], verbose: bool, review_queue: ReviewQueue | None = None
+) -> List[dict | None]:
+    """Fetch the metadata of PDFs and complete the missing fields.
+
+    Missing fields are asked for interactively or, if a review queue is given, the
+    paper is queued for review and its metadata is None.
+    """
+    metadatas = fetch_metadatas(files, verbose=verbose)
+    if review_queue is not None:
+        return [
+            None if queue_for_review(review_queue, metadata, pdf_path) else metadata
+            for metadata, pdf_path in zip(metadatas, files)
+        ]
     return [deal_with_missing_fields(metadata, pdf_path) for metadata, pdf_path in zip(metadatas, files)]
 
 
@@ -405,19 +626,20 @@ def add_file_path_to_metadata(metadatas: List[dict], pdf_paths: List[str]) -> Li
     return new_metadatas
 
 
-def _save_metadata_to_json(metadata: dict, pdf_path: str):
-    fname = Path(pdf_path).name
-    metadata_fname = Path(fname).with_suffix(".json")
-    metadata_folder = Path(local.get_local_data_path()) / "parsed_docs"
-    metadata_folder.mkdir(parents=True, exist_ok=True)
-    metadata_path = metadata_folder / metadata_fname
-    with metadata_path.open("w") as f:
-        json.dump(metadata, f, indent=4)
+def complete_metadata(metadata: dict, pdf_path: str) -> dict:
+    """Fill in missing fields, attach the file path and save the metadata of one paper."""
+    metadata = deal_with_missing_fields(metadata, pdf_path)
+    metadata = add_file_path_to_metadata([metadata], [pdf_path])[0]
+    save_metadata(metadata, pdf_path)
+    return metadata
+
 
+def save_metadata(metadata: dict, pdf_path: str):
+    get_shared_store().save(pdf_path, metadata)
 
-def save_metadatas_to_json(metadatas: List[dict], pdf_paths: List[str]):
-    for metadata, pdf_path in zip(metadatas, pdf_paths):
-        _save_metadata_to_json(metadata, pdf_path)
+
+def save_metadatas(metadatas: List[dict], pdf_paths: List[str]):
+    get_shared_store().save_many(metadatas, pdf_paths)
 
 
 def convert_metadata_to_dataclass(metadatas: List[dict]) -> List[Metadata]:
@@ -446,24 +668,33 @@ def convert_metadata_to_dataclass(metadatas: List[dict]) -> List[Metadata]:
     return metadata_objects
 
 
-def process_metadata(pdf_paths: Sequence[str], verbose: bool = True) -> List[Metadata]:
-    """Get and save metadata for a list of files."""
+def process_metadata(
+    pdf_paths: Sequence[str], verbose: bool = True, review_queue: ReviewQueue | None = None
+) -> List[Metadata]:
+    """Get and save metadata for a list of files.
+
+    With a review queue, papers with missing fields are queued instead of prompting
+    for them, and left out of the result.
+    """
     if not pdf_paths and verbose:
         print("No files to process.")
         return
 
+    saved = load_saved_metadatas(pdf_paths)
     pdf_paths_exist, index_exist, pdf_paths_to_process, index_to_process = utils.get_exist_absent(
-        pdf_paths, check_metadatas_exist
+        pdf_paths, lambda _: [metadata is not None for metadata in saved]
     )
     metadatas = []
-    metadatas_existing = []
+    metadatas_existing = [saved[i] for i in index_exist]
     if pdf_paths_to_process:
-        metadatas = fetch_and_process_metadata(pdf_paths_to_process, verbose)
-        metadatas = add_file_path_to_metadata(metadatas, pdf_paths_to_process)
-        save_metadatas_to_json(metadatas, pdf_paths_to_process)
-    if pdf_paths_exist:
-        metadatas_existing = [_load_metadata_json(pdf_path) for pdf_path in pdf_paths_exist]
+        metadatas = fetch_and_process_metadata(pdf_paths_to_process, verbose, review_queue)
+        # Papers queued for review have no metadata yet
+        resolved = [(m, p) for m, p in zip(metadatas, pdf_paths_to_process) if m is not None]
+        for metadata, pdf_path in resolved:
+            metadata["file_path"] = pdf_path
+        if resolved:
+            save_metadatas(*map(list, zip(*resolved)))
     metadatas = utils.reorder_merge_lists(metadatas_existing, metadatas, index_exist, index_to_process)
-    metadata_objs = convert_metadata_to_dataclass(metadatas)
+    metadata_objs = convert_metadata_to_dataclass([m for m in metadatas if m is not None])
 
     return metadata_objs
@@ -0,0 +1,216 @@
+import json
+import sqlite3
+import threading
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+from langchain_core.documents.base import Document
+
+from giantsmind.utils import local
+
+DEFAULT_JOURNAL_PATH = Path(local.get_local_data_path()) / "ingest_journal.db"
+
+STAGES = ("hashed", "metadata", "parsed", "chunked", "embedded", "committed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    pdf_path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    metadata TEXT,
+    failed_stage TEXT,
+    error TEXT,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingest_payloads (
+    pdf_path TEXT PRIMARY KEY,
+    chunks TEXT,
+    embeddings BLOB,
+    n_dims INTEGER
+);
+"""
+
+
+@dataclass
+class JournalEntry:
+    pdf_path: str
+    sha256: str
+    stage: str
+    metadata: dict | None = None
+    failed_stage: str | None = None
+    error: str | None = None
+
+    def reached(self, stage: str) -> bool:
+        """Whether the PDF went through `stage` already."""
+        return STAGES.index(self.stage) >= STAGES.index(stage)
+
+
+class IngestJournal:
+    """Durable record of the last ingestion stage each PDF completed.
+
+    Stages are, in order: hashed, metadata, parsed, chunked, embedded and committed.
+    Each update is its own SQLite transaction, so an interrupted run leaves every PDF
+    at the last stage it fully completed. The completed metadata, chunks and embeddings
+    are kept until the paper is committed, so the next run resumes each PDF where it
+    stopped. A PDF whose content changed starts over.
+    """
+
+    def __init__(self, db_path: str | Path | None = None, clock: Callable[[], float] = time.time):
+        self.db_path = Path(db_path) if db_path is not None else DEFAULT_JOURNAL_PATH
+        self.clock = clock
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._conn:
+            yield self._conn
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get(self, pdf_path: str) -> JournalEntry | None:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT pdf_path, sha256, stage, metadata, failed_stage, error FROM ingest_jobs "
+                "WHERE pdf_path = ?",
+                (str(pdf_path),),
+            ).fetchone()
+        if row is None:
+            return None
+        pdf_path, sha256, stage, metadata, failed_stage, error = row
+        return JournalEntry(
+            pdf_path, sha256, stage, json.loads(metadata) if metadata else None, failed_stage, error
+        )
+
+    def start(self, pdf_path: str, sha256: str) -> JournalEntry:
+        """Get the journal entry of a PDF, starting a new one if it is unknown or has changed."""
+        entry = self.get(pdf_path)
+        if entry is not None and entry.sha256 == sha256:
+            return entry
+        now = self.clock()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ingest_jobs (pdf_path, sha256, stage, started_at, updated_at) "
+                "VALUES (?, ?, 'hashed', ?, ?)",
+                (str(pdf_path), sha256, now, now),
+            )
+            conn.execute("DELETE FROM ingest_payloads WHERE pdf_path = ?", (str(pdf_path),))
+        return JournalEntry(str(pdf_path), sha256, "hashed")
+
+    def _advance(
+        self, conn: sqlite3.Connection, pdf_path: str, stage: str, metadata: dict | None = None
+    ) -> None:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown ingestion stage '{stage}'")
+        conn.execute(
+            "UPDATE ingest_jobs SET stage = ?, metadata = COALESCE(?, metadata), failed_stage = NULL, "
+            "error = NULL, updated_at = ? WHERE pdf_path = ?",
+            (stage, json.dumps(metadata) if metadata is not None else None, self.clock(), str(pdf_path)),
+        )
+        if stage == "committed":
+            conn.execute("DELETE FROM ingest_payloads WHERE pdf_path = ?", (str(pdf_path),))
+
+    def advance(self, pdf_path: str, stage: str, metadata: dict | None = None) -> None:
+        """Record that a PDF completed `stage`, clearing any previous failure."""
+        with self._transaction() as conn:
+            self._advance(conn, pdf_path, stage, metadata)
+
+    def fail(self, pdf_path: str, stage: str, error: BaseException | str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE ingest_jobs SET failed_stage = ?, error = ?, updated_at = ? WHERE pdf_path = ?",
+                (stage, str(error), self.clock(), str(pdf_path)),
+            )
+
+    def save_chunks(self, pdf_path: str, chunks: List[Document]) -> None:
+        """Keep the chunks of a PDF until it is committed and record the chunked stage."""
+        serialized = json.dumps([{"page_content": c.page_content, "metadata": c.metadata} for c in chunks])
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO ingest_payloads (pdf_path, chunks) VALUES (?, ?) "
+                "ON CONFLICT (pdf_path) DO UPDATE SET chunks = excluded.chunks",
+                (str(pdf_path), serialized),
+            )
+            self._advance(conn, pdf_path, "chunked")
+
+    def load_chunks(self, pdf_path: str) -> List[Document] | None:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT chunks FROM ingest_payloads WHERE pdf_path = ?", (str(pdf_path),)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return [Document(**chunk) for chunk in json.loads(row[0])]
+
+    def save_embeddings(self, pdf_path: str, embeddings: List[List[float]]) -> None:
+        """Keep the chunk embeddings of a PDF until it is committed and record the embedded stage."""
+        n_dims = len(embeddings[0]) if embeddings else 0
+        flat = array("d", (value for embedding in embeddings for value in embedding))
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE ingest_payloads SET embeddings = ?, n_dims = ? WHERE pdf_path = ?",
+                (flat.tobytes(), n_dims, str(pdf_path)),
+            )
+            self._advance(conn, pdf_path, "embedded")
+
+    def load_embeddings(self, pdf_path: str) -> List[List[float]] | None:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT embeddings, n_dims FROM ingest_payloads WHERE pdf_path = ?", (str(pdf_path),)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        flat, n_dims = array("d"), row[1]
+        flat.frombytes(row[0])
+        return [flat[i : i + n_dims].tolist() for i in range(0, len(flat), n_dims)] if n_dims else []
+
+    def forget(self, pdf_path: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM ingest_jobs WHERE pdf_path = ?", (str(pdf_path),))
+            conn.execute("DELETE FROM ingest_payloads WHERE pdf_path = ?", (str(pdf_path),))
+
+    def paths(self) -> List[str]:
+        with self._transaction() as conn:
+            return [row[0] for row in conn.execute("SELECT pdf_path FROM ingest_jobs")]
+
+    def paths_for_paper(self, paper_id: str) -> List[str]:
+        """PDFs whose recorded metadata has the given paper ID."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT pdf_path FROM ingest_jobs WHERE json_extract(metadata, '$.paper_id') = ?", (paper_id,)
+            )
+            return [row[0] for row in rows]
+
+    def progress(self) -> Dict[str, int]:
+        """Number of PDFs at each stage, and of PDFs whose last attempt failed."""
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT stage, failed_stage IS NOT NULL FROM ingest_jobs").fetchall()
+        counts = Counter(stage for stage, _ in rows)
+        progress = {stage: counts.get(stage, 0) for stage in STAGES}
+        progress["failed"] = sum(failed for _, failed in rows)
+        return progress
+
+    def report(self, since: float) -> str:
+        """Summary of the journal, with the ingestion throughput since `since`."""
+        with self._transaction() as conn:
+            (n_committed,) = conn.execute(
+                "SELECT COUNT(*) FROM ingest_jobs WHERE stage = 'committed' AND updated_at >= ?", (since,)
+            ).fetchone()
+        elapsed = max(self.clock() - since, 1e-9)
+        progress = self.progress()
+        in_progress = sum(n for stage, n in progress.items() if stage not in ("committed", "failed"))
+        return (
+            f"Committed {n_committed} papers this run ({n_committed / elapsed * 60:.1f} papers/min); "
+            f"journal: {progress['committed']} committed, {in_progress} in progress, "
+            f"{progress['failed']} failed"
+        )
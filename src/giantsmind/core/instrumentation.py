@@ -0,0 +1,224 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, TextIO, TypeVar
+
+from giantsmind.utils import local
+
+T = TypeVar("T")
+
+DEFAULT_REPORTS_PATH = Path(local.get_local_data_path()) / "reports"
+
+# What each step of the ingestion mostly waits on
+STEP_RESOURCES = {
+    "scan": "disk",
+    "hash": "disk",
+    "metadata": "cpu",
+    "lookup": "network",
+    "parse": "network",
+    "load": "disk",
+    "chunk": "cpu",
+    "embed": "cpu",
+    "vector_write": "disk",
+    "sql_write": "disk",
+}
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, 0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+@dataclass
+class Measurement:
+    """Handle of a measured block, to report the bytes it processed once they are known."""
+
+    bytes: int = 0
+
+
+@dataclass
+class StepMetrics:
+    resource: str
+    count: int = 0
+    errors: int = 0
+    skipped: int = 0
+    bytes: int = 0
+    durations: List[float] = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return sum(self.durations)
+
+    def to_dict(self) -> dict:
+        seconds = self.seconds
+        return {
+            "resource": self.resource,
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": self.errors / self.count if self.count else 0.0,
+            "skipped": self.skipped,
+            "seconds": seconds,
+            "p50": percentile(self.durations, 50),
+            "p95": percentile(self.durations, 95),
+            "bytes": self.bytes,
+            "items_per_second": self.count / seconds if seconds > 0 else 0.0,
+            "mb_per_second": self.bytes / 1e6 / seconds if seconds > 0 else 0.0,
+        }
+
+
+class RunMetrics:
+    """Counts, durations, bytes and errors of each step of an ingestion run.
+
+    Steps are measured from the worker threads and the event loop alike. Each step is
+    tagged with the resource it mostly waits on, so the run report can tell whether a
+    slow run is bound by the network, the CPU or the disk: the resource whose steps were
+    busy the longest, summed over concurrent workers.
+    """
+
+    def __init__(self, resources: Dict[str, str] | None = None, clock: Callable[[], float] = time.monotonic):
+        self.resources = {**STEP_RESOURCES, **(resources or {})}
+        self.clock = clock
+        self.started_at = datetime.now()
+        self._start = clock()
+        self._steps: Dict[str, StepMetrics] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self) -> float:
+        return self.clock() - self._start
+
+    def _step(self, step: str) -> StepMetrics:
+        if step not in self._steps:
+            self._steps[step] = StepMetrics(self.resources.get(step, "cpu"))
+        return self._steps[step]
+
+    def record(self, step: str, seconds: float, n_bytes: int = 0, error: bool = False) -> None:
+        with self._lock:
+            metrics = self._step(step)
+            metrics.count += 1
+            metrics.errors += error
+            metrics.bytes += n_bytes
+            metrics.durations.append(seconds)
+
+    def skip(self, step: str) -> None:
+        """Count an item that did not need the step, e.g. a PDF whose parsed document is cached."""
+        with self._lock:
+            self._step(step).skipped += 1
+
+    @contextmanager
+    def measure(self, step: str, n_bytes: int = 0) -> Iterator[Measurement]:
+        """Time a block as one item of `step`, counting it as an error if it raises."""
+        measurement = Measurement(n_bytes)
+        start = self.clock()
+        try:
+            yield measurement
+        except Exception:
+            self.record(step, self.clock() - start, measurement.bytes, error=True)
+            raise
+        self.record(step, self.clock() - start, measurement.bytes)
+
+    def measure_iterable(
+        self, step: str, iterable: Iterable[T], size: Callable[[T], int] = lambda item: 0
+    ) -> Iterator[T]:
+        """Iterate over `iterable`, e.g. a directory walk, timing the production of each item."""
+        iterator = iter(iterable)
+        while True:
+            start = self.clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(step, self.clock() - start, size(item))
+            yield item
+
+    def counts(self) -> Dict[str, tuple[int, int]]:
+        """Number of items and errors of each step so far."""
+        with self._lock:
+            return {step: (metrics.count, metrics.errors) for step, metrics in self._steps.items()}
+
+    def report(self, **extra) -> dict:
+        with self._lock:
+            steps = {step: metrics.to_dict() for step, metrics in self._steps.items()}
+        busy: Dict[str, float] = {}
+        for metrics in steps.values():
+            busy[metrics["resource"]] = busy.get(metrics["resource"], 0.0) + metrics["seconds"]
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "elapsed": self.elapsed,
+            **extra,
+            "steps": steps,
+            "busy_seconds": busy,
+            "bound_by": max(busy, key=busy.get) if busy else None,
+        }
+
+    def summary(self) -> str:
+        report = self.report()
+        lines = [f"Time spent by each step, mostly waiting on the {report['bound_by']}:"]
+        for step, metrics in report["steps"].items():
+            lines.append(
+                f"  {step:<13}{metrics['count']:>7} items {metrics['errors']:>5} failed "
+                f"{metrics['seconds']:>9.1f}s busy {metrics['mb_per_second']:>8.1f} MB/s"
+            )
+        return "\n".join(lines)
+
+    def write_report(self, folder: str | Path | None = None, **extra) -> Path:
+        """Write the report as JSON in `folder`, named after the start of the run."""
+        folder = Path(folder) if folder is not None else DEFAULT_REPORTS_PATH
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"ingest-{self.started_at:%Y%m%d-%H%M%S-%f}.json"
+        path.write_text(json.dumps(self.report(**extra), indent=2) + "\n")
+        return path
+
+
+class ProgressDisplay:
+    """Line redrawn on a terminal with the number of items each step went through.
+
+    Nothing is displayed when `stream` is not a terminal or the display is not `enabled`,
+    e.g. while the user may be prompted, since redrawing would erase the prompt. Use as
+    an async context manager.
+    """
+
+    def __init__(
+        self, metrics: RunMetrics, stream: TextIO = sys.stderr, interval: float = 0.5, enabled: bool = True
+    ):
+        self.metrics = metrics
+        self.stream = stream
+        self.interval = interval
+        self.enabled = enabled
+        self._task: asyncio.Task | None = None
+
+    def render(self) -> str:
+        parts = []
+        for step, (count, errors) in self.metrics.counts().items():
+            parts.append(f"{step} {count}" + (f" ({errors} failed)" if errors else ""))
+        return f"[{self.metrics.elapsed:6.1f}s] " + "  ".join(parts)
+
+    def _draw(self) -> None:
+        self.stream.write(f"\r\033[K{self.render()}")
+        self.stream.flush()
+
+    async def _run(self) -> None:
+        while True:
+            self._draw()
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self) -> "ProgressDisplay":
+        if self.enabled and self.stream.isatty():
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._draw()
+            self.stream.write("\n")
+            self._task = None
@@ -0,0 +1,144 @@
+import asyncio
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from typing import Dict, List, Tuple
+
+import fitz
+
+from giantsmind.core import config
+from giantsmind.core.parser_backend import ParsedPage, ParserBackend, ParseStats, page_marker
+from giantsmind.utils.logging import logger
+
+# Bump when the markdown produced changes, so documents are parsed again
+MARKDOWN_FORMAT_VERSION = 1
+HEADING_SIZE_RATIO = 1.15  # text this much larger than the body text is a heading
+MAX_HEADING_LEVEL = 4
+MAX_HEADING_CHARS = 120
+_BOLD_FLAG = 1 << 4
+_BULLETS = ("•", "·", "◦", "▪", "‣", "∙")
+
+
+def _line_style(line: dict) -> Tuple[str, float, bool] | None:
+    """Text of a line, with the font size covering most of its characters and whether it is bold."""
+    spans = [span for span in line["spans"] if span["text"].strip()]
+    if not spans:
+        return None
+    sizes: Counter = Counter()
+    for span in spans:
+        sizes[round(span["size"] * 2) / 2] += len(span["text"].strip())
+    text = "".join(span["text"] for span in line["spans"])
+    bold = all(span["flags"] & _BOLD_FLAG for span in spans)
+    return " ".join(text.split()), sizes.most_common(1)[0][0], bold
+
+
+def _join_lines(lines: List[str]) -> str:
+    """Join the lines of a paragraph, rejoining words hyphenated across lines."""
+    text = ""
+    for line in lines:
+        if text.endswith("-") and line[:1].islower():
+            text = text[:-1] + line
+        elif text:
+            text = f"{text} {line}"
+        else:
+            text = line
+    return text
+
+
+def _text_blocks(page_dict: dict) -> List[Tuple[str, float, bool]]:
+    """Paragraph text, font size and boldness of the text blocks of a page.
+
+    Blocks are split where the style of their lines changes, since a heading is often
+    laid out in the same block as the paragraph following it.
+    """
+    blocks = []
+    for block in page_dict["blocks"]:
+        if block.get("type") != 0:
+            continue
+        styles = [style for style in map(_line_style, block["lines"]) if style is not None]
+        for (size, bold), lines in groupby(styles, key=lambda style: style[1:]):
+            blocks.append((_join_lines([text for text, _, _ in lines]), size, bold))
+    return blocks
+
+
+def _heading_levels(pages: List[List[Tuple[str, float, bool]]], body_size: float) -> Dict[float, int]:
+    """Markdown heading level of each font size used by short blocks larger than the body text."""
+    sizes = {
+        size
+        for blocks in pages
+        for text, size, _ in blocks
+        if size >= body_size * HEADING_SIZE_RATIO and len(text) <= MAX_HEADING_CHARS
+    }
+    return {size: min(level, MAX_HEADING_LEVEL) for level, size in enumerate(sorted(sizes, reverse=True), 1)}
+
+
+def _to_markdown(text: str, size: float, bold: bool, levels: Dict[float, int]) -> str:
+    is_short = len(text) <= MAX_HEADING_CHARS and any(c.isalpha() for c in text)
+    if size in levels and is_short:
+        return f"{'#' * levels[size]} {text}"
+    if bold and is_short:
+        # Headings set in bold at the body size rank below the larger ones
+        return f"{'#' * min(len(levels) + 1, MAX_HEADING_LEVEL)} {text}"
+    if text.startswith(_BULLETS):
+        return f"- {text[1:].lstrip()}"
+    return text
+
+
+def pdf_to_markdown_pages(pdf_path: str) -> List[str]:
+    """Convert a PDF to markdown, one string per page starting with a page marker.
+
+    The body text size is the font size of most characters. Short blocks set in a
+    larger font become headings, one level per size from the largest, and so do short
+    bold blocks. Other blocks become paragraphs.
+    """
+    with fitz.open(pdf_path) as document:
+        pages = [_text_blocks(page.get_text("dict")) for page in document]
+
+    sizes: Counter = Counter()
+    for blocks in pages:
+        for text, size, _ in blocks:
+            sizes[size] += len(text)
+    body_size = sizes.most_common(1)[0][0] if sizes else 0.0
+    levels = _heading_levels(pages, body_size)
+
+    markdown_pages = []
+    for number, blocks in enumerate(pages, 1):
+        parts = [page_marker(number)] + [_to_markdown(*block, levels) for block in blocks]
+        markdown_pages.append("\n\n".join(parts) + "\n")
+    return markdown_pages
+
+
+class LocalPdfParser(ParserBackend):
+    """Parse PDFs offline with PyMuPDF, on a process pool using every core.
+
+    The markdown keeps headings, paragraphs and page markers but, unlike LlamaParse,
+    no tables or equations: it trades fidelity for speed and needs no network access.
+    """
+
+    name = "pymupdf"
+    resource = "cpu"
+    cache_tag = f"pymupdf-markdown-v{MARKDOWN_FORMAT_VERSION}"
+
+    def __init__(self, max_workers: int | None = config.LOCAL_PARSE_WORKERS):
+        self.max_concurrency = max_workers or os.cpu_count() or 1
+        self.stats = ParseStats()
+        self._pool: ProcessPoolExecutor | None = None
+
+    async def parse(self, pdf_path: str) -> List[ParsedPage]:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        try:
+            pages = await loop.run_in_executor(self._pool, pdf_to_markdown_pages, str(pdf_path))
+        except Exception as error:
+            self.stats.failed += 1
+            logger.error(f"Failed to parse {pdf_path}: {type(error).__name__}: {error}")
+            raise
+        self.stats.parsed += 1
+        return [ParsedPage(text, page) for page, text in enumerate(pages, 1)]
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown)
@@ -0,0 +1,52 @@
+import re
+from pathlib import Path
+from typing import List, Tuple
+
+from langchain_core.documents.base import Document
+
+from giantsmind.core import parse_cache
+
+# Page markers, ATX headings, and the code fences inside which lines are not headings
+_STRUCTURE = re.compile(
+    r"^(?:<!-- page (?P<page>\d+) -->"
+    r"|(?P<level>#{1,6})[ \t]+(?P<title>.*?)(?:[ \t]+#+)?[ \t]*"
+    r"|(?P<fence>```|~~~).*)$",
+    re.MULTILINE,
+)
+
+
+def markdown_outline(text: str) -> Tuple[List[Tuple[int, int]], List[Tuple[int, str, int]]]:
+    """Character offsets of the pages and headings of a markdown document.
+
+    Pages are the (page number, offset) of each page marker and headings the (level,
+    title, offset) of each ATX heading outside of code blocks.
+    """
+    pages: List[Tuple[int, int]] = []
+    headings: List[Tuple[int, str, int]] = []
+    fence = None
+    for match in _STRUCTURE.finditer(text):
+        if match["fence"]:
+            if fence is None:
+                fence = match["fence"]
+            elif match["fence"] == fence:
+                fence = None
+        elif fence is not None:
+            continue
+        elif match["page"]:
+            pages.append((int(match["page"]), match.start()))
+        elif match["title"]:
+            headings.append((len(match["level"]), match["title"], match.start()))
+    return pages, headings
+
+
+def load_markdown_document(document_path: str | Path) -> Document:
+    """Load a parsed document as is, gzipped or not, without partitioning it into elements.
+
+    The offsets of its pages and headings are kept in the `pages` and `headings`
+    metadata, see `markdown_outline`.
+    """
+    text = parse_cache.read_document(document_path)
+    pages, headings = markdown_outline(text)
+    return Document(
+        page_content=text, metadata={"source": str(document_path), "pages": pages, "headings": headings}
+    )
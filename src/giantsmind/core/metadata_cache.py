@@ -0,0 +1,174 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Mapping, Sequence
+
+from giantsmind.core import config
+from giantsmind.utils import local
+from giantsmind.utils.sqlite import batched
+
+DEFAULT_CACHE_PATH = Path(local.get_local_data_path()) / "metadata_cache.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata_responses (
+    key TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metadata_responses_accessed_at ON metadata_responses (accessed_at);
+CREATE INDEX IF NOT EXISTS metadata_responses_expires_at ON metadata_responses (expires_at);
+-- Number of lookups, kept up to date by triggers so writes never count the table
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    n_entries INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_size (id, n_entries) SELECT 0, COUNT(*) FROM metadata_responses;
+CREATE TRIGGER IF NOT EXISTS metadata_responses_insert AFTER INSERT ON metadata_responses BEGIN
+    UPDATE cache_size SET n_entries = n_entries + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS metadata_responses_delete AFTER DELETE ON metadata_responses BEGIN
+    UPDATE cache_size SET n_entries = n_entries - 1;
+END;
+"""
+
+
+def normalize_doi(doi: str) -> str:
+    """DOIs are case-insensitive and often written as URLs or with a `doi:` prefix."""
+    doi = re.sub(r"^(https?://(dx\.)?doi\.org/|doi:\s*)", "", doi.strip(), flags=re.IGNORECASE)
+    return doi.rstrip(".").lower()
+
+
+def normalize_arxiv_id(arxiv_id: str) -> str:
+    return re.sub(r"^arxiv:\s*", "", arxiv_id.strip(), flags=re.IGNORECASE).lower()
+
+
+_NORMALIZERS: Dict[str, Callable[[str], str]] = {"doi": normalize_doi, "arxiv": normalize_arxiv_id}
+
+
+class MetadataCache:
+    """Persistent cache of CrossRef and arXiv lookups, keyed by normalized DOI or arXiv ID.
+
+    Found metadata is kept for `ttl` seconds and identifiers the service does not know
+    for `negative_ttl` seconds, stored as empty metadata. When the cache holds more than
+    `max_entries` lookups, the least recently used ones are evicted.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        ttl: float = config.METADATA_CACHE_TTL,
+        negative_ttl: float = config.METADATA_CACHE_NEGATIVE_TTL,
+        max_entries: int = config.METADATA_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.db_path = Path(db_path) if db_path is not None else DEFAULT_CACHE_PATH
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        # One connection for the lifetime of the cache keeps lookups in the microseconds
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._conn:
+            yield self._conn
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @staticmethod
+    def _key(kind: str, identifier: str) -> str:
+        return f"{kind}:{_NORMALIZERS[kind](identifier)}"
+
+    def get_many(self, kind: str, identifiers: Sequence[str]) -> Dict[str, dict]:
+        """Get the cached metadata of each identifier, `{}` for known misses.
+
+        Identifiers that are not cached or whose entry expired are left out.
+        """
+        keys = {self._key(kind, identifier): identifier for identifier in identifiers}
+        now = self.clock()
+        cached = {}
+        with self._transaction() as conn:
+            for batch in batched(list(keys)):
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, metadata FROM metadata_responses "
+                    f"WHERE key IN ({placeholders}) AND expires_at > ?",
+                    [*batch, now],
+                )
+                for key, metadata in rows:
+                    cached[key] = json.loads(metadata)
+                if cached:
+                    hits = [key for key in batch if key in cached]
+                    conn.executemany(
+                        "UPDATE metadata_responses SET accessed_at = ? WHERE key = ?",
+                        [(now, key) for key in hits],
+                    )
+        return {identifier: cached[key] for key, identifier in keys.items() if key in cached}
+
+    def get(self, kind: str, identifier: str) -> dict | None:
+        """Get the cached metadata of an identifier, `{}` for a known miss, None if not cached."""
+        return self.get_many(kind, [identifier]).get(identifier)
+
+    def put_many(self, kind: str, metadatas: Mapping[str, dict]) -> None:
+        """Cache lookups. Empty metadata records that the service does not know the identifier."""
+        now = self.clock()
+        rows = [
+            (
+                self._key(kind, identifier),
+                json.dumps(metadata),
+                now + (self.ttl if metadata else self.negative_ttl),
+                now,
+            )
+            for identifier, metadata in metadatas.items()
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO metadata_responses (key, metadata, expires_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET metadata = excluded.metadata, "
+                "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+                rows,
+            )
+            self._evict(conn, now)
+
+    def put(self, kind: str, identifier: str, metadata: dict) -> None:
+        self.put_many(kind, {identifier: metadata})
+
+    def _evict(self, conn, now: float) -> None:
+        conn.execute("DELETE FROM metadata_responses WHERE expires_at <= ?", (now,))
+        (n_entries,) = conn.execute("SELECT n_entries FROM cache_size").fetchone()
+        if n_entries > self.max_entries:
+            conn.execute(
+                "DELETE FROM metadata_responses WHERE key IN "
+                "(SELECT key FROM metadata_responses ORDER BY accessed_at LIMIT ?)",
+                (n_entries - self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM metadata_responses")
+
+    def __len__(self) -> int:
+        with self._transaction() as conn:
+            return conn.execute("SELECT n_entries FROM cache_size").fetchone()[0]
+
+
+_shared_caches: Dict[Path, MetadataCache] = {}
+
+
+def get_shared_cache() -> MetadataCache:
+    """The cache at `DEFAULT_CACHE_PATH`, opened once per process."""
+    if DEFAULT_CACHE_PATH not in _shared_caches:
+        _shared_caches[DEFAULT_CACHE_PATH] = MetadataCache(DEFAULT_CACHE_PATH)
+    return _shared_caches[DEFAULT_CACHE_PATH]
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import httpx
+
+from giantsmind.core import config
+from giantsmind.core import get_metadata as gm
+from giantsmind.core.metadata_cache import MetadataCache, get_shared_cache
+from giantsmind.utils.logging import logger
+
+
+@dataclass
+class HostPolicy:
+    """Politeness rules for one metadata service.
+
+    Attributes:
+        max_concurrency: Maximum number of requests in flight to the service
+        min_interval: Minimum number of seconds between the start of two requests
+    """
+
+    max_concurrency: int
+    min_interval: float = 0.0
+
+
+class _HostLimiter:
+    def __init__(self, policy: HostPolicy):
+        self.policy = policy
+        self._semaphore = asyncio.Semaphore(policy.max_concurrency)
+        self._lock = asyncio.Lock()
+        self._last_start = float("-inf")
+
+    async def __aenter__(self) -> None:
+        await self._semaphore.acquire()
+        async with self._lock:
+            wait = self._last_start + self.policy.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_start = time.monotonic()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._semaphore.release()
+
+
+class MetadataClient:
+    """Asynchronous CrossRef and arXiv client sharing one keep-alive connection pool.
+
+    Each service has its own concurrency limit and minimum spacing between requests,
+    as arXiv asks clients to space their requests. arXiv lookups made while waiting for
+    the next request slot are coalesced into one multi-ID query. Failed requests,
+    timeouts and malformed responses resolve to empty metadata, like the synchronous
+    fetchers. Lookups are answered from the persistent `MetadataCache` when possible.
+    Use as an async context manager.
+    """
+
+    def __init__(
+        self,
+        crossref_url: str = config.CROSSREF_API_URL,
+        arxiv_url: str = config.ARXIV_API_URL,
+        crossref_policy: HostPolicy | None = None,
+        arxiv_policy: HostPolicy | None = None,
+        timeout: float = config.HTTP_TIMEOUT,
+        arxiv_batch_size: int = config.ARXIV_BATCH_SIZE,
+        arxiv_batch_linger: float = config.ARXIV_BATCH_LINGER,
+        cache: MetadataCache | None = None,
+    ):
+        self.crossref_url = crossref_url.rstrip("/")
+        self.arxiv_url = arxiv_url
+        self.policies = {
+            "crossref": crossref_policy
+            or HostPolicy(config.CROSSREF_MAX_CONCURRENCY, config.CROSSREF_MIN_INTERVAL),
+            "arxiv": arxiv_policy or HostPolicy(config.ARXIV_MAX_CONCURRENCY, config.ARXIV_MIN_INTERVAL),
+        }
+        self.timeout = timeout
+        self.arxiv_batch_size = arxiv_batch_size
+        self.arxiv_batch_linger = arxiv_batch_linger
+        self.cache = cache if cache is not None else get_shared_cache()
+        self._client: httpx.AsyncClient | None = None
+        self._limiters: Dict[str, _HostLimiter] = {}
+        self._arxiv_pending: List[Tuple[str, asyncio.Future]] = []
+        self._arxiv_flusher: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "MetadataClient":
+        max_connections = sum(policy.max_concurrency for policy in self.policies.values())
+        headers = {"User-Agent": "giantsmind"}
+        if config.CONTACT_EMAIL:
+            # CrossRef routes identified clients to its "polite" pool
+            headers["User-Agent"] += f" (mailto:{config.CONTACT_EMAIL})"
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers=headers,
+            follow_redirects=True,
+        )
+        self._limiters = {name: _HostLimiter(policy) for name, policy in self.policies.items()}
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._arxiv_flusher is not None:
+            self._arxiv_flusher.cancel()
+            await asyncio.gather(self._arxiv_flusher, return_exceptions=True)
+            self._arxiv_flusher = None
+        await self._client.aclose()
+        self._client = None
+
+    async def _request(self, url: str, params: dict | None = None) -> httpx.Response | None:
+        if self._client is None:
+            raise RuntimeError("MetadataClient must be used as an async context manager")
+        try:
+            return await self._client.get(url, params=params)
+        except httpx.HTTPError as e:
+            logger.warning(f"Request to {url} failed: {type(e).__name__}: {e}")
+            return None
+
+    async def _get(self, service: str, url: str, params: dict | None = None) -> httpx.Response | None:
+        async with self._limiters[service]:
+            return await self._request(url, params)
+
+    async def fetch_doi(self, doi: str) -> dict:
+        cached = self.cache.get("doi", doi)
+        if cached is not None:
+            return cached
+        response = await self._get("crossref", f"{self.crossref_url}/works/{doi}")
+        if response is None or response.status_code != 200:
+            if response is not None and response.status_code == 404:
+                self.cache.put("doi", doi, {})
+            return {}
+        try:
+            metadata = gm.parse_crossref_message(response.json().get("message", {}), doi)
+        except Exception as e:
+            logger.warning(f"Could not parse CrossRef response for DOI {doi}: {e}")
+            return {}
+        self.cache.put("doi", doi, metadata)
+        return metadata
+
+    async def fetch_arxiv(self, arxiv_id: str) -> dict:
+        if self._client is None:
+            raise RuntimeError("MetadataClient must be used as an async context manager")
+        cached = self.cache.get("arxiv", arxiv_id)
+        if cached is not None:
+            return cached
+        future = asyncio.get_running_loop().create_future()
+        self._arxiv_pending.append((arxiv_id, future))
+        if self._arxiv_flusher is None or self._arxiv_flusher.done():
+            self._arxiv_flusher = asyncio.create_task(self._flush_arxiv())
+        return await future
+
+    async def fetch_arxiv_many(self, arxiv_ids: Sequence[str]) -> Dict[str, dict]:
+        """Fetch many arXiv IDs in multi-ID queries, without the IDs that were not found."""
+        metadatas = await asyncio.gather(*[self.fetch_arxiv(arxiv_id) for arxiv_id in arxiv_ids])
+        return {arxiv_id: metadata for arxiv_id, metadata in zip(arxiv_ids, metadatas) if metadata}
+
+    async def _flush_arxiv(self) -> None:
+        # Give concurrent lookups a chance to join the first query
+        await asyncio.sleep(self.arxiv_batch_linger)
+        singles: List[Tuple[str, asyncio.Future]] = []
+        while self._arxiv_pending or singles:
+            async with self._limiters["arxiv"]:
+                # Take the batch once the request slot is ours, so IDs queued meanwhile join it
+                if singles:
+                    batch = [singles.pop()]
+                else:
+                    batch = self._arxiv_pending[: self.arxiv_batch_size]
+                    del self._arxiv_pending[: len(batch)]
+                arxiv_ids = list(dict.fromkeys(arxiv_id for arxiv_id, _ in batch))
+                response = await self._request(self.arxiv_url, params=gm.arxiv_query_params(arxiv_ids))
+
+            if response is not None and response.status_code == 400 and len(arxiv_ids) > 1:
+                # A single malformed ID fails the whole query, ask for the IDs one by one
+                logger.warning(f"arXiv rejected a query for {len(arxiv_ids)} IDs, retrying them one by one")
+                singles.extend(batch)
+                continue
+            metadatas = {}
+            if response is not None and response.status_code == 200:
+                try:
+                    metadatas = gm.parse_arxiv_feed(response.content, arxiv_ids)
+                except Exception as e:
+                    logger.warning(f"Could not parse arXiv response for IDs {', '.join(arxiv_ids)}: {e}")
+                else:
+                    self.cache.put_many(
+                        "arxiv", {arxiv_id: metadatas.get(arxiv_id, {}) for arxiv_id in arxiv_ids}
+                    )
+            for arxiv_id, future in batch:
+                if not future.done():
+                    future.set_result(metadatas.get(arxiv_id, {}))
+
+    async def resolve(self, info: gm.LocalPdfInfo) -> dict:
+        """Asynchronous counterpart of `get_metadata.resolve_metadata`."""
+        for doi in info.doi_candidates:
+            metadata = await self.fetch_doi(doi)
+            if metadata:
+                return metadata
+        for arxiv_id in info.arxiv_candidates:
+            metadata = await self.fetch_arxiv(arxiv_id)
+            if metadata:
+                return metadata
+        return gm.pdf_fallback_metadata(info)
+
+    async def fetch_dois(self, dois: Sequence[str]) -> List[dict]:
+        return list(await asyncio.gather(*[self.fetch_doi(doi) for doi in dois]))
@@ -0,0 +1,216 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from giantsmind.core import config, parse_cache
+from giantsmind.utils import local
+from giantsmind.utils.hash_index import FileHashIndex
+from giantsmind.utils.logging import logger
+from giantsmind.utils.sqlite import batched
+
+DEFAULT_STORE_PATH = Path(local.get_local_data_path()) / "metadata.db"
+SIDECARS_MIGRATION = "json_sidecars"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS paper_metadata (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pdf_path TEXT NOT NULL,
+    sha256 TEXT,
+    metadata TEXT NOT NULL,
+    saved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS paper_metadata_pdf_path ON paper_metadata (pdf_path, id);
+CREATE INDEX IF NOT EXISTS paper_metadata_sha256 ON paper_metadata (sha256, id);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied_at REAL NOT NULL
+);
+"""
+
+# Latest row of each PDF: of each path, then of each content hash, rows without one kept per path
+_LATEST_IDS = (
+    "SELECT MAX(id) FROM paper_metadata WHERE id IN (SELECT MAX(id) FROM paper_metadata GROUP BY pdf_path) "
+    "GROUP BY COALESCE(sha256, 'path:' || pdf_path)"
+)
+
+
+def _absolute(pdf_path: str | Path) -> str:
+    return str(Path(pdf_path).absolute())
+
+
+class MetadataStore:
+    """Metadata resolved for each PDF, in a single append-only SQLite table.
+
+    Saving metadata again appends a row, and the latest row of a PDF wins. Rows are
+    keyed by the absolute path of the PDF and, when a hash index is given, by its
+    content hash, so a PDF that was moved or renamed finds its metadata again. Reads
+    and existence checks of many PDFs take one query per batch of 500 paths.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        hash_index: FileHashIndex | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.db_path = Path(db_path) if db_path is not None else DEFAULT_STORE_PATH
+        self.hash_index = hash_index
+        self.clock = clock
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._conn:
+            yield self._conn
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _hashes(self, pdf_paths: Sequence[str]) -> List[str | None]:
+        """Content hashes of the PDFs, None for PDFs that do not exist or without a hash index."""
+        hashes: List[str | None] = [None] * len(pdf_paths)
+        if self.hash_index is None:
+            return hashes
+        existing = [i for i, pdf_path in enumerate(pdf_paths) if os.path.isfile(pdf_path)]
+        for i, sha256 in zip(existing, self.hash_index.get_hashes([pdf_paths[i] for i in existing])):
+            hashes[i] = sha256
+        return hashes
+
+    def save_many(
+        self, metadatas: Sequence[dict], pdf_paths: Sequence[str | Path], sha256s: Sequence[str] | None = None
+    ) -> None:
+        """Save the metadata of PDFs, hashing them with the hash index unless their `sha256s` are given."""
+        paths = [_absolute(pdf_path) for pdf_path in pdf_paths]
+        sha256s = list(sha256s) if sha256s is not None else self._hashes(paths)
+        now = self.clock()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO paper_metadata (pdf_path, sha256, metadata, saved_at) VALUES (?, ?, ?, ?)",
+                [
+                    (path, sha256, json.dumps(metadata), now)
+                    for path, sha256, metadata in zip(paths, sha256s, metadatas)
+                ],
+            )
+
+    def save(self, pdf_path: str | Path, metadata: dict, sha256: str | None = None) -> None:
+        self.save_many([metadata], [pdf_path], None if sha256 is None else [sha256])
+
+    def _latest(self, conn: sqlite3.Connection, column: str, keys: Sequence[str]) -> Dict[str, dict]:
+        latest = {}
+        for batch in batched(list(dict.fromkeys(keys))):
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT {column}, metadata FROM paper_metadata WHERE id IN "
+                f"(SELECT MAX(id) FROM paper_metadata WHERE {column} IN ({placeholders}) GROUP BY {column})",
+                batch,
+            )
+            latest.update((key, json.loads(metadata)) for key, metadata in rows)
+        return latest
+
+    def get_many(
+        self, pdf_paths: Sequence[str | Path], sha256s: Sequence[str | None] | None = None
+    ) -> List[dict | None]:
+        """Latest metadata saved for each PDF, None for PDFs without metadata.
+
+        PDFs never saved under their path are looked up by content hash, given or from
+        the hash index, in which case their metadata points at their current path.
+        """
+        paths = [_absolute(pdf_path) for pdf_path in pdf_paths]
+        with self._transaction() as conn:
+            by_path = self._latest(conn, "pdf_path", paths)
+        missing = [i for i, path in enumerate(paths) if path not in by_path]
+        found_by_hash: Dict[int, dict] = {}
+        if missing and (sha256s is not None or self.hash_index is not None):
+            if sha256s is not None:
+                hashes = [sha256s[i] for i in missing]
+            else:
+                hashes = self._hashes([paths[i] for i in missing])
+            with self._transaction() as conn:
+                by_hash = self._latest(conn, "sha256", [sha256 for sha256 in hashes if sha256])
+            for i, sha256 in zip(missing, hashes):
+                if sha256 in by_hash:
+                    found_by_hash[i] = {**by_hash[sha256], "file_path": str(pdf_paths[i])}
+        return [by_path.get(path, found_by_hash.get(i)) for i, path in enumerate(paths)]
+
+    def get(self, pdf_path: str | Path, sha256: str | None = None) -> dict | None:
+        return self.get_many([pdf_path], None if sha256 is None else [sha256])[0]
+
+    def exists(self, pdf_paths: Sequence[str | Path]) -> List[bool]:
+        return [metadata is not None for metadata in self.get_many(pdf_paths)]
+
+    def all(self) -> List[dict]:
+        """Latest metadata of every PDF.
+
+        A PDF saved under several paths, e.g. moved or renamed, appears once, with the
+        metadata of the path it was saved under last.
+        """
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT metadata FROM paper_metadata WHERE id IN ({_LATEST_IDS}) ORDER BY id"
+            )
+            return [json.loads(metadata) for (metadata,) in rows]
+
+    def __len__(self) -> int:
+        with self._transaction() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM ({_LATEST_IDS})").fetchone()[0]
+
+    def migrate_sidecars(self, folder: str | Path) -> int:
+        """Import the JSON files that held the metadata of each PDF before the store, once.
+
+        Sidecars are identified by the `file_path` they hold, those without one are
+        skipped. The files are left in place. Returns the number of sidecars imported.
+        """
+        with self._transaction() as conn:
+            applied = conn.execute(
+                "SELECT 1 FROM migrations WHERE name = ?", (SIDECARS_MIGRATION,)
+            ).fetchone()
+        if applied:
+            return 0
+        sidecars: List[Tuple[dict, str]] = []
+        n_skipped = 0
+        for path in sorted(Path(folder).glob("*.json")):
+            try:
+                metadata = json.loads(path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read metadata file {path}: {e}")
+                n_skipped += 1
+                continue
+            if not isinstance(metadata, dict) or not metadata.get("file_path"):
+                n_skipped += 1
+                continue
+            sidecars.append((metadata, metadata["file_path"]))
+        if sidecars:
+            self.save_many(*zip(*sidecars))
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO migrations (name, applied_at) VALUES (?, ?)",
+                (SIDECARS_MIGRATION, self.clock()),
+            )
+        if sidecars or n_skipped:
+            logger.info(
+                f"Imported the metadata of {len(sidecars)} PDFs from {folder} into {self.db_path.name}, "
+                f"skipped {n_skipped} files without a PDF path"
+            )
+        return len(sidecars)
+
+
+_shared_stores: Dict[Path, MetadataStore] = {}
+
+
+def get_shared_store() -> MetadataStore:
+    """The store at `DEFAULT_STORE_PATH`, opened once per process, with former JSON sidecars imported."""
+    if DEFAULT_STORE_PATH not in _shared_stores:
+        store = MetadataStore(DEFAULT_STORE_PATH, FileHashIndex(prefilter=config.HASH_PREFILTER))
+        store.migrate_sidecars(parse_cache.get_parsed_docs_folder())
+        _shared_stores[DEFAULT_STORE_PATH] = store
+    return _shared_stores[DEFAULT_STORE_PATH]
@@ -0,0 +1,205 @@
+import gzip
+import hashlib
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import List, Sequence
+
+from giantsmind.core import config
+from giantsmind.core.artifact_store import ArtifactStore
+from giantsmind.utils import local
+from giantsmind.utils.hash_index import FileHashIndex
+from giantsmind.utils.logging import logger
+
+_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+MARKDOWN_SUFFIXES = (".md", ".md.gz")
+CHECKSUM_SUFFIX = ".sha256"
+
+
+def get_parsed_docs_folder() -> Path:
+    folder = Path(local.get_local_data_path()) / "parsed_docs"
+    folder.mkdir(exist_ok=True)
+    return folder
+
+
+def cache_key(pdf_hash: str, instruction: str) -> str:
+    """Key of a parsed document: the PDF content hash combined with the parse instruction."""
+    return hashlib.sha256(f"{pdf_hash}\n{instruction}".encode()).hexdigest()
+
+
+def checksum_path(document_path: str | Path) -> Path:
+    return Path(f"{document_path}{CHECKSUM_SUFFIX}")
+
+
+def write_checksum(document_path: str | Path, digest: str) -> None:
+    """Record the SHA-256 of a document next to it, in the format of `sha256sum`."""
+    path = checksum_path(document_path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(f"{digest}  {Path(document_path).name}\n")
+    os.replace(tmp_path, path)
+
+
+def verify_document(document_path: str | Path) -> bool:
+    """Whether a parsed document exists and matches its recorded checksum.
+
+    Documents parsed before checksums were recorded are trusted, and their checksum is
+    recorded now. The checksum of a matching document modified since it was recorded is
+    recorded again, so `document_exists` trusts the document from then on.
+    """
+    try:
+        digest = hashlib.sha256(Path(document_path).read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return False
+    try:
+        recorded = checksum_path(document_path).read_text().split()[0]
+    except (FileNotFoundError, IndexError):
+        write_checksum(document_path, digest)
+        return True
+    if recorded != digest:
+        logger.warning(f"Parsed document '{Path(document_path).name}' does not match its checksum")
+        return False
+    if _modified_since_checksum(document_path):
+        write_checksum(document_path, digest)
+    return True
+
+
+def _modified_since_checksum(document_path: str | Path) -> bool:
+    return os.stat(document_path).st_mtime_ns > os.stat(checksum_path(document_path)).st_mtime_ns
+
+
+def document_exists(document_path: str | Path) -> bool:
+    """Whether a parsed document exists, without reading it unless it may not match its checksum.
+
+    Documents are written before their checksum, so a document modified after its
+    checksum, or without one, is verified with `verify_document`.
+    """
+    try:
+        if not _modified_since_checksum(document_path):
+            return True
+    except FileNotFoundError:
+        pass
+    return verify_document(document_path)
+
+
+def read_document(document_path: str | Path) -> str:
+    """Text of a parsed document, compressed or not."""
+    if str(document_path).endswith(".gz"):
+        with gzip.open(document_path, "rt") as f:
+            return f.read()
+    return Path(document_path).read_text()
+
+
+class ParseCache:
+    """Content-addressed cache of parsed markdown documents.
+
+    Parsed documents are stored as `<key>.md`, or `<key>.md.gz` when `compress` is set,
+    where the key depends on the SHA-256 of the PDF and on the parse instruction, in the
+    fan-out folders of an `ArtifactStore`.
+    Identical PDFs at different paths share one parsed document, renamed or moved PDFs
+    are not parsed again, and PDFs sharing a file name no longer collide. PDF hashes are
+    looked up in a `FileHashIndex`. A document only counts as parsed if it matches the
+    checksum recorded next to it, which is only read in full when the document was
+    modified after its checksum was recorded.
+    """
+
+    def __init__(
+        self,
+        instruction: str = config.PARSE_INSTRUCTIONS,
+        folder: str | Path | None = None,
+        hash_index: FileHashIndex | None = None,
+        compress: bool = config.COMPRESS_PARSED_DOCS,
+    ):
+        self.instruction = instruction
+        self.compress = compress
+        self.folder = Path(folder) if folder is not None else get_parsed_docs_folder()
+        self.hash_index = (
+            hash_index if hash_index is not None else FileHashIndex(prefilter=config.HASH_PREFILTER)
+        )
+        self.store = ArtifactStore(self.folder)
+
+    def keys(self, pdf_paths: Sequence[str | Path]) -> List[str]:
+        return [cache_key(h, self.instruction) for h in self.hash_index.get_hashes(pdf_paths)]
+
+    def existing_path(self, key: str) -> Path | None:
+        """Path of the parsed document of a key in any format, including the former flat layout."""
+        for suffix in MARKDOWN_SUFFIXES[:: -1 if self.compress else 1]:
+            for path in (self.store.path(key, suffix), self.store.flat_path(key, suffix)):
+                if path.exists():
+                    return path
+        return None
+
+    def _markdown_path(self, key: str) -> Path:
+        path = self.existing_path(key)
+        if path is None:
+            path = self.store.path(key, MARKDOWN_SUFFIXES[1] if self.compress else MARKDOWN_SUFFIXES[0])
+        return path
+
+    def markdown_paths(self, pdf_paths: Sequence[str | Path]) -> List[Path]:
+        """Paths of the parsed documents, in the format they already exist in if any.
+
+        The folders of documents not parsed yet are only created when they are written.
+        """
+        return [self._markdown_path(key) for key in self.keys(pdf_paths)]
+
+    def find_documents(
+        self, pdf_paths: Sequence[str | Path], paper_ids: Sequence[str | None] | None = None
+    ) -> List[Path | None]:
+        """Paths of the parsed documents found in the index, None for PDFs without one.
+
+        Nothing is hashed or created: documents are looked up under the hash indexed for
+        each PDF, then under its paper ID if given, e.g. for a PDF moved since it was parsed.
+        """
+        paper_ids = paper_ids if paper_ids is not None else [None] * len(pdf_paths)
+        documents = []
+        for sha256, paper_id in zip(self.hash_index.indexed_hashes(pdf_paths), paper_ids):
+            hashes = [sha256] if sha256 is not None else []
+            if paper_id is not None:
+                hashes += self.store.hashes_for_paper(paper_id)
+            documents.append(next((path for path in map(self._indexed_document, hashes) if path), None))
+        return documents
+
+    def _indexed_document(self, sha256: str) -> Path | None:
+        key = cache_key(sha256, self.instruction)
+        for path in self.store.paths_for_hash(sha256):
+            if path.name.split(".")[0] == key and path.exists():
+                return path
+        return None
+
+    def markdown_path(self, pdf_path: str | Path) -> Path:
+        return self.markdown_paths([pdf_path])[0]
+
+    def record(self, pdf_path: str | Path, paper_id: str | None = None) -> None:
+        """Index the parsed document of a PDF under its content hash and, if given, its paper ID."""
+        sha256 = self.hash_index.get_hash(pdf_path)
+        self.store.record(self._markdown_path(cache_key(sha256, self.instruction)), sha256, paper_id)
+
+    def exist(self, pdf_paths: Sequence[str | Path]) -> List[bool]:
+        return [document_exists(path) for path in self.markdown_paths(pdf_paths)]
+
+    def has_legacy_documents(self) -> bool:
+        """Whether the folder still holds documents parsed under the former `<stem>.md` layout."""
+        with os.scandir(self.folder) as entries:
+            return any(
+                entry.name.endswith(".md") and not _KEY_PATTERN.fullmatch(entry.name[: -len(".md")])
+                for entry in entries
+            )
+
+    def adopt_legacy(self, pdf_paths: Sequence[str | Path]) -> int:
+        """Move documents parsed under the former `<stem>.md` layout into the cache.
+
+        Only stems that are unique among `pdf_paths` are adopted, since a shared stem
+        means the legacy file may belong to another PDF. Returns the number adopted.
+        """
+        stems = Counter(Path(p).stem for p in pdf_paths)
+        adopted = 0
+        for pdf_path, md_path in zip(pdf_paths, self.markdown_paths(pdf_paths)):
+            legacy_path = self.folder / f"{Path(pdf_path).stem}.md"
+            if md_path.exists() or not legacy_path.exists() or stems[Path(pdf_path).stem] > 1:
+                continue
+            # Legacy documents are not compressed
+            md_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(legacy_path, md_path.with_name(f"{md_path.name.split('.')[0]}.md"))
+            logger.info(f"Adopted legacy parsed document '{legacy_path.name}' for {pdf_path}")
+            adopted += 1
+        return adopted
@@ -1,32 +1,87 @@
 import asyncio
+import gzip
+import hashlib
 import os
-import traceback
+import tempfile
 from pathlib import Path
 from typing import List, Sequence
 
 from langchain_community.document_loaders import UnstructuredMarkdownLoader
 from langchain_core.documents.base import Document as LangchainDocument
-from llama_parse import LlamaParse
 from llama_parse.base import Document as LlamaDocument
 
-from giantsmind.utils import local, utils
+from giantsmind.core import config, markdown_loader, parse_cache
+from giantsmind.core.parse_cache import ParseCache
+from giantsmind.core.parse_scheduler import ParseScheduler, create_parser
+from giantsmind.core.parser_backend import ParserBackend, create_parser_backend
+from giantsmind.utils import utils
 
 MODELS = {"bge-small": {"model": "BAAI/bge-base-en-v1.5", "vector_size": 768}}
-PARSE_INSTRUCTIONS = """Extract the text from this scientific article and return it in markdown format without delimiters. Do not add any text to the document."""
+PARSE_INSTRUCTIONS = config.PARSE_INSTRUCTIONS
 
 
-def load_markdown(document_path: str) -> List[LangchainDocument]:
-    loader = UnstructuredMarkdownLoader(document_path)
-    return loader.load()
+MARKDOWN_LOADERS = ("native", "unstructured")
+
+
+def load_markdown(document_path: str, loader: str = config.MARKDOWN_LOADER) -> List[LangchainDocument]:
+    """Load a parsed document as a single langchain document.
+
+    The native loader reads the markdown as is and keeps the offsets of its pages and
+    headings, see `markdown_loader`. The unstructured loader partitions it into elements
+    and joins their text, dropping the markdown syntax; it needs the `unstructured` package.
+    """
+    if loader == "native":
+        return [markdown_loader.load_markdown_document(document_path)]
+    if loader != "unstructured":
+        raise ValueError(f"Unknown markdown loader '{loader}', expected one of {MARKDOWN_LOADERS}")
+    if not str(document_path).endswith(".gz"):
+        return UnstructuredMarkdownLoader(document_path).load()
+    # The loader reads files by path, so compressed documents go through a temporary file
+    with tempfile.NamedTemporaryFile("w", suffix=".md", delete=False) as f:
+        f.write(parse_cache.read_document(document_path))
+    try:
+        documents = UnstructuredMarkdownLoader(f.name).load()
+    finally:
+        os.unlink(f.name)
+    for document in documents:
+        document.metadata["source"] = str(document_path)
+    return documents
+
+
+class LazyDocument:
+    """Handle of a parsed document, whose markdown is only read on first access.
+
+    `metadata` replaces the metadata of the loaded document once set. The document is
+    read once and kept by the handle.
+    """
+
+    def __init__(self, document_path: str | Path, loader: str = config.MARKDOWN_LOADER):
+        self.path = str(document_path)
+        self.loader = loader
+        self.metadata: dict | None = None
+        self._document: LangchainDocument | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._document is not None
+
+    def load(self) -> LangchainDocument:
+        if self._document is None:
+            self._document = load_markdown(self.path, self.loader)[0]
+        if self.metadata is not None:
+            self._document.metadata = self.metadata
+        return self._document
+
+    @property
+    def page_content(self) -> str:
+        return self.load().page_content
+
+    def __repr__(self) -> str:
+        return f"LazyDocument({self.path!r}, loaded={self.loaded})"
 
 
 def parse_document(file_path: str | Path, instruction: str) -> LlamaDocument:
-    parser = LlamaParse(
-        api_key=os.getenv("LLAMA_API_KEY"),
-        result_type="markdown",
-        parsing_instruction=instruction,
-        max_timeout=20000,
-    )
+    parser = create_parser(instruction)
     return parser.load_data(file_path)
 
 
@@ -35,8 +90,7 @@ def parse_files(files: Sequence[str], instruction: str) -> list[LlamaDocument]:
         print("No files to parse.")
         return []
 
-    output_folder = Path(local.get_local_data_path()) / "parsed_docs"
-    output_folder.mkdir(exist_ok=True)
+    cache = ParseCache(instruction)
 
     parsed_documents = []
     for file_path in files:
@@ -44,141 +98,171 @@ def parse_files(files: Sequence[str], instruction: str) -> list[LlamaDocument]:
         parsed_doc = parse_document(file_path, instruction)
         if len(parsed_doc) > 1:
             raise Exception("Unexpected behavior: multiple documents returned.")
-        output_path = output_folder / Path(file_path).with_suffix(".md").name
-        parsed_documents.append(str(output_path))
-        with output_path.open("w") as f:
-            f.write(parsed_doc[0].text)
+        output_path = cache.markdown_path(file_path)
+        parsed_documents.append(write_single_parsed_file(parsed_doc, output_path))
     return parsed_documents
 
 
-def _initialize_parser(instruction: str) -> LlamaDocument:
-    return LlamaParse(
-        api_key=os.getenv("LLAMA_API_KEY"),
-        result_type="markdown",
-        parsing_instruction=instruction,
-        check_interval=1,
-        max_timeout=20000,
-    )
-
-
-async def _attempt_parse(parser: LlamaParse, file_path: str) -> LlamaDocument:
-    docs = await parser.aload_data(file_path)
-    return docs
-
-
 async def aparse_document(pdf_path: str, instruction: str, retries: int = 2) -> LlamaDocument:
     """Asynchronously parse a single document."""
-    parser = _initialize_parser(instruction)
-    for attempt in range(1, retries + 2):
-        try:
-            return await _attempt_parse(parser, pdf_path)
-        except Exception as error:
-            print(f"Error during attempt {attempt}/{retries + 1}:\n{type(error)}:{error}")
-            if attempt == retries + 1:
-                print(f"Failed to parse {pdf_path} after {retries + 1} attempts.")
-                raise
-            await asyncio.sleep(2)
-
-
-def _check_exist_load_parsed_doc(pdf_path: str, verbose: bool = False) -> LangchainDocument | None:
+    scheduler = ParseScheduler(instruction, max_concurrency=1, max_retries=retries)
+    try:
+        return await scheduler.parse(pdf_path)
+    finally:
+        await scheduler.aclose()
+
+
+def _check_exist_load_parsed_doc(
+    pdf_path: str, verbose: bool = False, cache: ParseCache | None = None
+) -> LangchainDocument | None:
     """Check if the document has already been parsed"""
-    fname = Path(pdf_path).name
-    doc_fname = Path(fname).with_suffix(".md")
-    doc_path = Path(local.get_local_data_path()) / "parsed_docs" / doc_fname
-    if doc_path.exists():
+    cache = cache if cache is not None else ParseCache()
+    doc_path = cache.markdown_path(pdf_path)
+    if parse_cache.verify_document(doc_path):
         if verbose:
-            print(f"Document '{fname}' has already been parsed.")
+            print(f"Document '{Path(pdf_path).name}' has already been parsed.")
         return load_markdown(doc_path)
 
     return None
 
 
-async def aparse_files(file_paths: List[str], instruction: str) -> List[LlamaDocument | None]:
+async def aparse_files(
+    file_paths: List[str], instruction: str, parser: ParserBackend | None = None
+) -> List[LlamaDocument | None]:
+    """Parse files with a bounded number of jobs in flight, with LlamaParse unless `parser` is given."""
     if len(file_paths) == 0:
         print("No files to parse.")
         return []
 
-    parsing_crs = [aparse_document(file_path, instruction) for file_path in file_paths]
-    parsing_results = await asyncio.gather(*parsing_crs, return_exceptions=True)
-
-    processed_results: List[LlamaDocument | None] = []
-    for i, result in enumerate(parsing_results):
-        if isinstance(result, Exception):
-            print(f"Error parsing file {file_paths[i]}:\n{type(result)} {result}")
-            traceback.print_exception(type(result), result, result.__traceback__)
-            processed_results.append(None)
-            continue
-        processed_results.append(result)
-
-    return processed_results
-
-
-def create_output_folder() -> str:
-    output_folder = Path(local.get_local_data_path()) / "parsed_docs"
-    output_folder.mkdir(exist_ok=True)
-    return str(output_folder)
-
-
-def write_single_parsed_file(parsing_result: LlamaDocument, output_folder: str, file_path: str) -> str:
-    output_path = Path(output_folder) / Path(file_path).with_suffix(".md").name
-    for page_doc in parsing_result:
-        with output_path.open("a") as f:
-            f.write(f"{page_doc.text}\n")
+    owns_parser = parser is None
+    if owns_parser:
+        parser = ParseScheduler(instruction)
+    try:
+        return await parser.parse_many(file_paths)
+    finally:
+        if owns_parser:
+            await parser.aclose()
+
+
+async def _parse_and_close(file_paths: List[str], parser: ParserBackend) -> List[LlamaDocument | None]:
+    try:
+        return await aparse_files(file_paths, PARSE_INSTRUCTIONS, parser)
+    finally:
+        await parser.aclose()
+
+
+def _fsync_directory(folder: Path) -> None:
+    """Make a rename in `folder` durable, where the platform allows opening directories."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_single_parsed_file(parsing_result: LlamaDocument, output_path: str | Path) -> str:
+    """Write a parsed document, replacing any previous file at once.
+
+    The pages are written with a single write to a temporary file, which is synced to
+    disk once and renamed over `output_path`, so an interrupted write never leaves a
+    partial document behind. Paths ending in `.gz` are gzipped. The checksum of the file
+    is recorded next to it, see `parse_cache.verify_document`.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    data = "".join(f"{page_doc.text}\n" for page_doc in parsing_result).encode()
+    if output_path.suffix == ".gz":
+        data = gzip.compress(data, mtime=0)
+    fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        parse_cache.write_checksum(output_path, hashlib.sha256(data).hexdigest())
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    _fsync_directory(output_path.parent)
     return str(output_path)
 
 
-def write_parsed_docs(file_paths: List[str], parsing_results: List[LlamaDocument | None]) -> List[str]:
-    output_folder = create_output_folder()
+def write_parsed_docs(
+    file_paths: List[str], parsing_results: List[LlamaDocument | None], cache: ParseCache | None = None
+) -> List[str]:
+    cache = cache if cache is not None else ParseCache()
     parsed_file_paths: List[str | None] = []
 
-    for file_path, parsing_result in zip(file_paths, parsing_results):
+    for pdf_path, output_path, parsing_result in zip(
+        file_paths, cache.markdown_paths(file_paths), parsing_results
+    ):
         if parsing_result is None:
             parsed_file_paths.append(None)
             continue
 
-        parsed_file_paths.append(write_single_parsed_file(parsing_result, output_folder, file_path))
+        parsed_file_paths.append(write_single_parsed_file(parsing_result, output_path))
+        cache.record(pdf_path)
 
     return parsed_file_paths
 
 
-def _pdfs_path_to_md_path(pdf_paths: List[str]) -> List[str]:
-    return [
-        Path(local.get_local_data_path()) / "parsed_docs" / Path(pdf_path).with_suffix(".md").name
-        for pdf_path in pdf_paths
-    ]
+def _pdfs_path_to_md_path(pdf_paths: List[str], cache: ParseCache | None = None) -> List[str]:
+    cache = cache if cache is not None else ParseCache()
+    return [str(path) for path in cache.markdown_paths(pdf_paths)]
 
 
 def load_parsed_documents(parsed_files: List[str]) -> List[LangchainDocument]:
     return [load_markdown(doc)[0] for doc in parsed_files]
 
 
-def load_parsed_documents_with_pdf_path(pdf_paths: List[str]) -> List[LangchainDocument]:
-    parsed_files = _pdfs_path_to_md_path(pdf_paths)
+def load_parsed_documents_with_pdf_path(
+    pdf_paths: List[str], cache: ParseCache | None = None
+) -> List[LangchainDocument]:
+    parsed_files = _pdfs_path_to_md_path(pdf_paths, cache)
     return load_parsed_documents(parsed_files)
 
 
-def _check_markdown_exist(pdf_path: str) -> bool:
-    fname = Path(pdf_path).name
-    doc_fname = Path(fname).with_suffix(".md")
-    doc_path = Path(local.get_local_data_path()) / "parsed_docs" / doc_fname
-    return doc_path.exists()
+def lazy_parsed_documents_with_pdf_path(
+    pdf_paths: List[str], cache: ParseCache | None = None
+) -> List[LazyDocument]:
+    return [LazyDocument(path) for path in _pdfs_path_to_md_path(pdf_paths, cache)]
 
 
-def check_markdowns_exist(pdf_paths: List[str]) -> List[bool]:
-    return [_check_markdown_exist(pdf_path) for pdf_path in pdf_paths]
+def _check_markdown_exist(pdf_path: str, cache: ParseCache | None = None) -> bool:
+    return check_markdowns_exist([pdf_path], cache)[0]
+
+
+def check_markdowns_exist(pdf_paths: List[str], cache: ParseCache | None = None) -> List[bool]:
+    cache = cache if cache is not None else ParseCache()
+    return cache.exist(pdf_paths)
 
 
 def parse_pdfs(
     pdf_paths: Sequence[str],
     chunk_size: int = 4096,
     chunk_overlap: int = 256,
-) -> List[List[LangchainDocument]]:
+    parser_name: str = config.PARSER_BACKEND,
+) -> List[LazyDocument | None]:
+    """Parse the PDFs that were not parsed yet, returning handles on the parsed documents of all PDFs.
+
+    No parsed document is read until its handle is accessed. PDFs that failed to parse
+    get None instead of a handle.
+    """
+    parser = create_parser_backend(parser_name, PARSE_INSTRUCTIONS)
+    cache = ParseCache(parser.cache_tag)
+    cache.adopt_legacy(pdf_paths)
     pdf_paths_exist, index_exist, pdf_paths_to_process, index_to_process = utils.get_exist_absent(
-        pdf_paths, check_markdowns_exist
+        pdf_paths, lambda paths: check_markdowns_exist(paths, cache)
     )
-    parsed_docs = asyncio.run(aparse_files(pdf_paths_to_process, PARSE_INSTRUCTIONS))
+    parsed_docs = asyncio.run(_parse_and_close(pdf_paths_to_process, parser))
     # parse_files(pdf_paths_to_process, PARSE_INSTRUCTIONS)
-    write_parsed_docs(pdf_paths_to_process, parsed_docs)
-    langchain_docs = load_parsed_documents_with_pdf_path(pdf_paths)
+    written = write_parsed_docs(pdf_paths_to_process, parsed_docs, cache)
+    failed = {pdf_path for pdf_path, path in zip(pdf_paths_to_process, written) if path is None}
     # langchain_docs = utils.reorder_merge_lists(parsed_docs, parsed_docs_existing, index_to_process, index_exist)
-    return langchain_docs
+    return [
+        None if pdf_path in failed else document
+        for pdf_path, document in zip(pdf_paths, lazy_parsed_documents_with_pdf_path(pdf_paths, cache))
+    ]
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import random
+import time
+from typing import Callable, List
+
+import httpx
+from llama_parse import LlamaParse
+from llama_parse.base import Document as LlamaDocument
+
+from giantsmind.core import config
+from giantsmind.core.parser_backend import ParserBackend, ParseStats
+from giantsmind.utils.logging import logger
+
+
+class TokenBucket:
+    """Asynchronous token bucket limiting how often parse jobs are submitted.
+
+    Args:
+        rate: Number of tokens added per second
+        capacity: Maximum number of tokens the bucket can hold (burst size)
+        clock: Monotonic clock, injectable for testing
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._last = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the given (1-based) attempt."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def create_parser(instruction: str, base_url: str = config.LLAMA_PARSE_BASE_URL) -> LlamaParse:
+    return LlamaParse(
+        api_key=os.getenv("LLAMA_API_KEY"),
+        base_url=base_url,
+        result_type="markdown",
+        parsing_instruction=instruction,
+        check_interval=config.PARSE_CHECK_INTERVAL,
+        max_timeout=config.PARSE_MAX_TIMEOUT,
+    )
+
+
+def _supports_custom_client(parser: LlamaParse) -> bool:
+    fields = getattr(type(parser), "model_fields", None) or getattr(type(parser), "__fields__", {})
+    return "custom_client" in fields
+
+
+class ParseScheduler(ParserBackend):
+    """Submit LlamaParse jobs with bounded concurrency, rate limiting and retries.
+
+    A single parser instance is shared by all jobs and, when the installed llama_parse
+    accepts a custom client, so is one pooled HTTP session. The number of jobs in flight is
+    bounded by `max_concurrency`, and job submissions are spaced by a token bucket
+    allowing `rate_per_minute` jobs per minute with bursts of `burst` jobs. Failed
+    jobs are retried up to `max_retries` times with exponential backoff and jitter.
+    """
+
+    name = "llamaparse"
+
+    def __init__(
+        self,
+        instruction: str,
+        max_concurrency: int = config.PARSE_MAX_CONCURRENCY,
+        rate_per_minute: float = config.PARSE_RATE_PER_MINUTE,
+        burst: int = config.PARSE_BURST,
+        max_retries: int = config.PARSE_MAX_RETRIES,
+        backoff_base: float = config.PARSE_BACKOFF_BASE,
+        backoff_max: float = config.PARSE_BACKOFF_MAX,
+        parser: LlamaParse | None = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.parser = parser if parser is not None else create_parser(instruction)
+        # Keeps the cache keys of documents parsed before the backends were pluggable
+        self.cache_tag = instruction
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = ParseStats()
+        self._rate_per_minute = rate_per_minute
+        self._burst = burst
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._bucket: TokenBucket | None = None
+
+    def _ensure_primitives(self) -> None:
+        # asyncio primitives and HTTP sessions are bound to the running loop
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._bucket = TokenBucket(self._rate_per_minute / 60, self._burst)
+        if _supports_custom_client(self.parser):
+            self.parser.custom_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=2 * self.max_concurrency, max_keepalive_connections=self.max_concurrency
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            )
+
+    async def aclose(self) -> None:
+        client = getattr(self.parser, "custom_client", None)
+        if client is not None and _supports_custom_client(self.parser):
+            await client.aclose()
+            self.parser.custom_client = None
+        self._loop = None
+
+    async def parse(self, pdf_path: str) -> List[LlamaDocument]:
+        """Parse a single document, retrying on failure."""
+        self._ensure_primitives()
+        async with self._semaphore:
+            for attempt in range(1, self.max_retries + 2):
+                await self._bucket.acquire()
+                try:
+                    documents = await self.parser.aload_data(pdf_path)
+                    self.stats.parsed += 1
+                    return documents
+                except Exception as error:
+                    if attempt == self.max_retries + 1:
+                        self.stats.failed += 1
+                        logger.error(f"Failed to parse {pdf_path} after {attempt} attempts: {error}")
+                        raise
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                    self.stats.retries += 1
+                    logger.warning(
+                        f"Error parsing {pdf_path} (attempt {attempt}/{self.max_retries + 1}): "
+                        f"{type(error).__name__}: {error}. Retrying in {delay:.1f}s"
+                    )
+                    await asyncio.sleep(delay)
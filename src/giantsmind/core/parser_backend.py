@@ -0,0 +1,141 @@
+import asyncio
+import time
+import traceback
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, List, Sequence
+
+from giantsmind.core import config
+from giantsmind.utils.logging import logger
+
+PARSER_BACKENDS = ("llamaparse", "pymupdf")
+
+
+@dataclass
+class ParseStats:
+    started_at: float = field(default_factory=time.monotonic)
+    parsed: int = 0
+    failed: int = 0
+    retries: int = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def pdfs_per_minute(self) -> float:
+        return 60 * self.parsed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Parsed {self.parsed} PDFs ({self.failed} failed, {self.retries} retries) "
+            f"in {self.elapsed:.1f}s: {self.pdfs_per_minute:.1f} PDFs/min"
+        )
+
+
+def page_marker(page: int) -> str:
+    """Marker starting the markdown of each page, for backends that keep page boundaries."""
+    return f"<!-- page {page} -->"
+
+
+@dataclass
+class ParsedPage:
+    """One page of a parsed PDF, as markdown."""
+
+    text: str
+    page: int
+
+
+class ParserBackend(ABC):
+    """Turns PDFs into markdown documents.
+
+    `parse` returns a list of documents exposing the markdown as `.text`, written one
+    after the other to the parsed document. `cache_tag` identifies the output format in
+    the parse cache keys, so documents parsed by different backends never mix, and
+    `max_concurrency` is the number of PDFs worth parsing at the same time. `resource`
+    is what parsing mostly waits on, "network" or "cpu", for the ingestion run reports.
+    """
+
+    name: str
+    cache_tag: str
+    max_concurrency: int
+    stats: ParseStats
+    resource: str = "network"
+
+    @abstractmethod
+    async def parse(self, pdf_path: str) -> List[Any]:
+        """Parse a single PDF, raising on failure."""
+
+    async def parse_many(self, pdf_paths: Sequence[str]) -> List[List[Any] | None]:
+        """Parse documents concurrently, returning None for documents that failed."""
+        results = await asyncio.gather(*[self.parse(path) for path in pdf_paths], return_exceptions=True)
+        processed_results: List[List[Any] | None] = []
+        for pdf_path, result in zip(pdf_paths, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error parsing file {pdf_path}: {type(result).__name__} {result}")
+                logger.debug("".join(traceback.format_exception(type(result), result, result.__traceback__)))
+                processed_results.append(None)
+                continue
+            processed_results.append(result)
+        logger.info(self.stats.summary())
+        return processed_results
+
+    async def aclose(self) -> None:
+        pass
+
+
+def sharded_cache_tag(cache_tag: str, pages_per_shard: int, min_pages: int) -> str:
+    """Cache tag of documents parsed in shards, whose page markers depend on the shard size."""
+    return f"{cache_tag}\nsharded: {pages_per_shard} pages per shard from {min_pages} pages"
+
+
+def backend_cache_tag(
+    name: str = config.PARSER_BACKEND,
+    instruction: str = config.PARSE_INSTRUCTIONS,
+    shard_pages: int = config.PARSE_SHARD_PAGES,
+) -> str:
+    """Cache tag of the documents parsed by `create_parser_backend(name, instruction, shard_pages)`.
+
+    The backend is not created.
+    """
+    if name == "llamaparse":
+        cache_tag = instruction
+    elif name == "pymupdf":
+        from giantsmind.core.local_parser import LocalPdfParser
+
+        cache_tag = LocalPdfParser.cache_tag
+    else:
+        raise ValueError(f"Unknown parser backend '{name}', expected one of {PARSER_BACKENDS}")
+    if shard_pages > 0:
+        return sharded_cache_tag(cache_tag, shard_pages, config.PARSE_SHARD_MIN_PAGES)
+    return cache_tag
+
+
+def create_parser_backend(
+    name: str = config.PARSER_BACKEND,
+    instruction: str = config.PARSE_INSTRUCTIONS,
+    shard_pages: int = config.PARSE_SHARD_PAGES,
+) -> ParserBackend:
+    """Create the parser backend registered under `name`.
+
+    Unless `shard_pages` is 0, large PDFs are parsed as shards of `shard_pages` pages.
+    Backends are imported on demand, so the local backend works without llama_parse.
+    """
+    max_shard_retries = config.PARSE_SHARD_RETRIES
+    if name == "llamaparse":
+        from giantsmind.core.parse_scheduler import ParseScheduler
+
+        backend = ParseScheduler(instruction)
+        # The scheduler retries each shard itself
+        max_shard_retries = 0
+    elif name == "pymupdf":
+        from giantsmind.core.local_parser import LocalPdfParser
+
+        backend = LocalPdfParser()
+    else:
+        raise ValueError(f"Unknown parser backend '{name}', expected one of {PARSER_BACKENDS}")
+    if shard_pages > 0:
+        from giantsmind.core.sharded_parser import ShardedParser
+
+        backend = ShardedParser(backend, shard_pages, max_retries=max_shard_retries)
+    return backend
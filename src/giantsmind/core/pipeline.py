@@ -0,0 +1,114 @@
+import asyncio
+import inspect
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Sequence
+
+from giantsmind.utils.logging import logger
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """A step of a streaming pipeline.
+
+    Attributes:
+        name: Name of the stage, used in logs and failure reports
+        func: Callable processing one item and returning the item for the next stage,
+            or None to drop it. Coroutine functions run on the event loop, regular
+            functions run in a worker thread.
+        workers: Number of items processed concurrently by this stage
+    """
+
+    name: str
+    func: Callable[[Any], Any | Awaitable[Any]]
+    workers: int = 1
+
+
+@dataclass
+class PipelineResult:
+    completed: List[Any] = field(default_factory=list)
+    dropped: int = 0
+    failures: List[tuple[str, Any, BaseException]] = field(default_factory=list)
+    # Monotonic (start, end) times of every item processed by each stage
+    stage_times: Dict[str, List[tuple[float, float]]] = field(default_factory=lambda: defaultdict(list))
+
+
+async def _call(func: Callable[[Any], Any], item: Any) -> Any:
+    if inspect.iscoroutinefunction(func):
+        return await func(item)
+    return await asyncio.to_thread(func, item)
+
+
+async def _run_worker(
+    stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue | None, result: PipelineResult
+) -> None:
+    while True:
+        item = await inbox.get()
+        if item is _DONE:
+            return
+        started_at = time.monotonic()
+        try:
+            output = await _call(stage.func, item)
+        except Exception as error:
+            result.stage_times[stage.name].append((started_at, time.monotonic()))
+            logger.error(f"Stage '{stage.name}' failed for {item}: {type(error).__name__}: {error}")
+            result.failures.append((stage.name, item, error))
+            continue
+        result.stage_times[stage.name].append((started_at, time.monotonic()))
+        if output is None:
+            result.dropped += 1
+        elif outbox is None:
+            result.completed.append(output)
+        else:
+            await outbox.put(output)
+
+
+async def iterate_in_thread(iterable: Iterable[Any]) -> AsyncIterator[Any]:
+    """Iterate over a blocking iterable, e.g. a directory walk, without blocking the event loop."""
+    iterator = iter(iterable)
+    while True:
+        item = await asyncio.to_thread(next, iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+
+async def run_pipeline(
+    items: Iterable[Any] | AsyncIterable[Any], stages: Sequence[Stage], queue_size: int = 4
+) -> PipelineResult:
+    """Stream items through stages connected by bounded queues.
+
+    Each item moves to the next stage as soon as it is processed, so stages overlap
+    and at most `queue_size` items wait between two stages. Items can come from an
+    asynchronous iterable, so the first stage starts while they are still produced.
+    A failing item is logged, reported in the result and does not stop the other items.
+    """
+    if not stages:
+        raise ValueError("A pipeline needs at least one stage")
+    result = PipelineResult()
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+
+    async def feed() -> None:
+        if isinstance(items, AsyncIterable):
+            async for item in items:
+                await queues[0].put(item)
+        else:
+            for item in items:
+                await queues[0].put(item)
+        for _ in range(stages[0].workers):
+            await queues[0].put(_DONE)
+
+    async def run_stage(i: int) -> None:
+        outbox = queues[i + 1] if i + 1 < len(stages) else None
+        await asyncio.gather(
+            *[_run_worker(stages[i], queues[i], outbox, result) for _ in range(stages[i].workers)]
+        )
+        if outbox is not None:
+            for _ in range(stages[i + 1].workers):
+                await outbox.put(_DONE)
+
+    await asyncio.gather(feed(), *[run_stage(i) for i in range(len(stages))])
+    return result
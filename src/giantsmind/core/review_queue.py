@@ -0,0 +1,87 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Sequence
+
+from giantsmind.utils import local
+
+DEFAULT_QUEUE_PATH = Path(local.get_local_data_path()) / "review_queue.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS review_queue (
+    pdf_path TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL,
+    missing_fields TEXT NOT NULL,
+    added_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class ReviewItem:
+    pdf_path: str
+    metadata: dict
+    missing_fields: List[str]
+    added_at: float
+
+
+class ReviewQueue:
+    """Persistent queue of the papers whose metadata must be completed by hand.
+
+    Unattended ingestions put papers with missing fields here instead of prompting, and
+    carry on with the other papers. A paper queued again replaces its previous entry.
+    """
+
+    def __init__(self, db_path: str | Path | None = None, clock: Callable[[], float] = time.time):
+        self.db_path = Path(db_path) if db_path is not None else DEFAULT_QUEUE_PATH
+        self.clock = clock
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._conn:
+            yield self._conn
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def add(self, pdf_path: str, metadata: dict, missing_fields: Sequence[str]) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO review_queue (pdf_path, metadata, missing_fields, added_at) "
+                "VALUES (?, ?, ?, ?)",
+                (str(pdf_path), json.dumps(metadata), json.dumps(list(missing_fields)), self.clock()),
+            )
+
+    def pending(self) -> List[ReviewItem]:
+        """Papers waiting for a review, oldest first."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT pdf_path, metadata, missing_fields, added_at FROM review_queue "
+                "ORDER BY added_at, pdf_path"
+            ).fetchall()
+        return [
+            ReviewItem(pdf_path, json.loads(metadata), json.loads(missing_fields), added_at)
+            for pdf_path, metadata, missing_fields, added_at in rows
+        ]
+
+    def remove(self, pdf_path: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM review_queue WHERE pdf_path = ?", (str(pdf_path),))
+
+    def __contains__(self, pdf_path: str) -> bool:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT 1 FROM review_queue WHERE pdf_path = ?", (str(pdf_path),)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._transaction() as conn:
+            return conn.execute("SELECT COUNT(*) FROM review_queue").fetchone()[0]
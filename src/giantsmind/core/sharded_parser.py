@@ -0,0 +1,134 @@
+import asyncio
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import Any, List
+
+from giantsmind.core import config
+from giantsmind.core.parser_backend import (
+    ParsedPage,
+    ParserBackend,
+    ParseStats,
+    page_marker,
+    sharded_cache_tag,
+)
+from giantsmind.utils import pdf_tools
+from giantsmind.utils.logging import logger
+
+_LEADING_PAGE_MARKER = re.compile(r"^\s*<!-- page \d+ -->\s*")
+
+
+@dataclass(frozen=True)
+class Shard:
+    path: str
+    first_page: int
+    n_pages: int
+
+    @property
+    def pages(self) -> str:
+        return f"{self.first_page}-{self.first_page + self.n_pages - 1}"
+
+
+def _renumber(documents: List[Any], shard: Shard) -> List[ParsedPage]:
+    """Pages of a parsed shard, marked with their page number in the whole PDF."""
+    texts = [document.text for document in documents]
+    if len(texts) != shard.n_pages:
+        # The backend did not split the shard by page, only its first page is known
+        texts = ["\n".join(texts)]
+    return [
+        ParsedPage(
+            f"{page_marker(shard.first_page + offset)}\n\n{_LEADING_PAGE_MARKER.sub('', text, count=1)}",
+            shard.first_page + offset,
+        )
+        for offset, text in enumerate(texts)
+    ]
+
+
+class ShardedParser(ParserBackend):
+    """Parse large PDFs as page ranges parsed concurrently by another backend.
+
+    PDFs of at least `min_pages` pages are split into shards of `pages_per_shard` pages,
+    which go through `backend` at the same time, so a long PDF takes about as long as
+    its slowest shard. Shards that fail are parsed again, up to `max_retries` times,
+    without parsing the others again. The pages are reassembled in order, each starting
+    with a page marker. Smaller PDFs are passed to `backend` whole. Documents are cached
+    apart from those parsed whole by `backend`, under a tag with the shard size.
+    """
+
+    def __init__(
+        self,
+        backend: ParserBackend,
+        pages_per_shard: int = config.PARSE_SHARD_PAGES,
+        min_pages: int = config.PARSE_SHARD_MIN_PAGES,
+        max_retries: int = config.PARSE_SHARD_RETRIES,
+    ):
+        if pages_per_shard < 1:
+            raise ValueError("pages_per_shard must be at least 1")
+        self.backend = backend
+        self.name = backend.name
+        self.cache_tag = sharded_cache_tag(backend.cache_tag, pages_per_shard, min_pages)
+        self.max_concurrency = backend.max_concurrency
+        self.resource = backend.resource
+        self.pages_per_shard = pages_per_shard
+        self.min_pages = min_pages
+        self.max_retries = max_retries
+        self.stats = ParseStats()
+
+    async def parse(self, pdf_path: str) -> List[Any]:
+        try:
+            n_pages = await asyncio.to_thread(pdf_tools.get_page_count, pdf_path)
+        except Exception:
+            # Left to the backend to report
+            n_pages = 0
+        try:
+            if n_pages < self.min_pages:
+                documents = await self.backend.parse(pdf_path)
+            else:
+                documents = await self._parse_sharded(pdf_path, n_pages)
+        except Exception:
+            self.stats.failed += 1
+            raise
+        self.stats.parsed += 1
+        return documents
+
+    async def _parse_sharded(self, pdf_path: str, n_pages: int) -> List[ParsedPage]:
+        with tempfile.TemporaryDirectory(prefix="giantsmind-shards-") as folder:
+            paths = await asyncio.to_thread(pdf_tools.split_pdf, pdf_path, folder, self.pages_per_shard)
+            shards = [
+                Shard(
+                    str(path),
+                    i * self.pages_per_shard + 1,
+                    min(self.pages_per_shard, n_pages - i * self.pages_per_shard),
+                )
+                for i, path in enumerate(paths)
+            ]
+            logger.info(f"Parsing {pdf_path} ({n_pages} pages) as {len(shards)} shards")
+            results = await self._parse_shards(pdf_path, shards)
+        return [page for shard, documents in zip(shards, results) for page in _renumber(documents, shard)]
+
+    async def _parse_shards(self, pdf_path: str, shards: List[Shard]) -> List[List[Any]]:
+        results: List[List[Any] | None] = [None] * len(shards)
+        pending = list(range(len(shards)))
+        for attempt in range(1, self.max_retries + 2):
+            outcomes = await asyncio.gather(
+                *[self.backend.parse(shards[i].path) for i in pending], return_exceptions=True
+            )
+            failed = []
+            for i, outcome in zip(pending, outcomes):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                if isinstance(outcome, Exception):
+                    failed.append((i, outcome))
+                else:
+                    results[i] = outcome
+            if not failed:
+                return results
+            pending = [i for i, _ in failed]
+            pages = ", ".join(shards[i].pages for i in pending)
+            if attempt <= self.max_retries:
+                self.stats.retries += len(pending)
+                logger.warning(f"Parsing pages {pages} of {pdf_path} failed, retrying these pages")
+        raise RuntimeError(f"Failed to parse pages {pages} of {pdf_path}") from failed[0][1]
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
@@ -1,12 +1,12 @@
 from pprint import pprint
 
-from giantsmind.core.get_metadata import get_all_metadata_from_json
+from giantsmind.core.get_metadata import get_all_saved_metadata
 from giantsmind.metadata_db import collection_operations as collection_ops
 from giantsmind.metadata_db import paper_operations as paper_ops
 from giantsmind.metadata_db.schema import init_db
 
 if __name__ == "__main__":
-    metadatas = get_all_metadata_from_json()
+    metadatas = get_all_saved_metadata()
     for metadata in metadatas:
         metadata["paper_id"] = metadata["id"]
         metadata["authors"] = metadata["author"].split("; ")
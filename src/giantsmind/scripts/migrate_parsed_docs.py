@@ -0,0 +1,43 @@
+from pathlib import Path
+from typing import Sequence
+
+from giantsmind.core import config, get_metadata
+from giantsmind.core.local_parser import LocalPdfParser
+from giantsmind.core.parse_cache import ParseCache, cache_key
+from giantsmind.utils.hash_index import FileHashIndex
+from giantsmind.utils.logging import logger
+
+# Cache tags of the documents each parser backend writes
+CACHE_TAGS = (config.PARSE_INSTRUCTIONS, LocalPdfParser.cache_tag)
+
+
+def index_parsed_docs(cache: ParseCache, cache_tags: Sequence[str] = CACHE_TAGS) -> int:
+    """Index the parsed documents of every PDF in the file hash index, with its paper ID if known.
+
+    Returns the number of documents indexed.
+    """
+    indexed = cache.hash_index.indexed()
+    metadatas = get_metadata.load_saved_metadatas([path for path, _ in indexed])
+    n_indexed = 0
+    for (path, sha256), metadata in zip(indexed, metadatas):
+        paper_id = (metadata or {}).get("paper_id") or None
+        for cache_tag in cache_tags:
+            document_path = cache.existing_path(cache_key(sha256, cache_tag))
+            if document_path is not None:
+                cache.store.record(document_path, sha256, paper_id)
+                n_indexed += 1
+    return n_indexed
+
+
+def migrate_parsed_docs(folder: str | Path | None = None, hash_index: FileHashIndex | None = None) -> int:
+    """Handle the migrate operation: move parsed documents into fan-out folders and index them."""
+    cache = ParseCache(folder=folder, hash_index=hash_index)
+    n_moved = cache.store.migrate_flat_layout()
+    n_indexed = index_parsed_docs(cache)
+    logger.info(f"Moved {n_moved} files and indexed {n_indexed} parsed documents in {cache.folder}")
+    if cache.has_legacy_documents():
+        logger.warning(
+            "Documents parsed under the former `<file name>.md` layout remain, "
+            "they are adopted by the next `giantsmind --parse` of their folder"
+        )
+    return 0
@@ -1,16 +1,35 @@
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+from functools import partial
 from pathlib import Path
-from typing import Dict, List
+from typing import AsyncIterator, Dict, Iterable, List, Sequence
 
 from dotenv import load_dotenv
 from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
 from langchain_core.documents.base import Document
-
-from giantsmind.core import get_metadata, parse_documents
+from langchain_core.embeddings import Embeddings
+
+from giantsmind.core import config, embedding_cache, get_metadata, parse_cache, parse_documents
+from giantsmind.core.dedup import Deduplicator, Fingerprint, local_identifiers, paper_id_key
+from giantsmind.core.ingest_journal import IngestJournal, JournalEntry
+from giantsmind.core.instrumentation import ProgressDisplay, RunMetrics
+from giantsmind.core.metadata_client import MetadataClient
+from giantsmind.core.parse_cache import ParseCache
+from giantsmind.core.parser_backend import ParserBackend, create_parser_backend
+from giantsmind.core.pipeline import PipelineResult, Stage, iterate_in_thread, run_pipeline
+from giantsmind.core.review_queue import ReviewQueue
 from giantsmind.metadata_db.models import Metadata
 from giantsmind.metadata_db.operations import collection_operations as col_ops
 from giantsmind.metadata_db.operations import paper_operations as paper_ops
 from giantsmind.utils import local, pdf_tools, utils
+from giantsmind.utils.hash_index import FileHashIndex
 from giantsmind.utils.logging import logger
+from giantsmind.utils.scanner import ScanEntry, scan_files
 from giantsmind.vector_db import base, chroma_client, prep_docs
 
 MODELS = {"bge-small": {"model": "BAAI/bge-base-en-v1.5", "vector_size": 768}}
@@ -21,30 +40,78 @@ EMBEDDINGS_MODEL = "bge-small"
 load_dotenv()
 
 
-def add_paper_to_dbs(vc_client: base.VectorDBClient, paper_chunks: List[Document], metadata: Metadata):
-    """Add a paper to the databases."""
+def add_paper_to_dbs(
+    vc_client: base.VectorDBClient,
+    paper_chunks: List[Document],
+    metadata: Metadata,
+    embeddings: List[List[float]] | None = None,
+    chunk_ids: List[str] | None = None,
+    metrics: RunMetrics | None = None,
+):
+    """Add a paper to the databases, using precomputed chunk embeddings if given.
+
+    The vector and SQL writes are measured in `metrics` if given.
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
     try:
         n_chunks = len(paper_chunks)
-        ids = vc_client.add_documents(paper_chunks)
+        n_bytes = sum(len(chunk.page_content.encode()) for chunk in paper_chunks)
+        with metrics.measure("vector_write", n_bytes):
+            if embeddings is None:
+                ids = vc_client.add_documents(paper_chunks)
+            else:
+                ids = vc_client.add_embedded_documents(paper_chunks, embeddings, ids=chunk_ids)
         if len(ids) != n_chunks:
             raise ValueError(f"Expected {n_chunks} IDs, got {len(ids)}")
         metadata_dict = metadata.to_dict().copy()
         metadata_dict["chunks"] = tuple(ids)
-        paper_ops.add_papers([metadata_dict])[0]
-        collection_id = col_ops.get_all_papers_collectionid()
-        col_ops.add_paper_to_collection(metadata.paper_id, collection_id)
+        with metrics.measure("sql_write"):
+            paper_ops.add_papers([metadata_dict])[0]
+            collection_id = col_ops.get_all_papers_collectionid()
+            col_ops.add_paper_to_collection(metadata.paper_id, collection_id)
     except Exception as e:
         logger.error(f"Failed to add paper '{metadata.title}' to databases: {str(e)}")
         raise
 
 
+def make_chunk_ids(paper_id: str, n_chunks: int) -> List[str]:
+    """Stable chunk IDs, so writing a paper again replaces its chunks instead of duplicating them."""
+    return [str(uuid.uuid5(uuid.NAMESPACE_URL, f"giantsmind:{paper_id}:{i}")) for i in range(n_chunks)]
+
+
+def _document_metadata(metadata: Metadata) -> dict:
+    metadata_dict = metadata.to_dict().copy()
+    metadata_dict["authors"] = "; ".join(metadata_dict["authors"])
+    return metadata_dict
+
+
+def create_vector_client(
+    persist_directory: Path, embeddings: Embeddings | None = None
+) -> tuple[chroma_client.ChromadbClient, Embeddings]:
+    """Client of the main collection, with the FastEmbed model unless other `embeddings` are given.
+
+    The FastEmbed model only embeds chunks whose text is not in the embedding cache.
+    """
+    if embeddings is None:
+        model_name = MODELS[EMBEDDINGS_MODEL]["model"]
+        embeddings = FastEmbedEmbeddings(model_name=model_name, cache_dir=str(persist_directory))
+        if config.EMBEDDING_CACHE_MAX_BYTES > 0:
+            embeddings = embedding_cache.CachedEmbeddings(
+                embeddings, model_name, embedding_cache.get_shared_cache()
+            )
+    client = chroma_client.ChromadbClient(
+        DEFAULT_COLLECTION, embeddings, persist_directory=str(persist_directory)
+    )
+    return client, embeddings
+
+
 def setup_pdf_processing(pdf_folder: Path) -> List[Path]:
     """Setup and validate PDF processing environment."""
     if not pdf_folder.is_dir():
         logger.error(f"Invalid directory: {pdf_folder}")
         raise NotADirectoryError(f"{pdf_folder} is not a valid directory.")
 
-    pdf_paths = pdf_tools.get_pdf_paths(pdf_folder)
+    pdf_paths = pdf_tools.get_pdf_paths(pdf_folder, recursive=True)
     if not pdf_paths:
         logger.warning("No PDF files found in the specified directory")
         return []
@@ -53,18 +120,45 @@ def setup_pdf_processing(pdf_folder: Path) -> List[Path]:
     return pdf_paths
 
 
-def process_documents(pdf_paths: List[Path]) -> tuple[List[Document], List[Metadata]]:
-    """Process PDF documents and extract metadata."""
+def process_documents(
+    pdf_paths: List[Path], parser_name: str = config.PARSER_BACKEND, review_queue: ReviewQueue | None = None
+) -> tuple[List[parse_documents.LazyDocument], List[Metadata]]:
+    """Process PDF documents and extract metadata.
+
+    Only the PDFs with complete metadata are parsed, others are queued in `review_queue` if given.
+    Copies of a PDF are dropped before their metadata is looked up, and PDFs of a paper
+    already found before they are parsed. The parsed documents are returned as handles,
+    read when first accessed, with the metadata of their PDF. PDFs that failed to parse
+    are left out.
+    """
     try:
+        dedup = Deduplicator()
+        hashes = FileHashIndex(prefilter=config.HASH_PREFILTER).get_hashes(pdf_paths)
+        pdf_paths = [
+            pdf_path
+            for pdf_path, sha256 in zip(pdf_paths, hashes)
+            if dedup.check_content(str(pdf_path), sha256) is None
+        ]
         logger.info("Processing metadata and parsing documents")
-        metadatas = get_metadata.process_metadata(pdf_paths)
-        parsed_docs = parse_documents.parse_pdfs(pdf_paths)
+        metadatas = get_metadata.process_metadata(pdf_paths, review_queue=review_queue)
+        metadatas = [
+            metadata
+            for metadata in metadatas
+            if dedup.check_paper(metadata.file_path, [paper_id_key(metadata.paper_id)]) is None
+        ]
+        for metadata in metadatas:
+            dedup.set_paper_id(metadata.file_path, metadata.paper_id)
+        _log_duplicates(dedup)
+        pdf_paths = [metadata.file_path for metadata in metadatas]
+        parsed_docs = parse_documents.parse_pdfs(pdf_paths, parser_name=parser_name)
+        failed = [metadata.title for doc, metadata in zip(parsed_docs, metadatas) if doc is None]
+        if failed:
+            logger.warning(f"Failed to parse {len(failed)} papers: {', '.join(failed)}")
+        metadatas = [metadata for doc, metadata in zip(parsed_docs, metadatas) if doc is not None]
+        parsed_docs = [doc for doc in parsed_docs if doc is not None]
 
         for doc, metadata in zip(parsed_docs, metadatas):
-
-            metadata_dict = metadata.to_dict().copy()
-            metadata_dict["authors"] = "; ".join(metadata_dict["authors"])
-            doc.metadata = metadata_dict
+            doc.metadata = _document_metadata(metadata)
 
         return parsed_docs, metadatas
     except Exception as e:
@@ -73,19 +167,21 @@ def process_documents(pdf_paths: List[Path]) -> tuple[List[Document], List[Metad
 
 
 def process_database_operations(
-    parsed_docs: List[Document], metadatas: List[Metadata], persist_directory: Path
+    parsed_docs: Sequence[Document | parse_documents.LazyDocument],
+    metadatas: List[Metadata],
+    persist_directory: Path,
 ):
-    """Handle database operations for document processing."""
+    """Handle database operations for document processing.
+
+    Papers already in the vector database are skipped before their documents are loaded.
+    Documents are chunked in a process pool, and each paper is embedded and written as
+    soon as its chunks are ready.
+    """
     try:
         ids = [metadata.paper_id for metadata in metadatas]
 
         logger.info("Checking for existing papers in database")
-        embeddings = FastEmbedEmbeddings(
-            model_name=MODELS[EMBEDDINGS_MODEL]["model"], cache_dir=str(persist_directory)
-        )
-        client = chroma_client.ChromadbClient(
-            DEFAULT_COLLECTION, embeddings, persist_directory=str(persist_directory)
-        )
+        client, _ = create_vector_client(persist_directory)
         index_to_process = utils.get_exist_absent(ids, lambda ids: client.check_ids_exist(ids))[-1]
 
         if not index_to_process:
@@ -96,22 +192,34 @@ def process_database_operations(
         parsed_docs_to_db, metadatas_to_db = zip(*[(parsed_docs[i], metadatas[i]) for i in index_to_process])
 
         logger.info("Chunking documents")
-        chunked_docs = prep_docs.chunk_documents(parsed_docs_to_db)
-
-        process_papers(client, chunked_docs, metadatas_to_db)
+        documents = (
+            doc.load() if isinstance(doc, parse_documents.LazyDocument) else doc for doc in parsed_docs_to_db
+        )
+        with ProcessPoolExecutor(max_workers=config.CHUNK_PROCESS_WORKERS) as chunk_pool:
+            chunked_docs = prep_docs.iter_chunked_documents(
+                documents, executor=chunk_pool, return_exceptions=True
+            )
+            process_papers(client, chunked_docs, metadatas_to_db)
     except Exception as e:
         logger.error(f"Database operation error: {str(e)}")
         raise
 
 
 def process_papers(
-    client: base.VectorDBClient, chunked_docs: List[List[Document]], metadatas_to_db: List[Metadata]
+    client: base.VectorDBClient,
+    chunked_docs: Iterable[List[Document] | Exception],
+    metadatas_to_db: Sequence[Metadata],
 ):
-    """Process individual papers and add them to the database."""
+    """Process individual papers and add them to the database, as their chunks come.
+
+    A paper whose chunks are an error, e.g. of its chunking, fails alone.
+    """
     failed_papers = []
     for i, (paper_chunks, metadata) in enumerate(zip(chunked_docs, metadatas_to_db), 1):
         try:
-            logger.info(f"Processing paper {i}/{len(chunked_docs)}: {metadata.title}")
+            logger.info(f"Processing paper {i}/{len(metadatas_to_db)}: {metadata.title}")
+            if isinstance(paper_chunks, Exception):
+                raise paper_chunks
             add_paper_to_dbs(client, paper_chunks, metadata)
         except Exception as e:
             logger.error(f"Failed to process paper {metadata.title}: {str(e)}")
@@ -122,16 +230,392 @@ def process_papers(
         logger.warning(f"Failed to process {len(failed_papers)} papers: {', '.join(failed_papers)}")
 
 
-def parse_papers(pdf_path: str) -> int:
-    """Handle PDF parsing operation."""
+@dataclass
+class PaperJob:
+    """State of one paper moving through the streaming ingestion pipeline."""
+
+    pdf_path: str
+    scan_entry: ScanEntry | None = None
+    entry: JournalEntry | None = None
+    local_info: get_metadata.LocalPdfInfo | None = None
+    raw_metadata: dict | None = None
+    metadata_saved: bool = False
+    metadata: Metadata | None = None
+    markdown_path: Path | None = None
+    chunks: List[Document] | None = None
+    embeddings: List[List[float]] | None = None
+
+    def __str__(self) -> str:
+        return self.pdf_path
+
+
+@dataclass
+class IngestionContext:
+    client: base.VectorDBClient
+    embeddings: Embeddings
+    parser: ParserBackend
+    cache: ParseCache
+    process_pool: ProcessPoolExecutor
+    metadata_client: MetadataClient
+    journal: IngestJournal
+    # Papers with missing metadata are queued here instead of prompting for the fields
+    review_queue: ReviewQueue | None = None
+    # Measures of the steps of the current run, reset by `run_ingestion`
+    metrics: RunMetrics = field(default_factory=RunMetrics)
+    # PDFs of the current run holding a paper already seen, reset by `run_ingestion`
+    dedup: Deduplicator = field(default_factory=Deduplicator)
+    # Whether streamed PDFs adopt legacy parsed documents as they are scanned, set by `run_ingestion`
+    adopt_legacy: bool = False
+
+
+def _hash_pdf(context: IngestionContext, job: PaperJob) -> str:
+    with context.metrics.measure("hash") as measurement:
+        if job.scan_entry is not None:
+            measurement.bytes = job.scan_entry.size
+            return context.cache.hash_index.get_scanned_hashes([job.scan_entry])[0]
+        measurement.bytes = os.path.getsize(job.pdf_path)
+        return context.cache.hash_index.get_hash(job.pdf_path)
+
+
+def _log_duplicates(dedup: Deduplicator) -> None:
+    if dedup.duplicates:
+        n_papers = len(dedup.report())
+        logger.info(f"Skipped {len(dedup.duplicates)} duplicate PDFs of {n_papers} papers")
+
+
+def _is_duplicate(
+    context: IngestionContext,
+    job: PaperJob,
+    identifiers: Sequence[str],
+    fingerprint: Fingerprint | None = None,
+) -> bool:
+    original = context.dedup.check_paper(job.pdf_path, identifiers, fingerprint)
+    if original is not None:
+        logger.info(f"{job.pdf_path} holds the same paper as {original}, skipping")
+    return original is not None
+
+
+async def _scan_stage(context: IngestionContext, job: PaperJob) -> PaperJob | None:
+    sha256 = await asyncio.to_thread(_hash_pdf, context, job)
+    original = context.dedup.check_content(job.pdf_path, sha256)
+    if original is not None:
+        logger.info(f"{job.pdf_path} is a copy of {original}, skipping")
+        return None
+    job.entry = await asyncio.to_thread(context.journal.start, job.pdf_path, sha256)
+    if job.entry.reached("committed"):
+        logger.info(f"{job.pdf_path} was already ingested, skipping")
+        return None
+    if context.adopt_legacy:
+        await asyncio.to_thread(context.cache.adopt_legacy, [job.pdf_path])
+    if job.entry.reached("metadata"):
+        job.raw_metadata, job.metadata_saved = job.entry.metadata, True
+    else:
+        job.raw_metadata = await asyncio.to_thread(get_metadata.load_saved_metadata, job.pdf_path, sha256)
+        job.metadata_saved = job.raw_metadata is not None
+    if job.metadata_saved:
+        paper_id = job.raw_metadata.get("paper_id")
+        return None if paper_id and _is_duplicate(context, job, [paper_id_key(paper_id)]) else job
+
+    loop = asyncio.get_running_loop()
+    with context.metrics.measure("metadata"):
+        job.local_info = await loop.run_in_executor(
+            context.process_pool, get_metadata.try_extract_local_metadata, job.pdf_path
+        )
+    info = job.local_info
+    if _is_duplicate(
+        context, job, local_identifiers(info.doi_candidates, info.arxiv_candidates), info.fingerprint
+    ):
+        return None
+    return job
+
+
+async def _lookup_stage(context: IngestionContext, job: PaperJob) -> PaperJob:
+    if not job.metadata_saved:
+        with context.metrics.measure("lookup"):
+            job.raw_metadata = await context.metadata_client.resolve(job.local_info)
+        job.local_info = None
+    return job
+
+
+def _metadata_stage(context: IngestionContext, job: PaperJob) -> PaperJob | None:
+    if not job.metadata_saved:
+        if context.review_queue is not None and get_metadata.queue_for_review(
+            context.review_queue, job.raw_metadata, job.pdf_path
+        ):
+            return None
+        # May prompt the user for missing fields, hence a single worker
+        job.raw_metadata = get_metadata.complete_metadata(job.raw_metadata, job.pdf_path)
+    metadatas = get_metadata.convert_metadata_to_dataclass([job.raw_metadata])
+    if not metadatas:
+        logger.warning(f"No usable metadata for {job.pdf_path}, skipping")
+        return None
+    job.metadata = metadatas[0]
+    if _is_duplicate(context, job, [paper_id_key(job.metadata.paper_id)]):
+        return None
+    context.dedup.set_paper_id(job.pdf_path, job.metadata.paper_id)
+    # Past the embedded stage, the paper may be partially written and must be written again
+    if not job.entry.reached("embedded") and context.client.check_ids_exist([job.metadata.paper_id])[0]:
+        logger.info(f"Paper '{job.metadata.paper_id}' already exists in database, skipping")
+        context.journal.advance(job.pdf_path, "committed", metadata=job.raw_metadata)
+        return None
+    if not job.entry.reached("metadata"):
+        context.journal.advance(job.pdf_path, "metadata", metadata=job.raw_metadata)
+    return job
+
+
+async def _parse_stage(context: IngestionContext, job: PaperJob) -> PaperJob:
+    markdown_path = await asyncio.to_thread(context.cache.markdown_path, job.pdf_path)
+    if await asyncio.to_thread(parse_cache.document_exists, markdown_path):
+        context.metrics.skip("parse")
+    else:
+        with context.metrics.measure("parse") as measurement:
+            parsed = await context.parser.parse(job.pdf_path)
+            await asyncio.to_thread(parse_documents.write_single_parsed_file, parsed, markdown_path)
+            measurement.bytes = markdown_path.stat().st_size
+    job.markdown_path = markdown_path
+    if not job.entry.reached("parsed"):
+        await asyncio.to_thread(context.cache.record, job.pdf_path, job.metadata.paper_id)
+        await asyncio.to_thread(context.journal.advance, job.pdf_path, "parsed")
+    return job
+
+
+def _load_document(context: IngestionContext, job: PaperJob) -> Document:
+    with context.metrics.measure("load") as measurement:
+        document = parse_documents.load_markdown(str(job.markdown_path))[0]
+        measurement.bytes = len(document.page_content.encode())
+    document.metadata.update(_document_metadata(job.metadata))
+    return document
+
+
+async def _chunk_stage(context: IngestionContext, job: PaperJob) -> PaperJob:
+    if job.entry.reached("chunked"):
+        job.chunks = await asyncio.to_thread(context.journal.load_chunks, job.pdf_path)
+    if job.chunks is None:
+        document = await asyncio.to_thread(_load_document, context, job)
+        loop = asyncio.get_running_loop()
+        # Splitting is CPU-bound, it runs in the process pool to use every core
+        with context.metrics.measure("chunk", len(document.page_content.encode())):
+            job.chunks = await loop.run_in_executor(context.process_pool, prep_docs.chunk_document, document)
+        await asyncio.to_thread(context.journal.save_chunks, job.pdf_path, job.chunks)
+    else:
+        context.metrics.skip("chunk")
+    return job
+
+
+def _embed_stage(context: IngestionContext, job: PaperJob) -> PaperJob:
+    if job.entry.reached("embedded"):
+        job.embeddings = context.journal.load_embeddings(job.pdf_path)
+    if job.embeddings is None:
+        texts = [chunk.page_content for chunk in job.chunks]
+        with context.metrics.measure("embed", sum(len(text.encode()) for text in texts)):
+            job.embeddings = context.embeddings.embed_documents(texts)
+        context.journal.save_embeddings(job.pdf_path, job.embeddings)
+    else:
+        context.metrics.skip("embed")
+    return job
+
+
+def _write_stage(context: IngestionContext, job: PaperJob) -> PaperJob:
+    chunk_ids = make_chunk_ids(job.metadata.paper_id, len(job.chunks))
+    add_paper_to_dbs(context.client, job.chunks, job.metadata, job.embeddings, chunk_ids, context.metrics)
+    context.journal.advance(job.pdf_path, "committed")
+    logger.info(f"Added paper '{job.metadata.title}' to databases")
+    # Only keep a light record of ingested papers in the pipeline result
+    job.chunks, job.embeddings = None, None
+    return job
+
+
+def create_ingestion_stages(context: IngestionContext) -> List[Stage]:
+    return [
+        Stage("scan", partial(_scan_stage, context), workers=config.INGEST_SCAN_WORKERS),
+        Stage("lookup", partial(_lookup_stage, context), workers=config.METADATA_LOOKUP_CONCURRENCY),
+        Stage("metadata", partial(_metadata_stage, context), workers=1),
+        Stage("parse", partial(_parse_stage, context), workers=context.parser.max_concurrency),
+        Stage("chunk", partial(_chunk_stage, context), workers=config.INGEST_CHUNK_WORKERS),
+        Stage("embed", partial(_embed_stage, context), workers=1),
+        Stage("write", partial(_write_stage, context), workers=1),
+    ]
+
+
+@asynccontextmanager
+async def open_ingestion_context(
+    persist_directory: Path,
+    journal: IngestJournal | None = None,
+    parser_name: str = config.PARSER_BACKEND,
+    review_queue: ReviewQueue | None = None,
+    embeddings: Embeddings | None = None,
+) -> AsyncIterator[IngestionContext]:
+    """Set up the clients, caches and worker pools shared by successive ingestion runs.
+
+    With a review queue, the ingestion runs unattended, see `IngestionContext`. The
+    FastEmbed model is used unless other `embeddings` are given.
+    """
+    client, embeddings = create_vector_client(persist_directory, embeddings)
+    parser = create_parser_backend(parser_name, parse_documents.PARSE_INSTRUCTIONS)
+    cache = ParseCache(parser.cache_tag)
+    process_pool = ProcessPoolExecutor(max_workers=config.METADATA_PROCESS_WORKERS)
+    journal = IngestJournal() if journal is None else journal
+    try:
+        async with MetadataClient() as metadata_client:
+            yield IngestionContext(
+                client, embeddings, parser, cache, process_pool, metadata_client, journal, review_queue
+            )
+    finally:
+        process_pool.shutdown()
+        await parser.aclose()
+
+
+def _make_job(item: str | Path | ScanEntry) -> PaperJob:
+    """Job of a PDF under its absolute path, the key of the journal, hash index and metadata store."""
+    if isinstance(item, ScanEntry):
+        item = replace(item, path=str(Path(item.path).absolute()))
+        return PaperJob(item.path, scan_entry=item)
+    return PaperJob(str(Path(item).absolute()))
+
+
+async def run_ingestion(
+    context: IngestionContext, pdf_paths: Sequence[str] | Iterable[ScanEntry], progress: bool = True
+) -> PipelineResult:
+    """Ingest PDFs given as a list or streamed, e.g. by `scan_files`, while they are found.
+
+    The count, duration, bytes and errors of each step are shown while the run goes on,
+    on a terminal, and written as a JSON run report in the `reports` data folder. The
+    progress is only shown with `progress` and a review queue, since papers with missing
+    metadata are otherwise prompted for.
+    """
+    context.metrics = RunMetrics({"parse": context.parser.resource})
+    context.dedup = Deduplicator()
+    has_legacy = await asyncio.to_thread(context.cache.has_legacy_documents)
+    context.adopt_legacy = has_legacy and not isinstance(pdf_paths, Sequence)
+    if isinstance(pdf_paths, Sequence):
+        jobs = [_make_job(item) for item in pdf_paths]
+        if has_legacy:
+            await asyncio.to_thread(context.cache.adopt_legacy, [job.pdf_path for job in jobs])
+    else:
+        # Streamed PDFs adopt legacy documents one by one in the scan stage, the first PDF
+        # of a stem taking its document
+        scanned = context.metrics.measure_iterable("scan", pdf_paths, lambda item: getattr(item, "size", 0))
+        jobs = (_make_job(item) async for item in iterate_in_thread(scanned))
+
+    started_at = time.time()
+    async with ProgressDisplay(context.metrics, enabled=progress and context.review_queue is not None):
+        result = await run_pipeline(
+            jobs, create_ingestion_stages(context), queue_size=config.INGEST_QUEUE_SIZE
+        )
+    if not (result.completed or result.dropped or result.failures):
+        logger.warning("No PDF files found to ingest")
+
+    for stage, job, error in result.failures:
+        context.journal.fail(job.pdf_path, stage, error)
+    logger.info(context.parser.stats.summary())
+    logger.info(f"Ingested {len(result.completed)} papers, skipped {result.dropped}")
+    logger.info(context.journal.report(since=started_at))
+    _log_duplicates(context.dedup)
+    logger.info(context.metrics.summary())
+    report_path = context.metrics.write_report(
+        ingested=len(result.completed),
+        skipped=result.dropped,
+        failed=len(result.failures),
+        duplicates=context.dedup.report(),
+    )
+    logger.info(f"Run report written to {report_path}")
+    if context.review_queue is not None and len(context.review_queue):
+        logger.warning(
+            f"{len(context.review_queue)} papers have missing metadata, "
+            "run `giantsmind --review` to complete them"
+        )
+    if result.failures:
+        failed = ", ".join(f"{item} ({stage})" for stage, item, _ in result.failures)
+        logger.warning(f"Failed to process {len(result.failures)} papers: {failed}")
+    return result
+
+
+def remove_papers_of_pdfs(context: IngestionContext, pdf_paths: List[str]) -> int:
+    """Remove the papers ingested from PDFs that were deleted or replaced.
+
+    A paper is kept while another ingested PDF holds it. Returns the number of papers removed.
+    """
+    n_removed = 0
+    for pdf_path in pdf_paths:
+        entry = context.journal.get(pdf_path)
+        context.journal.forget(pdf_path)
+        paper_id = (entry.metadata or {}).get("paper_id") if entry is not None else None
+        if not paper_id or context.journal.paths_for_paper(paper_id):
+            continue
+        context.client.delete_papers([paper_id])
+        try:
+            paper_ops.remove_papers([paper_id])
+        except paper_ops.PaperNotFoundError:
+            pass
+        logger.info(f"Removed paper '{paper_id}' of {pdf_path} from databases")
+        n_removed += 1
+    return n_removed
+
+
+async def _ingest_papers(
+    pdf_paths: Sequence[str] | Iterable[ScanEntry],
+    persist_directory: Path,
+    journal: IngestJournal | None = None,
+    parser_name: str = config.PARSER_BACKEND,
+    review_queue: ReviewQueue | None = None,
+) -> int:
+    async with open_ingestion_context(persist_directory, journal, parser_name, review_queue) as context:
+        result = await run_ingestion(context, pdf_paths)
+    return len(result.failures)
+
+
+def ingest_papers(
+    pdf_paths: Sequence[str] | Iterable[ScanEntry],
+    persist_directory: Path,
+    journal: IngestJournal | None = None,
+    parser_name: str = config.PARSER_BACKEND,
+    review_queue: ReviewQueue | None = None,
+) -> int:
+    """Stream each paper through metadata, parsing, chunking, embedding and database writes.
+
+    Stages are connected by bounded queues, so a paper becomes searchable as soon as it
+    is written and memory does not grow with the size of the library. Every completed
+    stage is recorded in the ingestion journal, so an interrupted run resumes each paper
+    where it stopped. Papers with missing metadata are queued in `review_queue` if
+    given, instead of prompting for the fields. Returns the number of papers that failed.
+    """
+    return asyncio.run(_ingest_papers(pdf_paths, persist_directory, journal, parser_name, review_queue))
+
+
+def parse_papers(
+    pdf_path: str,
+    streaming: bool = True,
+    parser_name: str = config.PARSER_BACKEND,
+    interactive: bool = True,
+) -> int:
+    """Handle PDF parsing operation.
+
+    Unless `interactive`, papers with missing metadata are queued for `giantsmind --review`.
+    """
+    review_queue = None if interactive else ReviewQueue()
     try:
         logger.info("Starting PDF parsing process")
-        pdf_paths = setup_pdf_processing(Path(pdf_path))
-        if not pdf_paths:
-            return 1
-
-        parsed_docs, metadatas = process_documents(pdf_paths)
-        process_database_operations(parsed_docs, metadatas, local.get_local_data_path())
+        if streaming:
+            pdf_folder = Path(pdf_path).absolute()
+            if not pdf_folder.is_dir():
+                logger.error(f"Invalid directory: {pdf_folder}")
+                raise NotADirectoryError(f"{pdf_folder} is not a valid directory.")
+            # Papers are ingested while the folder tree is still being scanned
+            n_failed = ingest_papers(
+                scan_files(pdf_folder),
+                local.get_local_data_path(),
+                parser_name=parser_name,
+                review_queue=review_queue,
+            )
+            if n_failed:
+                logger.error(f"{n_failed} papers failed to ingest")
+                return 1
+        else:
+            pdf_paths = setup_pdf_processing(Path(pdf_path))
+            if not pdf_paths:
+                return 1
+            parsed_docs, metadatas = process_documents(pdf_paths, parser_name, review_queue)
+            process_database_operations(parsed_docs, metadatas, local.get_local_data_path())
 
         logger.info("PDF parsing and database update completed")
         return 0
@@ -141,6 +625,4 @@ def parse_papers(pdf_path: str) -> int:
 
 
 if __name__ == "__main__":
-    import os
-
     parse_papers(os.getenv("DEFAULT_PDF_PATH"))
@@ -0,0 +1,193 @@
+import asyncio
+import queue
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from giantsmind.core import get_metadata
+from giantsmind.core.metadata_cache import normalize_arxiv_id, normalize_doi
+from giantsmind.core.review_queue import ReviewItem, ReviewQueue
+from giantsmind.scripts import parse_papers
+from giantsmind.utils import local
+from giantsmind.utils.logging import logger
+
+IDENTIFIER_PROMPT = (
+    "DOI or arXiv ID, ENTER to type the fields, 'o' to open the PDF, 's' to skip, 'q' to stop: "
+)
+
+
+def parse_identifier(text: str) -> Tuple[str, str] | None:
+    """Tell a DOI from an arXiv ID, returning ("doi" or "arxiv", identifier)."""
+    doi = normalize_doi(text)
+    if doi.startswith("10.") and "/" in doi:
+        return "doi", doi
+    arxiv_id = normalize_arxiv_id(text)
+    if arxiv_id and " " not in arxiv_id:
+        return "arxiv", arxiv_id
+    return None
+
+
+def _describe(item: ReviewItem) -> str:
+    title = item.metadata.get("title")
+    return f'"{title}" ({item.pdf_path})' if title else item.pdf_path
+
+
+class ReviewSession:
+    """Work through the review queue, ingesting each paper as soon as its metadata is complete.
+
+    The queued papers are first looked up again all at once. The user then gives the
+    DOI or arXiv ID of the remaining papers, which are looked up together, and types
+    the fields of the papers left. Completed papers are ingested in the background while
+    the review goes on.
+    """
+
+    def __init__(
+        self,
+        context: parse_papers.IngestionContext,
+        review_queue: ReviewQueue,
+        prompt: Callable[[str], str] = input,
+    ):
+        self.context = context
+        self.review_queue = review_queue
+        self.prompt = prompt
+        self.n_completed = 0
+        self._completed: queue.Queue = queue.Queue()
+        self._stopped = False
+
+    async def _ask(self, text: str) -> str:
+        # Prompts run in a thread, so the ingestion of completed papers carries on
+        return (await asyncio.to_thread(self.prompt, text)).strip()
+
+    def complete(self, item: ReviewItem, metadata: dict) -> bool:
+        """Merge metadata into a queued paper.
+
+        Once nothing is missing, the paper is handed to the ingestion.
+        """
+        item.metadata = {**item.metadata, **{key: value for key, value in metadata.items() if value}}
+        item.missing_fields = get_metadata.get_missing_fields(item.metadata)
+        if item.missing_fields:
+            return False
+        if not item.metadata.get("paper_id"):
+            # Papers without a DOI or arXiv ID are identified by their content
+            item.metadata["paper_id"] = f"sha256:{self.context.cache.hash_index.get_hash(item.pdf_path)}"
+        item.metadata.setdefault("url", "")
+        item.metadata["file_path"] = item.pdf_path
+        get_metadata.save_metadata(item.metadata, item.pdf_path)
+        self.review_queue.remove(item.pdf_path)
+        self._completed.put(item.pdf_path)
+        self.n_completed += 1
+        return True
+
+    async def _look_up_again(self, items: List[ReviewItem]) -> List[ReviewItem]:
+        loop = asyncio.get_running_loop()
+        infos = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    self.context.process_pool, get_metadata.try_extract_local_metadata, item.pdf_path
+                )
+                for item in items
+            ]
+        )
+        metadatas = await asyncio.gather(*[self.context.metadata_client.resolve(info) for info in infos])
+        remaining = [item for item, metadata in zip(items, metadatas) if not self.complete(item, metadata)]
+        logger.info(f"Completed {len(items) - len(remaining)} papers by looking them up again")
+        return remaining
+
+    async def _look_up(self, identifiers: Dict[str, Tuple[str, str]]) -> Dict[str, dict]:
+        """Look up the identifiers given for each PDF at once, arXiv IDs sharing multi-ID queries."""
+        client = self.context.metadata_client
+        lookups = [
+            client.fetch_doi(identifier) if kind == "doi" else client.fetch_arxiv(identifier)
+            for kind, identifier in identifiers.values()
+        ]
+        return dict(zip(identifiers, await asyncio.gather(*lookups)))
+
+    async def _ask_identifiers(self, items: List[ReviewItem]) -> List[ReviewItem]:
+        """Ask for the DOI or arXiv ID of each paper and look them up, returning the papers to type in."""
+        identifiers: Dict[str, Tuple[str, str]] = {}
+        to_type = []
+        for i, item in enumerate(items, 1):
+            print(f"[{i}/{len(items)}] Fields {item.missing_fields} are missing for {_describe(item)}")
+            while True:
+                answer = await self._ask(IDENTIFIER_PROMPT)
+                if answer == "o":
+                    get_metadata.open_pdf(item.pdf_path)
+                elif answer and answer not in ("s", "q") and parse_identifier(answer) is None:
+                    print("This is neither a DOI nor an arXiv ID.")
+                else:
+                    break
+            if answer == "q":
+                self._stopped = True
+                break
+            if answer == "s":
+                continue
+            if not answer:
+                to_type.append(item)
+            else:
+                identifiers[item.pdf_path] = parse_identifier(answer)
+
+        by_path = {item.pdf_path: item for item in items}
+        for pdf_path, metadata in (await self._look_up(identifiers)).items():
+            if not self.complete(by_path[pdf_path], metadata):
+                print(f"No complete metadata found for {identifiers[pdf_path][1]}, please type the fields.")
+                to_type.append(by_path[pdf_path])
+        return to_type
+
+    async def _ask_fields(self, items: List[ReviewItem]) -> None:
+        for item in items:
+            print(f"Missing fields of {_describe(item)}: 'o' to open the PDF, ENTER to skip the paper.")
+            metadata = {}
+            for field in item.missing_fields:
+                label = "authors (separated by ;)" if field == "authors" else field
+                value = await self._ask(f"{label}: ")
+                while value == "o":
+                    get_metadata.open_pdf(item.pdf_path)
+                    value = await self._ask(f"{label}: ")
+                if not value:
+                    break
+                metadata[field] = value
+            else:
+                self.complete(item, metadata)
+
+    async def run(self) -> None:
+        items = []
+        for item in self.review_queue.pending():
+            if Path(item.pdf_path).exists():
+                items.append(item)
+            else:
+                logger.info(f"{item.pdf_path} no longer exists, removing it from the review queue")
+                self.review_queue.remove(item.pdf_path)
+        if not items:
+            logger.info("No papers to review")
+            return
+
+        logger.info(f"Reviewing {len(items)} papers with missing metadata")
+        # No progress line, it would erase the prompts of the review
+        ingestion = asyncio.create_task(
+            parse_papers.run_ingestion(self.context, iter(self._completed.get, None), progress=False)
+        )
+        try:
+            items = await self._look_up_again(items)
+            if items:
+                items = await self._ask_identifiers(items)
+            if items and not self._stopped:
+                await self._ask_fields(items)
+        finally:
+            self._completed.put(None)
+            await ingestion
+        logger.info(f"Completed {self.n_completed} papers, {len(self.review_queue)} left to review")
+
+
+async def areview_papers(
+    persist_directory: Path, review_queue: ReviewQueue | None = None, prompt: Callable[[str], str] = input
+) -> int:
+    review_queue = review_queue if review_queue is not None else ReviewQueue()
+    async with parse_papers.open_ingestion_context(persist_directory, review_queue=review_queue) as context:
+        session = ReviewSession(context, review_queue, prompt)
+        await session.run()
+    return len(review_queue)
+
+
+def review_papers() -> int:
+    """Handle the review operation: complete the metadata of the queued papers and ingest them."""
+    asyncio.run(areview_papers(local.get_local_data_path()))
+    return 0
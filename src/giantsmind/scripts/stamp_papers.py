@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+from giantsmind.core import config, get_metadata
+from giantsmind.utils.hash_index import FileHashIndex
+from giantsmind.utils.logging import logger
+from giantsmind.utils.scanner import scan_files
+
+
+def _stamp(pdf_path: str, info: dict) -> Tuple[bool, str | None]:
+    """Runs in a worker process: (whether the PDF changed, error message if it failed)."""
+    try:
+        return get_metadata.edit_pdf_metadata(pdf_path, pdf_path, info), None
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}"
+
+
+def stamp_pdfs(
+    pdf_paths: List[str],
+    hash_index: FileHashIndex | None = None,
+    workers: int | None = config.METADATA_PROCESS_WORKERS,
+) -> int:
+    """Write the saved metadata of PDFs into their info dictionaries, several PDFs at once.
+
+    PDFs without saved metadata are left alone. Stamped PDFs keep their former hash in
+    the hash index, so they are neither parsed nor ingested again. Returns the number
+    of PDFs stamped.
+    """
+    hash_index = hash_index if hash_index is not None else FileHashIndex()
+    jobs = []
+    for pdf_path, metadata in zip(pdf_paths, get_metadata.load_saved_metadatas(pdf_paths)):
+        if metadata is None or get_metadata.get_missing_fields(metadata):
+            continue
+        jobs.append((pdf_path, get_metadata.pdf_info_metadata(metadata)))
+    if len(jobs) < len(pdf_paths):
+        logger.info(f"Skipping {len(pdf_paths) - len(jobs)} PDFs without resolved metadata")
+    if not jobs:
+        return 0
+
+    hashes = hash_index.get_hashes([pdf_path for pdf_path, _ in jobs])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(_stamp, *zip(*jobs)))
+    n_stamped = 0
+    for (pdf_path, _), sha256, (changed, error) in zip(jobs, hashes, outcomes):
+        if error is not None:
+            logger.error(f"Could not write the metadata of {pdf_path}: {error}")
+        elif changed:
+            hash_index.record(pdf_path, sha256)
+            n_stamped += 1
+    logger.info(
+        f"Stamped the metadata of {n_stamped} PDFs, {len(jobs) - n_stamped} were up to date or failed"
+    )
+    return n_stamped
+
+
+def stamp_papers(pdf_path: str) -> int:
+    """Handle the stamp operation: write the resolved metadata into the PDFs of a folder tree."""
+    folder = Path(pdf_path)
+    if not folder.is_dir():
+        logger.error(f"Invalid directory: {folder}")
+        return 1
+    stamp_pdfs(sorted(entry.path for entry in scan_files(folder)))
+    return 0
@@ -0,0 +1,103 @@
+import asyncio
+from pathlib import Path
+from typing import List
+
+from giantsmind.core import config
+from giantsmind.core.review_queue import ReviewQueue
+from giantsmind.scripts import parse_papers
+from giantsmind.utils import local, pdf_tools
+from giantsmind.utils.folder_watcher import DELETED, RESCAN, Debouncer, FileChange, create_watcher
+from giantsmind.utils.logging import logger
+
+
+async def _reconcile(context: parse_papers.IngestionContext, folder: Path) -> None:
+    """Bring the databases in line with the folder: remove deleted PDFs, ingest the others.
+
+    PDFs that were already ingested are skipped by the journal, so this is cheap.
+    """
+    pdf_paths = await asyncio.to_thread(pdf_tools.get_pdf_paths, folder, True)
+    present = set(pdf_paths)
+    deleted = [
+        path for path in context.journal.paths() if Path(path).is_relative_to(folder) and path not in present
+    ]
+    if deleted:
+        await asyncio.to_thread(parse_papers.remove_papers_of_pdfs, context, deleted)
+    if pdf_paths:
+        await parse_papers.run_ingestion(context, pdf_paths)
+
+
+def _replaced_pdfs(context: parse_papers.IngestionContext, pdf_paths: List[str]) -> List[str]:
+    """Ingested PDFs whose content changed since they were ingested."""
+    replaced = []
+    for pdf_path in pdf_paths:
+        entry = context.journal.get(pdf_path)
+        if entry is not None and entry.reached("committed"):
+            if context.cache.hash_index.get_hash(pdf_path) != entry.sha256:
+                replaced.append(pdf_path)
+    return replaced
+
+
+async def _apply_changes(context: parse_papers.IngestionContext, changes: List[FileChange]) -> None:
+    deleted = [change.path for change in changes if change.kind == DELETED]
+    updated = [change.path for change in changes if change.kind != DELETED and Path(change.path).exists()]
+    deleted += await asyncio.to_thread(_replaced_pdfs, context, updated)
+    if deleted:
+        await asyncio.to_thread(parse_papers.remove_papers_of_pdfs, context, deleted)
+    if updated:
+        logger.info(f"Ingesting {len(updated)} new or modified PDFs")
+        await parse_papers.run_ingestion(context, updated)
+
+
+async def awatch_papers(
+    folder: str | Path,
+    persist_directory: Path,
+    debounce: float = config.WATCH_DEBOUNCE,
+    poll_interval: float = config.WATCH_POLL_INTERVAL,
+    use_inotify: bool | None = None,
+    stop: asyncio.Event | None = None,
+    parser_name: str = config.PARSER_BACKEND,
+) -> None:
+    """Keep the databases in sync with a folder and its subfolders until `stop` is set.
+
+    The folder is reconciled once at startup. Afterwards, only the PDFs reported by the
+    watcher are processed, once they have not changed for `debounce` seconds. Papers
+    with missing metadata are queued for review rather than waiting for an answer.
+    """
+    folder = Path(folder).absolute()
+    stop = stop if stop is not None else asyncio.Event()
+    watcher = create_watcher(folder, use_inotify)
+    debouncer = Debouncer(debounce)
+    try:
+        async with parse_papers.open_ingestion_context(
+            persist_directory, parser_name=parser_name, review_queue=ReviewQueue()
+        ) as context:
+            await _reconcile(context, folder)
+            logger.info(f"Watching {folder} for new, modified and deleted PDFs")
+            while not stop.is_set():
+                changes = await asyncio.to_thread(watcher.read, poll_interval)
+                if any(change.kind == RESCAN for change in changes):
+                    logger.warning(f"Lost track of changes in {folder}, comparing the whole folder again")
+                    await _reconcile(context, folder)
+                    continue
+                debouncer.add(changes)
+                ready = debouncer.pop_ready()
+                if not ready:
+                    continue
+                try:
+                    await _apply_changes(context, ready)
+                except Exception as e:
+                    logger.error(f"Failed to apply changes in {folder}: {type(e).__name__}: {e}")
+    finally:
+        watcher.close()
+
+
+def watch_papers(folder: str, parser_name: str = config.PARSER_BACKEND) -> int:
+    """Handle the watch-folder operation, until interrupted."""
+    if not Path(folder).is_dir():
+        logger.error(f"Invalid directory: {folder}")
+        return 1
+    try:
+        asyncio.run(awatch_papers(folder, local.get_local_data_path(), parser_name=parser_name))
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+    return 0
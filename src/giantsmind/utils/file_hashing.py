@@ -0,0 +1,68 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, List, Sequence, TypeVar
+
+BLOCK_SIZE = 1 << 20
+QUICK_BLOCK_SIZE = 64 << 10
+HASH_WORKERS = 8  # hashlib releases the GIL, so threads hash files in parallel
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class FileDigest:
+    sha256: str
+    quick: str
+
+
+def _quick_fingerprint(f: BinaryIO, size: int) -> str:
+    """Hash of the size, first block and last block of an open file."""
+    h = hashlib.sha256(f"{size}\n".encode())
+    f.seek(0)
+    h.update(f.read(QUICK_BLOCK_SIZE))
+    if size > QUICK_BLOCK_SIZE:
+        # The last block never overlaps the first, so short files hash their content once
+        f.seek(max(size - QUICK_BLOCK_SIZE, QUICK_BLOCK_SIZE))
+        h.update(f.read(QUICK_BLOCK_SIZE))
+    return h.hexdigest()
+
+
+def quick_fingerprint(path: str | Path) -> str:
+    """Cheap fingerprint of a file from its size, first and last blocks.
+
+    Files with different fingerprints differ. Files sharing one almost always have the
+    same content, and always do when they are shorter than two blocks.
+    """
+    with open(path, "rb") as f:
+        return _quick_fingerprint(f, os.fstat(f.fileno()).st_size)
+
+
+def hash_file(path: str | Path) -> FileDigest:
+    """SHA-256 and quick fingerprint of a file, read in blocks into a reused buffer."""
+    buffer = bytearray(BLOCK_SIZE)
+    view = memoryview(buffer)
+    h = hashlib.sha256()
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        while n := f.readinto(buffer):
+            h.update(view[:n])
+        return FileDigest(h.hexdigest(), _quick_fingerprint(f, size))
+
+
+def _map(func: Callable[[str | Path], T], paths: Sequence[str | Path], workers: int) -> List[T]:
+    if len(paths) < 2 or workers < 2:
+        return [func(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths)), thread_name_prefix="hash") as pool:
+        return list(pool.map(func, paths))
+
+
+def hash_files(paths: Sequence[str | Path], workers: int = HASH_WORKERS) -> List[FileDigest]:
+    """Hash files on a pool of threads, returning their digests in order."""
+    return _map(hash_file, paths, workers)
+
+
+def quick_fingerprints(paths: Sequence[str | Path], workers: int = HASH_WORKERS) -> List[str]:
+    return _map(quick_fingerprint, paths, workers)
@@ -0,0 +1,234 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from giantsmind.utils.logging import logger
+from giantsmind.utils.scanner import scan_files
+
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+# The watcher lost track of the folder and everything must be compared again
+RESCAN = "rescan"
+
+# inotify event masks, from <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass(frozen=True)
+class FileChange:
+    path: str
+    kind: str
+
+
+def _is_pdf(name: str) -> bool:
+    return name.lower().endswith(".pdf")
+
+
+def snapshot_folder(folder: str | Path) -> Dict[str, Tuple[int, int]]:
+    """Map each PDF of a folder and its subfolders to its size and modification time."""
+    return {entry.path: (entry.size, entry.mtime_ns) for entry in scan_files(folder)}
+
+
+class PollingWatcher:
+    """Detect PDF changes in a folder tree by comparing the size and mtime of its files."""
+
+    def __init__(self, folder: str | Path):
+        self.folder = str(folder)
+        self._snapshot = snapshot_folder(self.folder)
+
+    def read(self, timeout: float) -> List[FileChange]:
+        time.sleep(timeout)
+        current = snapshot_folder(self.folder)
+        changes = [FileChange(path, DELETED) for path in self._snapshot.keys() - current.keys()]
+        for path, state in current.items():
+            previous = self._snapshot.get(path)
+            if previous is None:
+                changes.append(FileChange(path, CREATED))
+            elif previous != state:
+                changes.append(FileChange(path, MODIFIED))
+        self._snapshot = current
+        return changes
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Detect PDF changes in a folder tree with Linux inotify, without scanning the folder.
+
+    Each subfolder has its own watch, added as subfolders appear. The PDFs of a folder
+    moved into the tree are reported as created. A subfolder deleted or moved out of the
+    tree asks for a rescan, since the PDFs it held are not reported one by one.
+    """
+
+    _MASK = (
+        _IN_MODIFY
+        | _IN_CLOSE_WRITE
+        | _IN_MOVED_FROM
+        | _IN_MOVED_TO
+        | _IN_CREATE
+        | _IN_DELETE
+        | _IN_DELETE_SELF
+        | _IN_MOVE_SELF
+    )
+
+    def __init__(self, folder: str | Path):
+        self.folder = str(folder)
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Folder of each watch descriptor
+        self._folders: Dict[int, str] = {}
+        try:
+            self._root = self._add_watch(self.folder)
+        except OSError:
+            os.close(self._fd)
+            raise
+        self._watch_tree(self.folder)
+
+    def _add_watch(self, folder: str) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), self._MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Cannot watch {folder}")
+        self._folders[wd] = folder
+        return wd
+
+    def _watch_tree(self, folder: str) -> List[str]:
+        """Watch the subfolders of a folder, returning the PDFs found in them and in the folder."""
+        pdf_paths = []
+        for dirpath, dirnames, filenames in os.walk(folder):
+            for dirname in dirnames:
+                try:
+                    self._add_watch(os.path.join(dirpath, dirname))
+                except OSError as e:
+                    logger.warning(f"Cannot watch {os.path.join(dirpath, dirname)}: {e}")
+            pdf_paths.extend(os.path.join(dirpath, name) for name in filenames if _is_pdf(name))
+        return pdf_paths
+
+    def read(self, timeout: float) -> List[FileChange]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changes = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset : offset + name_length].rstrip(b"\0").decode(errors="surrogateescape")
+            offset += name_length
+            changes.extend(self._to_changes(wd, mask, name))
+        return changes
+
+    def _to_changes(self, wd: int, mask: int, name: str) -> List[FileChange]:
+        if mask & _IN_Q_OVERFLOW or (wd == self._root and mask & (_IN_DELETE_SELF | _IN_MOVE_SELF)):
+            return [FileChange(self.folder, RESCAN)]
+        if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+            # A subfolder gone, its parent reports it
+            if self._folders.pop(wd, None) is not None and mask & _IN_MOVE_SELF:
+                self._libc.inotify_rm_watch(self._fd, wd)
+            return []
+        folder = self._folders.get(wd)
+        if folder is None:
+            return []
+        path = os.path.join(folder, name)
+        if mask & _IN_ISDIR:
+            if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                return [FileChange(self.folder, RESCAN)]
+            if mask & (_IN_CREATE | _IN_MOVED_TO):
+                try:
+                    self._add_watch(path)
+                except OSError as e:
+                    logger.warning(f"Cannot watch {path}: {e}")
+                    return [FileChange(self.folder, RESCAN)]
+                return [FileChange(pdf_path, CREATED) for pdf_path in self._watch_tree(path)]
+            return []
+        if not _is_pdf(name):
+            return []
+        if mask & (_IN_DELETE | _IN_MOVED_FROM):
+            return [FileChange(path, DELETED)]
+        if mask & (_IN_CREATE | _IN_MOVED_TO):
+            return [FileChange(path, CREATED)]
+        return [FileChange(path, MODIFIED)]
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def _load_libc() -> ctypes.CDLL:
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    # Raises AttributeError when the C library has no inotify support
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return libc
+
+
+def create_watcher(folder: str | Path, use_inotify: bool | None = None) -> InotifyWatcher | PollingWatcher:
+    """Watch a folder with inotify where available, by polling otherwise."""
+    if use_inotify is None:
+        use_inotify = sys.platform.startswith("linux")
+    if use_inotify:
+        try:
+            return InotifyWatcher(folder)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}), polling {folder} for changes instead")
+    return PollingWatcher(folder)
+
+
+class Debouncer:
+    """Hold file changes until a file has been quiet for `delay` seconds.
+
+    A PDF being copied into the folder triggers many events; it is only reported once
+    the copy is over. Successive changes to a file are merged: a file created then
+    modified is reported as created, a file created then deleted is not reported.
+    """
+
+    def __init__(self, delay: float, clock: Callable[[], float] = time.monotonic):
+        self.delay = delay
+        self.clock = clock
+        self._pending: Dict[str, Tuple[str, float]] = {}
+
+    def add(self, changes: Iterable[FileChange]) -> None:
+        now = self.clock()
+        for change in changes:
+            previous = self._pending.get(change.path, (None, now))[0]
+            kind = change.kind
+            if previous == CREATED and kind == MODIFIED:
+                kind = CREATED
+            elif previous == CREATED and kind == DELETED:
+                del self._pending[change.path]
+                continue
+            elif previous == DELETED and kind == CREATED:
+                kind = MODIFIED
+            self._pending[change.path] = (kind, now)
+
+    def pop_ready(self) -> List[FileChange]:
+        now = self.clock()
+        ready = [path for path, (_, last) in self._pending.items() if now - last >= self.delay]
+        return [FileChange(path, self._pending.pop(path)[0]) for path in ready]
+
+    def __len__(self) -> int:
+        return len(self._pending)
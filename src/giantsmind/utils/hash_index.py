@@ -0,0 +1,163 @@
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from giantsmind.utils import file_hashing, local
+from giantsmind.utils.scanner import ScanEntry
+from giantsmind.utils.sqlite import batched, connect
+
+DEFAULT_INDEX_PATH = Path(local.get_local_data_path()) / "file_index.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    quick TEXT
+);
+CREATE INDEX IF NOT EXISTS file_hashes_sha256 ON file_hashes (sha256);
+"""
+
+
+class FileHashIndex:
+    """Persistent index mapping a file's path, size and mtime to its SHA-256 hash.
+
+    Files whose size and mtime match the indexed values are not hashed again, so
+    looking up the hashes of an unchanged library only costs `stat` calls. New and
+    modified files are hashed on `workers` threads.
+
+    With `prefilter`, files whose size and mtime match the index are not trusted on
+    these alone: their first and last blocks are fingerprinted (see
+    `file_hashing.quick_fingerprint`) and compared with the indexed fingerprint, and the
+    files that may have changed, e.g. edited with their mtime restored, are hashed again.
+    A hash is never reused for a file that was not read in full under its size and mtime.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path = DEFAULT_INDEX_PATH,
+        prefilter: bool = False,
+        workers: int = file_hashing.HASH_WORKERS,
+    ):
+        self.db_path = Path(db_path)
+        self.prefilter = prefilter
+        self.workers = workers
+        with connect(self.db_path) as conn:
+            conn.executescript(_SCHEMA)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(file_hashes)")]
+            if "quick" not in columns:
+                # Indexes created before quick fingerprints were recorded
+                conn.execute("ALTER TABLE file_hashes ADD COLUMN quick TEXT")
+            # Fingerprints are only compared per path, not looked up by value
+            conn.execute("DROP INDEX IF EXISTS file_hashes_quick")
+
+    def _lookup(
+        self, conn: sqlite3.Connection, paths: Sequence[str]
+    ) -> Dict[str, Tuple[int, int, str, str | None]]:
+        rows = {}
+        for batch in batched(list(paths)):
+            placeholders = ",".join("?" * len(batch))
+            query = (
+                f"SELECT path, size, mtime_ns, sha256, quick FROM file_hashes WHERE path IN ({placeholders})"
+            )
+            for path, size, mtime_ns, sha256, quick in conn.execute(query, batch):
+                rows[path] = (size, mtime_ns, sha256, quick)
+        return rows
+
+    def _get_hashes(self, stats: Sequence[Tuple[str, int | None, int | None]]) -> List[str]:
+        """Hashes of files given with their size and mtime, None for missing files."""
+        paths = [path for path, _, _ in stats]
+        with connect(self.db_path) as conn:
+            indexed = self._lookup(conn, paths)
+            hashes: Dict[str, str] = {}
+            to_hash: List[Tuple[str, int, int]] = []
+            unchanged: List[Tuple[str, int, int]] = []
+            for path, size, mtime_ns in stats:
+                entry = indexed.get(path)
+                if size is None:
+                    if entry is None:
+                        raise FileNotFoundError(f"No such file: '{path}'")
+                    hashes[path] = entry[2]
+                elif entry and entry[0] == size and entry[1] == mtime_ns:
+                    hashes[path] = entry[2]
+                    unchanged.append((path, size, mtime_ns))
+                else:
+                    to_hash.append((path, size, mtime_ns))
+
+            if unchanged and self.prefilter:
+                to_hash.extend(self._maybe_changed(unchanged, indexed))
+            if to_hash:
+                digests = file_hashing.hash_files([path for path, _, _ in to_hash], self.workers)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, sha256, quick) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (path, size, mtime_ns, d.sha256, d.quick)
+                        for (path, size, mtime_ns), d in zip(to_hash, digests)
+                    ],
+                )
+                hashes.update({path: d.sha256 for (path, _, _), d in zip(to_hash, digests)})
+
+        return [hashes[path] for path in paths]
+
+    def _maybe_changed(
+        self, unchanged: List[Tuple[str, int, int]], indexed: Dict[str, Tuple[int, int, str, str | None]]
+    ) -> List[Tuple[str, int, int]]:
+        """Files with the indexed size and mtime whose quick fingerprint no longer matches."""
+        fingerprints = file_hashing.quick_fingerprints([path for path, _, _ in unchanged], self.workers)
+        return [
+            (path, size, mtime_ns)
+            for (path, size, mtime_ns), quick in zip(unchanged, fingerprints)
+            if indexed[path][3] is not None and indexed[path][3] != quick
+        ]
+
+    def record(self, path: str | Path, sha256: str) -> None:
+        """Index a file under a given hash.
+
+        E.g. to keep the identity of a PDF whose metadata was rewritten.
+        """
+        path = str(Path(path).absolute())
+        stat = os.stat(path)
+        with connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, sha256, quick) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, sha256, file_hashing.quick_fingerprint(path)),
+            )
+
+    def get_hashes(self, paths: Sequence[str | Path]) -> List[str]:
+        """Get the SHA-256 hash of each file, hashing only new or modified files.
+
+        Missing files resolve to their last indexed hash, if any.
+        """
+        stats = []
+        for path in paths:
+            path = str(Path(path).absolute())
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stats.append((path, None, None))
+            else:
+                stats.append((path, stat.st_size, stat.st_mtime_ns))
+        return self._get_hashes(stats)
+
+    def indexed_hashes(self, paths: Sequence[str | Path]) -> List[str | None]:
+        """Last indexed hash of each file, None for files never indexed, without reading them."""
+        paths = [str(Path(path).absolute()) for path in paths]
+        with connect(self.db_path) as conn:
+            indexed = self._lookup(conn, paths)
+        return [indexed[path][2] if path in indexed else None for path in paths]
+
+    def indexed(self) -> List[Tuple[str, str]]:
+        """Path and hash of every indexed file."""
+        with connect(self.db_path) as conn:
+            return conn.execute("SELECT path, sha256 FROM file_hashes ORDER BY path").fetchall()
+
+    def get_hash(self, path: str | Path) -> str:
+        return self.get_hashes([path])[0]
+
+    def get_scanned_hashes(self, entries: Sequence[ScanEntry]) -> List[str]:
+        """Like `get_hashes`, reusing the sizes and mtimes found by the scanner instead of a new stat."""
+        return self._get_hashes([(str(Path(e.path).absolute()), e.size, e.mtime_ns) for e in entries])
@@ -1,40 +1,44 @@
-import hashlib
 from pathlib import Path
 from typing import List
 
-from PyPDF2 import PdfReader, PdfWriter
+import fitz
+
+from giantsmind.utils import file_hashing
+from giantsmind.utils.scanner import scan_files
 
 
 def get_pdf_hashes(files: List[str]) -> List[str]:
-    """Get the hash of each file in a list of files."""
-    hashes = []
-    for file in files:
-        with open(file, "rb") as f:
-            data = f.read()
-            hash = hashlib.sha256(data).hexdigest()
-            hashes.append(hash)
-    return hashes
+    """Get the SHA-256 hash of each file in a list of files, hashing several files at once."""
+    return [digest.sha256 for digest in file_hashing.hash_files(files)]
+
 
+def get_page_count(pdf_path: str | Path) -> int:
+    with fitz.open(pdf_path) as document:
+        return document.page_count
 
-def split_pdf(input_pdf: str, output_folder: str) -> None:
+
+def split_pdf(input_pdf: str, output_folder: str, pages_per_file: int = 1) -> List[Path]:
+    """Split a PDF into files of `pages_per_file` consecutive pages, returned in page order."""
     input_path = Path(input_pdf)
     output_path = Path(output_folder)
     output_path.mkdir(parents=True, exist_ok=True)
-
-    pdf_reader = PdfReader(input_pdf)
     base_filename = input_path.stem
 
-    for page_num in range(len(pdf_reader.pages)):
-        pdf_writer = PdfWriter()
-        pdf_writer.add_page(pdf_reader.pages[page_num])
-
-        output_filename = output_path / f"{base_filename}_page_{page_num + 1}.pdf"
-        with open(output_filename, "wb") as output_pdf:
-            pdf_writer.write(output_pdf)
-
-
-def get_pdf_paths(folder_path: str) -> list:
-    """Get a list of PDF files in a folder."""
-    folder = Path(folder_path)
-    pdf_files = [str(file) for file in folder.glob("*.pdf")]
-    return pdf_files
+    output_filenames = []
+    with fitz.open(input_pdf) as source:
+        for first in range(0, source.page_count, pages_per_file):
+            last = min(first + pages_per_file, source.page_count) - 1
+            if first == last:
+                output_filename = output_path / f"{base_filename}_page_{first + 1}.pdf"
+            else:
+                output_filename = output_path / f"{base_filename}_pages_{first + 1}-{last + 1}.pdf"
+            with fitz.open() as output_pdf:
+                output_pdf.insert_pdf(source, from_page=first, to_page=last)
+                output_pdf.save(output_filename)
+            output_filenames.append(output_filename)
+    return output_filenames
+
+
+def get_pdf_paths(folder_path: str, recursive: bool = False) -> list:
+    """Get a sorted list of PDF files in a folder, and in its subfolders if `recursive`."""
+    return sorted(entry.path for entry in scan_files(folder_path, recursive=recursive))
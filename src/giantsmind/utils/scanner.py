@@ -0,0 +1,113 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Iterator, List, Sequence, Set, Tuple
+
+from giantsmind.utils.logging import logger
+
+DEFAULT_INCLUDE = ("*.pdf",)
+SCAN_WORKERS = 16  # directory listings mostly wait on storage, so more threads than CPUs
+SYMLINK_POLICIES = ("skip", "files", "follow")
+
+
+@dataclass(frozen=True)
+class ScanEntry:
+    path: str
+    size: int
+    mtime_ns: int
+
+
+def _matches(name: str, relative_path: str, patterns: Sequence[str]) -> bool:
+    """Case-insensitive glob match, on the relative path for patterns containing a `/`."""
+    for pattern in patterns:
+        target = relative_path if "/" in pattern else name
+        if fnmatchcase(target.lower(), pattern.lower()):
+            return True
+    return False
+
+
+def _scan_directory(
+    path: str, relative_path: str, include: Sequence[str], exclude: Sequence[str], symlinks: str
+) -> Tuple[List[ScanEntry], List[Tuple[str, str]]]:
+    files, subdirectories = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                relative = f"{relative_path}/{entry.name}" if relative_path else entry.name
+                try:
+                    if entry.is_symlink() and symlinks == "skip":
+                        continue
+                    if entry.is_dir(follow_symlinks=symlinks == "follow"):
+                        if not _matches(entry.name, relative, exclude):
+                            subdirectories.append((entry.path, relative))
+                        continue
+                    if not entry.is_file(follow_symlinks=True):
+                        continue
+                    if _matches(entry.name, relative, include) and not _matches(
+                        entry.name, relative, exclude
+                    ):
+                        stat = entry.stat(follow_symlinks=True)
+                        files.append(ScanEntry(entry.path, stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    # Broken symlink or file removed during the scan
+                    continue
+    except OSError as e:
+        logger.warning(f"Cannot scan {path}: {e}")
+    return files, subdirectories
+
+
+def scan_files(
+    root: str | Path,
+    include: Sequence[str] = DEFAULT_INCLUDE,
+    exclude: Sequence[str] = (),
+    symlinks: str = "files",
+    recursive: bool = True,
+    workers: int = SCAN_WORKERS,
+) -> Iterator[ScanEntry]:
+    """Walk a directory tree with `os.scandir` across a thread pool, yielding matching files.
+
+    Files are yielded as soon as their directory has been listed, with the size and
+    mtime of the scan, so consumers can start before the walk finishes and do not need
+    to stat the files again. The order is not deterministic.
+
+    Args:
+        root: Directory to scan
+        include: Glob patterns of the files to yield, matched on the file name, or on the
+            path relative to `root` for patterns containing a `/`
+        exclude: Glob patterns of the files and directories to leave out
+        symlinks: "skip" ignores symbolic links, "files" follows links to files and
+            "follow" also descends into linked directories, each directory once
+        recursive: Whether to descend into subdirectories
+        workers: Number of directories listed concurrently
+    """
+    if symlinks not in SYMLINK_POLICIES:
+        raise ValueError(f"symlinks must be one of {SYMLINK_POLICIES}, got '{symlinks}'")
+    root = os.fspath(root)
+    visited: Set[Tuple[int, int]] = set()
+    if symlinks == "follow":
+        stat = os.stat(root)
+        visited.add((stat.st_dev, stat.st_ino))
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending: Set[Future] = {pool.submit(_scan_directory, root, "", include, exclude, symlinks)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirectories = future.result()
+                for path, relative in subdirectories if recursive else []:
+                    if symlinks == "follow":
+                        # Linked directories can form cycles
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        if (stat.st_dev, stat.st_ino) in visited:
+                            continue
+                        visited.add((stat.st_dev, stat.st_ino))
+                    pending.add(pool.submit(_scan_directory, path, relative, include, exclude, symlinks))
+                yield from files
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
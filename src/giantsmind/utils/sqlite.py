@@ -0,0 +1,28 @@
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Generator
+
+
+@contextmanager
+def connect(db_path: str | Path, timeout: float = 30) -> Generator[sqlite3.Connection, None, None]:
+    """Open a SQLite connection that commits on success, rolls back on error and always closes.
+
+    The database uses write-ahead logging so readers are not blocked by a writer.
+    """
+    conn = sqlite3.connect(db_path, timeout=timeout)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def batched(items: list, size: int = 500) -> Generator[list, None, None]:
+    """Yield successive slices of `items`, e.g. to stay below SQLite's host parameter limit."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
@@ -12,5 +12,13 @@ class VectorDBClient(ABC):
     @abstractmethod
     def add_documents(self, documents: List[Document], **kwargs: Any) -> List[str]: ...
 
+    @abstractmethod
+    def add_embedded_documents(
+        self, documents: List[Document], embeddings: List[List[float]], ids: List[str] | None = None
+    ) -> List[str]: ...
+
+    @abstractmethod
+    def delete_papers(self, paper_ids: List[str]) -> None: ...
+
     @abstractmethod
     def similarity_search(self, query: str, **kwargs) -> List[Tuple[Document, float]]: ...
@@ -1,3 +1,4 @@
+import uuid
 from typing import Any, List, Tuple
 
 from langchain_chroma import Chroma
@@ -21,5 +22,29 @@ class ChromadbClient(VectorDBClient):
     def add_documents(self, documents: List[Document], **kwargs: Any) -> List[str]:
         return self._chroma_db.add_documents(documents, **kwargs)
 
+    def add_embedded_documents(
+        self, documents: List[Document], embeddings: List[List[float]], ids: List[str] | None = None
+    ) -> List[str]:
+        """Add documents whose embeddings were computed beforehand.
+
+        Documents added again with the same `ids` replace the previous ones.
+        """
+        if len(documents) != len(embeddings):
+            raise ValueError(f"Got {len(documents)} documents but {len(embeddings)} embeddings")
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in documents]
+        self._chroma_db._collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata or None for doc in documents],
+        )
+        return ids
+
+    def delete_papers(self, paper_ids: List[str]) -> None:
+        """Delete all the chunks of the given papers."""
+        if paper_ids:
+            self._chroma_db._collection.delete(where={"paper_id": {"$in": paper_ids}})
+
     def __getattr__(self, name):
         return getattr(self._chroma_db, name)
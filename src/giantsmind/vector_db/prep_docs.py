@@ -1,18 +1,105 @@
-from typing import List, Sequence
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Executor
+from functools import lru_cache, partial
+from typing import Iterable, Iterator, List, Sequence
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents.base import Document
 
+from giantsmind.core import config
+from giantsmind.core.markdown_loader import markdown_outline
 
-def chunk_document(document: Document, chunk_size: int = 4096, chunk_overlap: int = 256) -> List[Document]:
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    return text_splitter.split_documents([document])
+# Outline metadata of loaded documents, lists that vector stores do not accept as chunk metadata
+_OUTLINE_KEYS = ("pages", "headings")
+
+
+@lru_cache(maxsize=None)
+def get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """One splitter per configuration and process, reused for every document."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+    )
+
+
+def chunk_document(
+    document: Document, chunk_size: int = config.CHUNK_SIZE, chunk_overlap: int = config.CHUNK_OVERLAP
+) -> List[Document]:
+    """Split a document into chunks that know where they come from.
+
+    Each chunk's metadata holds its `start_index` and `end_index` in the document's
+    text, and the `page` and `section` (title of the last heading) its start falls in
+    when the document has page markers or headings.
+    """
+    metadata = {key: value for key, value in document.metadata.items() if key not in _OUTLINE_KEYS}
+    if all(key in document.metadata for key in _OUTLINE_KEYS):
+        pages, headings = document.metadata["pages"], document.metadata["headings"]
+    else:
+        pages, headings = markdown_outline(document.page_content)
+    page_offsets = [offset for _, offset in pages]
+    heading_offsets = [offset for _, _, offset in headings]
+
+    chunks = get_splitter(chunk_size, chunk_overlap).split_documents(
+        [Document(page_content=document.page_content, metadata=metadata)]
+    )
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        chunk.metadata["end_index"] = start + len(chunk.page_content)
+        i_page = bisect_right(page_offsets, start) - 1
+        if i_page >= 0:
+            chunk.metadata["page"] = pages[i_page][0]
+        i_heading = bisect_right(heading_offsets, start) - 1
+        if i_heading >= 0:
+            chunk.metadata["section"] = headings[i_heading][1]
+    return chunks
+
+
+def _chunk_or_error(document: Document, chunk_size: int, chunk_overlap: int) -> List[Document] | Exception:
+    try:
+        return chunk_document(document, chunk_size, chunk_overlap)
+    except Exception as e:
+        return e
+
+
+def iter_chunked_documents(
+    documents: Iterable[Document],
+    chunk_size: int = config.CHUNK_SIZE,
+    chunk_overlap: int = config.CHUNK_OVERLAP,
+    executor: Executor | None = None,
+    max_pending: int = 16,
+    return_exceptions: bool = False,
+) -> Iterator[List[Document] | Exception]:
+    """Chunks of each document, in order, yielded as soon as they are ready.
+
+    With an executor, e.g. a process pool, up to `max_pending` documents are split in
+    parallel while the chunks of earlier ones are consumed, and documents are only
+    read from `documents` as workers free up. With `return_exceptions`, the error of a
+    document that fails to split is yielded in place of its chunks instead of raised.
+    """
+    split = partial(
+        _chunk_or_error if return_exceptions else chunk_document,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+    if executor is None:
+        yield from map(split, documents)
+        return
+    pending = deque()
+    for document in documents:
+        pending.append(executor.submit(split, document))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
 
 def chunk_documents(
-    documents: Sequence[Document], chunk_size: int = 4096, chunk_overlap: int = 256
+    documents: Sequence[Document],
+    chunk_size: int = config.CHUNK_SIZE,
+    chunk_overlap: int = config.CHUNK_OVERLAP,
+    executor: Executor | None = None,
 ) -> List[List[Document]]:
-    return [chunk_document(doc, chunk_size, chunk_overlap) for doc in documents]
+    return list(iter_chunked_documents(documents, chunk_size, chunk_overlap, executor))
 
 
 def add_metadata_to_documents(metadata: dict, documents: List[Document]) -> List[Document]:
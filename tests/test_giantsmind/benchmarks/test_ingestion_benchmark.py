@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from giantsmind.benchmarks import ingestion, markdown_loading, synthetic
+from giantsmind.benchmarks.stand_ins import StandInServices
+from giantsmind.core import get_metadata
+from giantsmind.core.metadata_cache import MetadataCache
+from giantsmind.core.metadata_client import MetadataClient
+from giantsmind.core.parse_scheduler import ParseScheduler, create_parser
+
+
+def test_synthetic_papers_resolve_through_the_stand_ins(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLAMA_API_KEY", "test")
+    monkeypatch.delenv("LLAMA_CLOUD_BASE_URL", raising=False)
+    papers = synthetic.generate_corpus(tmp_path / "corpus", 2, workers=1)
+    paths = [str(tmp_path / "corpus" / paper.file_name) for paper in papers]
+    assert synthetic.load_corpus(tmp_path / "corpus") == (papers, 0)
+
+    async def ingest(services):
+        parser = create_parser("instruction", base_url=services.url)
+        parser.check_interval = 0.01
+        scheduler = ParseScheduler("instruction", parser=parser, rate_per_minute=6000)
+        cache = MetadataCache(tmp_path / "cache.db")
+        async with MetadataClient(services.crossref_url, services.arxiv_url, cache=cache) as client:
+            metadatas = [await client.resolve(get_metadata.extract_local_metadata(path)) for path in paths]
+        documents = await scheduler.parse_many(paths)
+        await scheduler.aclose()
+        return metadatas, documents
+
+    with StandInServices(papers) as services:
+        metadatas, documents = asyncio.run(ingest(services))
+    assert [m["paper_id"] for m in metadatas] == [f"doi:{papers[0].doi}", f"arXiv:{papers[1].arxiv_id}v1"]
+    assert all(not get_metadata.get_missing_fields(metadata) for metadata in metadatas)
+    assert [d[0].text for d in documents] == [synthetic.paper_markdown(paper) for paper in papers]
+    assert services.requests == {"crossref": 1, "arxiv": 1, "llamaparse": 2}
+
+
+def test_compare_to_baseline_reports_regressions():
+    stages = [ingestion.StageReport("parse", 10, 5.0, 0.2, 0.3)]
+    baseline = ingestion.BenchmarkReport(10, 10, 0, 2.0, 100.0, stages).to_dict()
+    assert (
+        ingestion.compare_to_baseline(ingestion.BenchmarkReport(10, 10, 0, 2.2, 110.0, stages), baseline)
+        == []
+    )
+    slower = [ingestion.StageReport("parse", 10, 2.0, 0.4, 0.6)]
+    regressions = ingestion.compare_to_baseline(
+        ingestion.BenchmarkReport(10, 9, 1, 4.0, 200.0, slower), baseline
+    )
+    assert len(regressions) == 4
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("n_papers", ingestion.SCALES)
+def test_ingestion_benchmark(n_papers):
+    report = ingestion.run_benchmark(n_papers)
+    print(report.summary())
+    assert report.failed == 0
+    baseline = ingestion.load_baselines().get(str(n_papers))
+    if baseline is None:
+        pytest.skip(
+            f"No baseline for {n_papers} papers, record one with `giantsmind --benchmark --save-baseline`"
+        )
+    assert ingestion.compare_to_baseline(report, baseline) == []
+
+
+@pytest.mark.benchmark
+def test_markdown_loading_benchmark(tmp_path):
+    reports = {
+        report.loader: report
+        for report in markdown_loading.benchmark_loaders(markdown_loading.N_FILES, tmp_path)
+    }
+    for report in reports.values():
+        print(report.summary())
+    if "unstructured" in reports:
+        assert reports["native"].elapsed < reports["unstructured"].elapsed
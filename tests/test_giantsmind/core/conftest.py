@@ -0,0 +1,118 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pytest
+
+from giantsmind.core import metadata_cache, metadata_store
+
+ARXIV_ID = re.compile(r"\d{4}\.\d{4,5}(v\d+)?")
+
+ATOM_ENTRY = """<entry>
+    <id>http://arxiv.org/abs/{arxiv_id}v1</id>
+    <published>2021-01-04T12:00:00Z</published>
+    <title>Paper {arxiv_id}
+      on arXiv</title>
+    <author><name>Ada Lovelace</name></author>
+    <author><name>Alan Turing</name></author>
+</entry>"""
+
+
+def crossref_message(doi: str) -> dict:
+    return {
+        "title": [f"Paper {doi}"],
+        "author": [{"given": "Jane", "family": "Doe"}],
+        "URL": f"https://doi.org/{doi}",
+        "container-title": ["Journal of Tests"],
+        "published": {"date-parts": [[2020, 5, 17]]},
+    }
+
+
+class StandInMetadataServer(ThreadingHTTPServer):
+    """Local stand-in for the CrossRef works API and the arXiv Atom API."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, dois, arxiv_ids, delay=0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.dois = set(dois)
+        self.arxiv_ids = set(arxiv_ids)
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients giving up on slow responses are expected in timeout tests
+        pass
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        with server.lock:
+            server.requests.append((time.monotonic(), url.path, url.query))
+        time.sleep(server.delay)
+        if url.path.startswith("/works/"):
+            doi = unquote(url.path[len("/works/") :])
+            if doi not in server.dois:
+                return self._send(404, b"Resource not found.", "text/plain")
+            body = json.dumps({"status": "ok", "message": crossref_message(doi)}).encode()
+            return self._send(200, body, "application/json")
+        if url.path == "/api/query":
+            ids = parse_qs(url.query).get("id_list", [""])[0].split(",")
+            if not all(ARXIV_ID.fullmatch(i) for i in ids):
+                return self._send(400, b"incorrect id format", "text/plain")
+            entries = "".join(ATOM_ENTRY.format(arxiv_id=i) for i in ids if i in server.arxiv_ids)
+            body = f'<feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'.encode()
+            return self._send(200, body, "application/atom+xml")
+        self._send(404, b"", "text/plain")
+
+
+@pytest.fixture(autouse=True)
+def metadata_cache_path(tmp_path, monkeypatch):
+    """Keep cached metadata lookups out of the user's data folder and between tests."""
+    path = tmp_path / "metadata_cache.db"
+    monkeypatch.setattr(metadata_cache, "DEFAULT_CACHE_PATH", path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def metadata_store_path(tmp_path, monkeypatch):
+    """Keep saved metadata out of the user's data folder and between tests."""
+    path = tmp_path / "metadata.db"
+    monkeypatch.setattr(metadata_store, "DEFAULT_STORE_PATH", path)
+    monkeypatch.setattr(metadata_store, "_shared_stores", {})
+    return path
+
+
+@pytest.fixture
+def metadata_server():
+    server = StandInMetadataServer(
+        dois=[f"10.1000/paper{i}" for i in range(50)], arxiv_ids=[f"2101.{i:05d}" for i in range(50)]
+    )
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,45 @@
+from giantsmind.core.artifact_store import ArtifactStore, fan_out
+from giantsmind.core.parse_cache import ParseCache, cache_key
+from giantsmind.scripts.migrate_parsed_docs import migrate_parsed_docs
+from giantsmind.utils.hash_index import FileHashIndex
+
+KEY = "ab" + "c" * 62
+
+
+def test_artifacts_are_indexed_by_hash_and_paper_id(tmp_path):
+    store = ArtifactStore(tmp_path / "artifacts")
+    path = store.path(KEY, ".md")
+    assert path == store.folder / "ab" / "cc" / f"{KEY}.md"
+
+    store.record(path, "f" * 64, "doi:10.1000/a")
+    # Recording again without a paper ID keeps the known one
+    store.record(path, "f" * 64)
+    assert store.paths_for_hash("f" * 64) == [path]
+    assert store.paths_for_paper("doi:10.1000/a") == [path]
+    assert store.paths_for_paper("doi:10.1000/b") == []
+
+
+def test_migration_moves_flat_documents_and_indexes_them(tmp_path, monkeypatch):
+    from giantsmind.core import get_metadata
+
+    pdf = tmp_path / "paper.pdf"
+    pdf.write_bytes(b"paper")
+    folder = tmp_path / "parsed_docs"
+    hash_index = FileHashIndex(tmp_path / "index.db")
+    cache = ParseCache(folder=folder, hash_index=hash_index)
+    key = cache.keys([pdf])[0]
+    (folder / f"{key}.md").write_text("# Parsed")
+    (folder / f"{key}.md.sha256").write_text(f"digest  {key}.md\n")
+    (folder / "legacy.md").write_text("# Legacy")
+    # Documents stored flat are still found before the migration
+    assert cache.markdown_path(pdf) == folder / f"{key}.md"
+
+    monkeypatch.setattr(get_metadata, "load_saved_metadatas", lambda paths: [{"paper_id": "doi:10.1000/a"}])
+    assert migrate_parsed_docs(folder, hash_index) == 0
+    moved = folder / fan_out(key) / f"{key}.md"
+    assert cache.markdown_path(pdf) == moved
+    assert moved.with_name(f"{key}.md.sha256").exists()
+    assert (folder / "legacy.md").exists()
+    assert cache.store.paths_for_paper("doi:10.1000/a") == [moved]
+    assert cache.store.paths_for_hash(hash_index.get_hash(pdf)) == [moved]
+    assert key == cache_key(hash_index.get_hash(pdf), cache.instruction)
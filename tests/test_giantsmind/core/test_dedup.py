@@ -0,0 +1,68 @@
+import random
+
+from giantsmind.core.dedup import (
+    Deduplicator,
+    identifier_key,
+    local_identifiers,
+    paper_id_key,
+    similarity,
+    text_fingerprint,
+)
+
+rng = random.Random(0)
+VOCABULARY = [f"word{chr(97 + i)}{chr(97 + j)}" for i in range(26) for j in range(26)]
+FIRST_PAGE = " ".join(rng.choice(VOCABULARY) for _ in range(300))
+OTHER_PAGE = " ".join(rng.choice(VOCABULARY) for _ in range(300))
+
+
+def test_fingerprints_of_near_copies_are_similar():
+    fingerprint = text_fingerprint(FIRST_PAGE)
+    stamped = text_fingerprint("Downloaded from the library on 2021-03-04. " + FIRST_PAGE.upper())
+    assert similarity(fingerprint, stamped) >= 0.8
+    assert similarity(fingerprint, text_fingerprint(OTHER_PAGE)) < 0.2
+    assert text_fingerprint("Too short to tell") is None
+
+
+def test_identifier_keys_match_paper_ids():
+    assert identifier_key("doi", "https://doi.org/10.1000/ABC") == paper_id_key("doi:10.1000/abc")
+    assert identifier_key("arxiv", "arXiv:2101.00001v2") == paper_id_key("arXiv:2101.00001v1")
+    assert paper_id_key("sha256:abc") == "sha256:abc"
+    assert local_identifiers(["10.1000/a", "10.1000/b"], []) == ["doi:10.1000/a"]
+
+
+def test_first_pages_do_not_match_papers_with_different_identifiers():
+    dedup = Deduplicator()
+    cover = text_fingerprint(FIRST_PAGE)
+    assert dedup.check_paper("a.pdf", ["doi:10.1/aaa"], cover) is None
+    assert dedup.check_paper("b.pdf", ["doi:10.1/bbb"], cover) is None
+    assert dedup.check_paper("c.pdf", ["doi:10.1/bbb", "arxiv:2101.00001"], cover) == "b.pdf"
+    # An identifier of another kind does not conflict
+    assert dedup.check_paper("a preprint.pdf", ["arxiv:2101.00002"], cover) == "a.pdf"
+    assert [duplicate.reason for duplicate in dedup.duplicates] == ["identifier", "first page"]
+
+
+def test_duplicates_are_spotted_at_each_layer_and_reported():
+    dedup = Deduplicator()
+    assert dedup.check_content("a.pdf", "h1") is None
+    assert dedup.check_content("a.pdf", "h1") is None
+    assert dedup.check_content("a copy.pdf", "h1") == "a.pdf"
+
+    assert dedup.check_paper("a.pdf", ["doi:10.1000/a"], text_fingerprint(FIRST_PAGE)) is None
+    assert dedup.check_paper("a stamped.pdf", [], text_fingerprint("Stamped " + FIRST_PAGE)) == "a.pdf"
+    assert dedup.check_paper("b.pdf", [], text_fingerprint(OTHER_PAGE)) is None
+    assert dedup.check_paper("a published.pdf", ["doi:10.1000/a"]) == "a.pdf"
+    # The paper ID found later is checked again for the PDF kept
+    assert dedup.check_paper("a.pdf", ["doi:10.1000/a"]) is None
+    dedup.set_paper_id("a.pdf", "doi:10.1000/a")
+
+    assert dedup.report() == [
+        {
+            "paper_id": "doi:10.1000/a",
+            "pdf_path": "a.pdf",
+            "duplicates": [
+                {"pdf_path": "a copy.pdf", "reason": "content"},
+                {"pdf_path": "a stamped.pdf", "reason": "first page"},
+                {"pdf_path": "a published.pdf", "reason": "identifier"},
+            ],
+        }
+    ]
@@ -0,0 +1,60 @@
+import pytest
+
+from giantsmind.core.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text)), 0.5, -1.0, 2.0] for text in texts]
+
+    def embed_query(self, text):
+        return [0.0] * 4
+
+
+def test_only_missing_texts_are_embedded(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.db")
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, "model-a", cache)
+
+    vectors = embeddings.embed_documents(["a", "bb", "a"])
+    assert [vector[0] for vector in vectors] == [1.0, 2.0, 1.0]
+    assert embeddings.embed_documents(["bb", "ccc"])[0] == [2.0, 0.5, -1.0, 2.0]
+    assert model.embedded == ["a", "bb", "ccc"]
+    # Vectors are cached per model
+    assert cache.get_many("model-b", ["a"]) == [None]
+
+
+def test_float16_vectors_and_least_recently_used_eviction(tmp_path):
+    clock = iter(range(100))
+    cache = EmbeddingCache(tmp_path / "cache.db", dtype="float16", max_bytes=16, clock=lambda: next(clock))
+    cache.put_many("m", ["a", "b"], [[0.1, 0.2, 0.3, 0.4], [1.0, 2.0, 3.0, 4.0]])
+    assert cache.size_bytes() == 16
+    assert cache.get_many("m", ["a"])[0] == pytest.approx([0.1, 0.2, 0.3, 0.4], abs=1e-3)
+
+    cache.put_many("m", ["c"], [[5.0, 6.0, 7.0, 8.0]])
+    assert cache.get_many("m", ["a", "b", "c"]) == [
+        pytest.approx([0.1, 0.2, 0.3, 0.4], abs=1e-3),
+        None,
+        [5, 6, 7, 8],
+    ]
+    assert len(cache) == 2
+    with pytest.raises(ValueError):
+        EmbeddingCache(tmp_path / "other.db", dtype="int8")
+
+
+def test_size_is_tracked_without_scanning_the_cache(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.db", max_bytes=40)
+    cache.put_many("m", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    cache.put_many("m", ["a"], [[1.0, 2.0, 3.0]])
+    cache.put_many("m", ["c", "d"], [[5.0] * 4, [6.0] * 4])
+    with cache._transaction() as conn:
+        (total,) = conn.execute("SELECT SUM(LENGTH(vector)) FROM embeddings").fetchone()
+    assert cache.size_bytes() == total <= 40
+    # The size is found again when a cache is opened
+    assert EmbeddingCache(tmp_path / "cache.db").size_bytes() == total
+    cache.clear()
+    assert cache.size_bytes() == 0
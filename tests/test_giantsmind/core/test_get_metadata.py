@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from giantsmind.core import get_metadata as gm
+
+
+def make_pdf(path, pages_text, subject=""):
+    document = fitz.open()
+    for text in pages_text:
+        page = document.new_page()
+        page.insert_text((72, 72), text)
+    document.set_metadata({"title": "Embedded title", "author": "Jane Doe", "subject": subject})
+    document.save(path)
+    document.close()
+    return str(path)
+
+
+def test_extract_local_metadata_opens_pdf_once(tmp_path):
+    pdf_path = make_pdf(tmp_path / "paper.pdf", ["Intro", "doi: 10.1234/abcd.5678.", "arXiv:2101.00001v2"])
+    with patch("giantsmind.core.get_metadata.fitz.open", wraps=fitz.open) as mock_open:
+        info = gm.extract_local_metadata(pdf_path)
+    assert mock_open.call_count == 1
+    assert info.pdf_metadata["title"] == "Embedded title"
+    assert info.doi_candidates[0] == "10.1234/abcd.5678"
+    assert info.arxiv_candidates == ["2101.00001v2"]
+
+
+def test_subject_identifiers_come_first(tmp_path):
+    pdf_path = make_pdf(tmp_path / "paper.pdf", ["doi 10.1111/page"], subject="Journal doi:10.2222/subject")
+    info = gm.extract_local_metadata(pdf_path)
+    assert info.doi_candidates[:2] == ["10.2222/subject", "10.1111/page"]
+
+
+def test_resolve_metadata_falls_back_to_arxiv_then_pdf():
+    info = gm.LocalPdfInfo("paper.pdf", {"title": "T", "subject": "S"}, ["10.1/x"], ["2101.00001"])
+    with patch.object(gm, "fetch_metadata_from_doi", return_value={}), patch.object(
+        gm, "fetch_metadata_from_arxiv", return_value={"paper_id": "arXiv:2101.00001"}
+    ):
+        assert gm.resolve_metadata(info) == {"paper_id": "arXiv:2101.00001"}
+    with patch.object(gm, "fetch_metadata_from_doi", return_value={}), patch.object(
+        gm, "fetch_metadata_from_arxiv", return_value={}
+    ):
+        assert gm.resolve_metadata(info) == {"title": "T"}
+
+
+@pytest.mark.parametrize("n_files", [1, 4])
+def test_fetch_metadatas_keeps_input_order(tmp_path, n_files):
+    paths = [make_pdf(tmp_path / f"p{i}.pdf", [f"doi 10.1000/paper{i}"]) for i in range(n_files)]
+    paths.append(str(tmp_path / "missing.pdf"))
+
+    def fake_fetch(doi, verbose=False):
+        return {"paper_id": f"doi:{doi}"}
+
+    async def fake_async_fetch(self, doi):
+        return fake_fetch(doi)
+
+    with patch.object(gm, "fetch_metadata_from_doi", side_effect=fake_fetch), patch(
+        "giantsmind.core.metadata_client.MetadataClient.fetch_doi", fake_async_fetch
+    ):
+        metadatas = gm.fetch_metadatas(paths, process_workers=2)
+    expected = [f"doi:10.1000/paper{i}" for i in range(n_files)] + [None]
+    assert [m.get("paper_id") for m in metadatas] == expected
+
+
+def test_edit_pdf_metadata_appends_an_incremental_update(tmp_path):
+    pdf_path = make_pdf(tmp_path / "paper.pdf", ["page 1", "page 2"])
+    original = (tmp_path / "paper.pdf").read_bytes()
+    info = {"title": "New title", "author": "A; B", "subject": "J (2020) ID: doi:10.1/x"}
+    assert gm.edit_pdf_metadata(pdf_path, pdf_path, info)
+    assert (tmp_path / "paper.pdf").read_bytes().startswith(original)
+    with fitz.open(pdf_path) as document:
+        assert {key: document.metadata[key] for key in info} == info
+        assert document.page_count == 2
+    assert not gm.edit_pdf_metadata(pdf_path, pdf_path, info)
+
+
+def test_stamped_pdf_keeps_its_hash(tmp_path):
+    from giantsmind.utils.hash_index import FileHashIndex
+
+    pdf_path = make_pdf(tmp_path / "paper.pdf", ["page 1"])
+    index = FileHashIndex(tmp_path / "index.db")
+    sha256 = index.get_hash(pdf_path)
+    metadata = {
+        "title": "T",
+        "authors": ["A", "B"],
+        "journal": "J",
+        "publication_date": "2020",
+        "paper_id": "doi:10.1234/abcd",
+    }
+    assert gm.stamp_pdf_metadata(pdf_path, metadata, index)
+    assert index.get_hash(pdf_path) == sha256
+    assert gm.extract_local_metadata(pdf_path).doi_candidates[0] == "10.1234/abcd"
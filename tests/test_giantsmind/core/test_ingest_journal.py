@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents.base import Document
+
+from giantsmind.core import parse_documents
+from giantsmind.core.ingest_journal import IngestJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return IngestJournal(tmp_path / "journal.db")
+
+
+def test_stages_are_recorded_and_resumed(tmp_path, journal):
+    entry = journal.start("a.pdf", "hash-a")
+    assert entry.stage == "hashed" and not entry.reached("metadata")
+    journal.advance("a.pdf", "metadata", metadata={"title": "A"})
+    journal.advance("a.pdf", "parsed")
+
+    entry = IngestJournal(tmp_path / "journal.db").start("a.pdf", "hash-a")
+    assert entry.stage == "parsed"
+    assert entry.metadata == {"title": "A"}
+    assert entry.reached("metadata") and not entry.reached("chunked")
+
+
+def test_changed_pdf_starts_over(journal):
+    journal.start("a.pdf", "hash-a")
+    journal.advance("a.pdf", "metadata", metadata={"title": "A"})
+    journal.save_chunks("a.pdf", [Document(page_content="text")])
+    entry = journal.start("a.pdf", "hash-b")
+    assert entry.stage == "hashed"
+    assert journal.get("a.pdf").metadata is None
+    assert journal.load_chunks("a.pdf") is None
+
+
+def test_payloads_are_kept_until_commit(journal):
+    journal.start("a.pdf", "hash-a")
+    chunks = [Document(page_content="one", metadata={"paper_id": "p"}), Document(page_content="two")]
+    embeddings = [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
+    journal.save_chunks("a.pdf", chunks)
+    journal.save_embeddings("a.pdf", embeddings)
+    assert journal.get("a.pdf").stage == "embedded"
+    assert [(c.page_content, c.metadata) for c in journal.load_chunks("a.pdf")] == [
+        ("one", {"paper_id": "p"}),
+        ("two", {}),
+    ]
+    assert journal.load_embeddings("a.pdf") == embeddings
+
+    journal.advance("a.pdf", "committed")
+    assert journal.load_chunks("a.pdf") is None
+    assert journal.load_embeddings("a.pdf") is None
+
+
+def test_failures_and_progress(journal):
+    for name in ["a.pdf", "b.pdf", "c.pdf"]:
+        journal.start(name, f"hash-{name}")
+    journal.advance("a.pdf", "committed")
+    journal.fail("b.pdf", "parse", RuntimeError("server error"))
+    entry = journal.get("b.pdf")
+    assert (entry.stage, entry.failed_stage, entry.error) == ("hashed", "parse", "server error")
+    assert journal.progress()["committed"] == 1
+    assert journal.progress()["hashed"] == 2
+    assert journal.progress()["failed"] == 1
+    assert "Committed 1 papers this run" in journal.report(since=0)
+
+    journal.advance("b.pdf", "metadata")
+    assert journal.get("b.pdf").failed_stage is None
+
+
+def test_parsed_file_is_replaced_atomically(tmp_path):
+    output_path = tmp_path / "doc.md"
+    output_path.write_text("stale partial content")
+    parse_documents.write_single_parsed_file(
+        [SimpleNamespace(text="page 1"), SimpleNamespace(text="page 2")], output_path
+    )
+    assert output_path.read_text() == "page 1\npage 2\n"
+
+    class FailingPages:
+        def __iter__(self):
+            yield SimpleNamespace(text="page 1")
+            raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        parse_documents.write_single_parsed_file(FailingPages(), output_path)
+    assert output_path.read_text() == "page 1\npage 2\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["doc.md", "doc.md.sha256"]
+
+
+def test_forget_and_paths_for_paper(journal):
+    journal.start("a.pdf", "hash")
+    journal.start("copy-of-a.pdf", "hash")
+    journal.advance("a.pdf", "metadata", metadata={"paper_id": "doi:10.1000/a"})
+    journal.advance("copy-of-a.pdf", "metadata", metadata={"paper_id": "doi:10.1000/a"})
+    assert sorted(journal.paths_for_paper("doi:10.1000/a")) == ["a.pdf", "copy-of-a.pdf"]
+    journal.forget("a.pdf")
+    assert journal.get("a.pdf") is None
+    assert journal.paths() == ["copy-of-a.pdf"]
+    assert journal.paths_for_paper("doi:10.1000/a") == ["copy-of-a.pdf"]
@@ -0,0 +1,96 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from giantsmind.core.instrumentation import ProgressDisplay, RunMetrics, percentile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_measure_counts_durations_bytes_and_errors():
+    clock = FakeClock()
+    metrics = RunMetrics(clock=clock)
+    with metrics.measure("hash", 100):
+        clock.now += 2.0
+    with metrics.measure("hash") as measurement:
+        clock.now += 1.0
+        measurement.bytes = 300
+    with pytest.raises(ValueError):
+        with metrics.measure("hash"):
+            clock.now += 1.0
+            raise ValueError("unreadable")
+    metrics.skip("hash")
+
+    step = metrics.report()["steps"]["hash"]
+    assert (step["count"], step["errors"], step["skipped"], step["bytes"]) == (3, 1, 1, 400)
+    assert step["seconds"] == 4.0
+    assert step["error_rate"] == pytest.approx(1 / 3)
+    assert step["mb_per_second"] == pytest.approx(400 / 1e6 / 4)
+
+
+def test_measure_iterable_times_each_item():
+    clock = FakeClock()
+    metrics = RunMetrics(clock=clock)
+
+    def slow_walk():
+        for size in (10, 20):
+            clock.now += 0.5
+            yield size
+
+    assert list(metrics.measure_iterable("scan", slow_walk(), size=lambda size: size)) == [10, 20]
+    step = metrics.report()["steps"]["scan"]
+    assert (step["count"], step["bytes"], step["seconds"]) == (2, 30, 1.0)
+
+
+def test_report_tells_which_resource_bound_the_run(tmp_path):
+    clock = FakeClock()
+    metrics = RunMetrics({"parse": "cpu"}, clock=clock)
+    for step, seconds in [("lookup", 3.0), ("parse", 2.0), ("chunk", 2.0), ("hash", 1.0)]:
+        metrics.record(step, seconds)
+
+    report = metrics.report()
+    assert report["steps"]["parse"]["resource"] == "cpu"
+    assert report["busy_seconds"] == {"network": 3.0, "cpu": 4.0, "disk": 1.0}
+    assert report["bound_by"] == "cpu"
+
+    path = metrics.write_report(tmp_path, ingested=4)
+    written = json.loads(path.read_text())
+    assert written["ingested"] == 4
+    assert written["bound_by"] == "cpu"
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile(range(1, 101), 95) == 95
+
+
+class FakeTerminal(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def test_progress_display_only_draws_on_a_terminal():
+    async def run(stream, enabled=True):
+        metrics = RunMetrics()
+        async with ProgressDisplay(metrics, stream, interval=0.01, enabled=enabled):
+            metrics.record("parse", 0.1)
+            metrics.record("parse", 0.1, error=True)
+            await asyncio.sleep(0.05)
+
+    terminal, log_file, prompting = FakeTerminal(), io.StringIO(), FakeTerminal()
+    asyncio.run(run(terminal))
+    asyncio.run(run(log_file))
+    asyncio.run(run(prompting, enabled=False))
+    assert prompting.getvalue() == ""
+    assert "parse 2 (1 failed)" in terminal.getvalue()
+    assert terminal.getvalue().endswith("\n")
+    assert log_file.getvalue() == ""
@@ -0,0 +1,95 @@
+import asyncio
+
+import fitz
+import pytest
+
+from giantsmind.core import config
+from giantsmind.core import local_parser as lp
+from giantsmind.core.parser_backend import ParsedPage, create_parser_backend
+
+
+def make_pdf(path, pages):
+    """Write a PDF with one page per list of (text, font size, font name) lines."""
+    document = fitz.open()
+    for lines in pages:
+        page = document.new_page()
+        y = 72
+        for text, size, font in lines:
+            page.insert_text((72, y), text, fontsize=size, fontname=font)
+            y += size * 1.3
+    document.save(path)
+    document.close()
+    return str(path)
+
+
+BODY = [
+    ("The body of the paper is set in a smaller font and it con-", 10, "helv"),
+    ("tinues on the next line of the same paragraph.", 10, "helv"),
+]
+
+
+@pytest.fixture
+def paper_pdf(tmp_path):
+    return make_pdf(
+        tmp_path / "paper.pdf",
+        [
+            [("A Study of Things", 20, "helv"), ("Introduction", 14, "helv")] + BODY,
+            [("Methods", 10, "hebo")] + BODY,
+        ],
+    )
+
+
+def test_pdf_to_markdown_pages_marks_pages_and_headings(paper_pdf):
+    pages = lp.pdf_to_markdown_pages(paper_pdf)
+
+    assert len(pages) == 2
+    assert pages[0].startswith("<!-- page 1 -->\n\n# A Study of Things\n\n## Introduction\n\n")
+    assert pages[1].startswith("<!-- page 2 -->\n\n### Methods\n\n")
+
+
+def test_pdf_to_markdown_pages_joins_hyphenated_lines(paper_pdf):
+    paragraph = lp.pdf_to_markdown_pages(paper_pdf)[0].split("\n\n")[3]
+
+    expected = (
+        "The body of the paper is set in a smaller font and it continues "
+        "on the next line of the same paragraph."
+    )
+    assert paragraph.strip() == expected
+
+
+def test_local_parser_parses_on_process_pool(paper_pdf, tmp_path):
+    other_pdf = make_pdf(tmp_path / "other.pdf", [BODY])
+
+    async def parse():
+        parser = lp.LocalPdfParser(max_workers=2)
+        try:
+            return parser, await parser.parse_many([paper_pdf, other_pdf, str(tmp_path / "missing.pdf")])
+        finally:
+            await parser.aclose()
+
+    parser, (paper, other, missing) = asyncio.run(parse())
+
+    assert [page.page for page in paper] == [1, 2]
+    assert isinstance(other[0], ParsedPage) and other[0].text.startswith("<!-- page 1 -->")
+    assert missing is None
+    assert (parser.stats.parsed, parser.stats.failed) == (2, 1)
+
+
+def test_create_parser_backend(monkeypatch):
+    parser = create_parser_backend("pymupdf", shard_pages=0)
+
+    assert isinstance(parser, lp.LocalPdfParser)
+    sharded = create_parser_backend("pymupdf", shard_pages=10)
+    assert isinstance(sharded.backend, lp.LocalPdfParser)
+    assert sharded.max_retries == config.PARSE_SHARD_RETRIES
+    assert parser.cache_tag != config.PARSE_INSTRUCTIONS
+    # Sharded documents, with page markers only at shard boundaries, are cached apart
+    assert sharded.cache_tag not in (
+        parser.cache_tag,
+        create_parser_backend("pymupdf", shard_pages=20).cache_tag,
+    )
+    # LlamaParse shards are only retried by the scheduler
+    monkeypatch.setenv("LLAMA_API_KEY", "key")
+    assert create_parser_backend("llamaparse", "instruction", shard_pages=10).max_retries == 0
+    with pytest.raises(ValueError):
+        create_parser_backend("unknown")
@@ -0,0 +1,57 @@
+import gzip
+
+import pytest
+
+from giantsmind.core import parse_documents
+from giantsmind.core.markdown_loader import load_markdown_document, markdown_outline
+
+DOCUMENT = """<!-- page 1 -->
+
+# A title
+
+Some text with a #hashtag.
+
+## Methods ##
+
+```python
+# a comment, not a heading
+```
+
+<!-- page 2 -->
+
+### Results
+"""
+
+
+def test_markdown_outline_finds_pages_and_headings():
+    pages, headings = markdown_outline(DOCUMENT)
+    assert [page for page, _ in pages] == [1, 2]
+    assert [(level, title) for level, title, _ in headings] == [
+        (1, "A title"),
+        (2, "Methods"),
+        (3, "Results"),
+    ]
+    for page, offset in pages:
+        assert DOCUMENT[offset:].startswith(f"<!-- page {page} -->")
+    for _, title, offset in headings:
+        assert DOCUMENT[offset:].lstrip("#").strip().startswith(title)
+
+
+@pytest.mark.parametrize("suffix", [".md", ".md.gz"])
+def test_load_markdown_keeps_the_document_as_is(tmp_path, suffix):
+    path = tmp_path / f"paper{suffix}"
+    if suffix.endswith(".gz"):
+        path.write_bytes(gzip.compress(DOCUMENT.encode()))
+    else:
+        path.write_text(DOCUMENT)
+
+    [document] = parse_documents.load_markdown(str(path), loader="native")
+    assert document.page_content == DOCUMENT
+    assert document.metadata["source"] == str(path)
+    assert document.metadata["pages"] == markdown_outline(DOCUMENT)[0]
+    assert load_markdown_document(path).metadata == document.metadata
+
+
+def test_load_markdown_rejects_unknown_loaders(tmp_path):
+    with pytest.raises(ValueError, match="Unknown markdown loader"):
+        parse_documents.load_markdown(str(tmp_path / "paper.md"), loader="pandoc")
@@ -0,0 +1,75 @@
+import pytest
+
+from giantsmind.core.metadata_cache import MetadataCache, normalize_arxiv_id, normalize_doi
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return MetadataCache(tmp_path / "cache.db", ttl=100, negative_ttl=10, max_entries=3, clock=clock)
+
+
+def test_normalization():
+    assert normalize_doi("https://doi.org/10.1000/ABC.") == "10.1000/abc"
+    assert normalize_doi("doi: 10.1000/abc") == "10.1000/abc"
+    assert normalize_arxiv_id("arXiv:2101.00001v2") == "2101.00001v2"
+
+
+def test_hits_misses_and_negative_entries(cache):
+    assert cache.get("doi", "10.1000/a") is None
+    cache.put("doi", "10.1000/A", {"paper_id": "doi:10.1000/A"})
+    cache.put("doi", "10.1000/missing", {})
+    assert cache.get("doi", "doi:10.1000/a") == {"paper_id": "doi:10.1000/A"}
+    assert cache.get("doi", "10.1000/missing") == {}
+    # DOIs and arXiv IDs do not share keys
+    assert cache.get("arxiv", "10.1000/a") is None
+
+
+def test_entries_expire(cache, clock):
+    cache.put_many("arxiv", {"2101.00001": {"title": "T"}, "2101.99999": {}})
+    clock.now += 11
+    assert cache.get_many("arxiv", ["2101.00001", "2101.99999"]) == {"2101.00001": {"title": "T"}}
+    clock.now += 90
+    assert cache.get("arxiv", "2101.00001") is None
+
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    for i in range(3):
+        cache.put("doi", f"10.1000/{i}", {"i": i})
+        clock.now += 1
+    cache.get("doi", "10.1000/0")
+    clock.now += 1
+    cache.put("doi", "10.1000/3", {"i": 3})
+    assert len(cache) == 3
+    assert cache.get("doi", "10.1000/1") is None
+    assert cache.get("doi", "10.1000/0") == {"i": 0}
+
+
+def test_cache_persists(tmp_path, cache, clock):
+    cache.put("doi", "10.1000/a", {"title": "T"})
+    assert MetadataCache(tmp_path / "cache.db", clock=clock).get("doi", "10.1000/a") == {"title": "T"}
+
+
+def test_number_of_entries_is_tracked(tmp_path, cache, clock):
+    cache.put_many("doi", {"10.1000/a": {"i": 0}, "10.1000/b": {}})
+    cache.put("doi", "10.1000/a", {"i": 1})
+    assert len(cache) == 2
+    clock.now += 11
+    cache.put("doi", "10.1000/c", {"i": 2})
+    # The negative entry expired
+    assert len(cache) == 2
+    assert len(MetadataCache(tmp_path / "cache.db", clock=clock)) == 2
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+from giantsmind.core import config
+from giantsmind.core import get_metadata as gm
+from giantsmind.core.get_metadata import LocalPdfInfo
+from giantsmind.core.metadata_client import HostPolicy, MetadataClient
+
+
+def make_client(server, **kwargs):
+    kwargs.setdefault("arxiv_policy", HostPolicy(max_concurrency=1, min_interval=0.01))
+    kwargs.setdefault("arxiv_batch_linger", 0.01)
+    return MetadataClient(crossref_url=server.url, arxiv_url=f"{server.url}/api/query", **kwargs)
+
+
+def arxiv_queries(server):
+    return [
+        parse_qs(query)["id_list"][0].split(",") for _, path, query in server.requests if path == "/api/query"
+    ]
+
+
+def run(coroutine_fn, client):
+    async def main():
+        async with client:
+            return await coroutine_fn(client)
+
+    return asyncio.run(main())
+
+
+def test_fetch_doi(metadata_server):
+    metadata = run(lambda c: c.fetch_doi("10.1000/paper1"), make_client(metadata_server))
+    assert metadata == {
+        "title": "Paper 10.1000/paper1",
+        "authors": ["Jane Doe"],
+        "url": "https://doi.org/10.1000/paper1",
+        "journal": "Journal of Tests",
+        "publication_date": "2020-05-17",
+        "paper_id": "doi:10.1000/paper1",
+    }
+
+
+def test_unknown_doi_returns_empty_metadata(metadata_server):
+    assert run(lambda c: c.fetch_doi("10.9999/unknown"), make_client(metadata_server)) == {}
+
+
+def test_fetch_arxiv(metadata_server):
+    metadata = run(lambda c: c.fetch_arxiv("2101.00003"), make_client(metadata_server))
+    assert metadata["title"] == "Paper 2101.00003 on arXiv"
+    assert metadata["authors"] == ["Ada Lovelace", "Alan Turing"]
+    assert metadata["publication_date"] == "2021-01-04"
+    assert metadata["paper_id"] == "arXiv:2101.00003"
+
+
+def test_dois_are_fetched_concurrently(metadata_server):
+    metadata_server.delay = 0.1
+    client = make_client(metadata_server, crossref_policy=HostPolicy(max_concurrency=20))
+    start = time.monotonic()
+    results = run(lambda c: c.fetch_dois([f"10.1000/paper{i}" for i in range(20)]), client)
+    assert all(results)
+    assert time.monotonic() - start < 1.0
+
+
+def test_arxiv_requests_are_spaced(metadata_server):
+    client = make_client(
+        metadata_server, arxiv_policy=HostPolicy(max_concurrency=1, min_interval=0.1), arxiv_batch_size=1
+    )
+
+    async def fetch_three(c):
+        return await asyncio.gather(*[c.fetch_arxiv(f"2101.0000{i}") for i in range(3)])
+
+    assert all(run(fetch_three, client))
+    starts = [t for t, path, _ in metadata_server.requests if path == "/api/query"]
+    assert all(later - earlier >= 0.09 for earlier, later in zip(starts, starts[1:]))
+
+
+def test_resolve_tries_doi_then_arxiv_then_pdf(metadata_server):
+    infos = [
+        LocalPdfInfo("a.pdf", {"title": "A"}, ["10.9999/unknown", "10.1000/paper2"], ["2101.00001"]),
+        LocalPdfInfo("b.pdf", {"title": "B"}, ["10.9999/unknown"], ["2101.00001"]),
+        LocalPdfInfo("c.pdf", {"title": "C", "subject": "S"}, [], []),
+    ]
+
+    async def resolve_all(c):
+        return [await c.resolve(info) for info in infos]
+
+    results = run(resolve_all, make_client(metadata_server))
+    assert [r.get("paper_id") for r in results] == ["doi:10.1000/paper2", "arXiv:2101.00001", None]
+    assert results[2] == {"title": "C"}
+
+
+def test_timeout_returns_empty_metadata(metadata_server):
+    metadata_server.delay = 0.5
+    client = make_client(metadata_server, timeout=0.1)
+    assert run(lambda c: c.fetch_doi("10.1000/paper1"), client) == {}
+
+
+def test_concurrent_arxiv_lookups_share_one_query(metadata_server):
+    arxiv_ids = [f"2101.{i:05d}" for i in range(20)]
+    metadatas = run(lambda c: c.fetch_arxiv_many(arxiv_ids + ["2101.99999"]), make_client(metadata_server))
+    assert sorted(metadatas) == arxiv_ids
+    assert metadatas["2101.00007"]["paper_id"] == "arXiv:2101.00007"
+    assert len(arxiv_queries(metadata_server)) == 1
+
+
+def test_arxiv_queries_are_chunked(metadata_server):
+    arxiv_ids = [f"2101.{i:05d}" for i in range(20)]
+    metadatas = run(lambda c: c.fetch_arxiv_many(arxiv_ids), make_client(metadata_server, arxiv_batch_size=8))
+    assert len(metadatas) == 20
+    assert [len(ids) for ids in arxiv_queries(metadata_server)] == [8, 8, 4]
+
+
+def test_rejected_arxiv_query_is_retried_one_id_at_a_time(metadata_server):
+    arxiv_ids = ["2101.00001", "not-an-id", "2101.00002"]
+    metadatas = run(lambda c: c.fetch_arxiv_many(arxiv_ids), make_client(metadata_server))
+    assert sorted(metadatas) == ["2101.00001", "2101.00002"]
+    assert len(arxiv_queries(metadata_server)) == 4
+
+
+def test_sync_arxiv_batch_fetch(metadata_server, monkeypatch):
+    monkeypatch.setattr(config, "ARXIV_API_URL", f"{metadata_server.url}/api/query")
+    monkeypatch.setattr(config, "ARXIV_MIN_INTERVAL", 0.0)
+    arxiv_ids = [f"2101.{i:05d}" for i in range(5)] + ["2101.99999"]
+    metadatas = gm.fetch_metadatas_from_arxiv(arxiv_ids, batch_size=4)
+    assert sorted(metadatas) == arxiv_ids[:5]
+    assert [len(ids) for ids in arxiv_queries(metadata_server)] == [4, 2]
+    assert gm.fetch_metadata_from_arxiv("2101.00003")["title"] == "Paper 2101.00003 on arXiv"
+
+
+def test_lookups_are_cached(metadata_server):
+    async def fetch_twice(c):
+        first = [await c.fetch_doi("10.1000/paper1"), await c.fetch_doi("10.9999/unknown")]
+        first.append(await c.fetch_arxiv("2101.00001"))
+        second = [await c.fetch_doi("10.1000/PAPER1"), await c.fetch_doi("10.9999/unknown")]
+        second.append(await c.fetch_arxiv("2101.00001"))
+        return first, second
+
+    first, second = run(fetch_twice, make_client(metadata_server))
+    assert first == second
+    assert len(metadata_server.requests) == 3
+
+
+def test_failed_requests_are_not_cached(metadata_server):
+    metadata_server.delay = 0.5
+    assert run(lambda c: c.fetch_doi("10.1000/paper1"), make_client(metadata_server, timeout=0.1)) == {}
+    metadata_server.delay = 0.0
+    assert run(lambda c: c.fetch_doi("10.1000/paper1"), make_client(metadata_server))
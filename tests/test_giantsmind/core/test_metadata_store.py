@@ -0,0 +1,89 @@
+import json
+
+from giantsmind.core.metadata_store import MetadataStore
+from giantsmind.utils.hash_index import FileHashIndex
+
+
+def test_latest_metadata_wins_and_is_read_in_bulk(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    store.save_many([{"title": "First"}, {"title": "B"}], [tmp_path / "a.pdf", tmp_path / "b.pdf"])
+    store.save(tmp_path / "a.pdf", {"title": "A"})
+
+    paths = [tmp_path / "a.pdf", tmp_path / "missing.pdf", tmp_path / "b.pdf"]
+    assert store.get_many(paths) == [{"title": "A"}, None, {"title": "B"}]
+    assert store.exists(paths) == [True, False, True]
+    assert store.all() == [{"title": "B"}, {"title": "A"}]
+    assert len(store) == 2
+
+
+def test_moved_pdfs_are_found_by_content_hash(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db", FileHashIndex(tmp_path / "index.db"))
+    original = tmp_path / "a.pdf"
+    original.write_bytes(b"%PDF a")
+    store.save(original, {"title": "A", "file_path": str(original)})
+
+    moved = tmp_path / "folder" / "renamed.pdf"
+    moved.parent.mkdir()
+    original.rename(moved)
+    assert store.get(moved) == {"title": "A", "file_path": str(moved)}
+    assert store.get(tmp_path / "other.pdf", sha256="0" * 64) is None
+
+
+def test_pdfs_saved_again_after_a_move_are_listed_once(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    store.save(tmp_path / "a.pdf", {"title": "A", "file_path": "a.pdf"}, sha256="a" * 64)
+    store.save_many(
+        [{"title": "No hash"}, {"title": "No hash either"}],
+        [tmp_path / "c.pdf", tmp_path / "d.pdf"],
+        [None, None],
+    )
+    store.save(tmp_path / "renamed.pdf", {"title": "A", "file_path": "renamed.pdf"}, sha256="a" * 64)
+
+    assert store.all() == [
+        {"title": "No hash"},
+        {"title": "No hash either"},
+        {"title": "A", "file_path": "renamed.pdf"},
+    ]
+    assert len(store) == 3
+
+
+def test_sidecars_are_migrated_once(tmp_path):
+    sidecars = tmp_path / "parsed_docs"
+    sidecars.mkdir()
+    (sidecars / "a.json").write_text(json.dumps({"title": "A", "file_path": str(tmp_path / "a.pdf")}))
+    (sidecars / "no_path.json").write_text(json.dumps({"title": "No path"}))
+    (sidecars / "broken.json").write_text("{")
+    store = MetadataStore(tmp_path / "metadata.db")
+
+    assert store.migrate_sidecars(sidecars) == 1
+    assert store.get(tmp_path / "a.pdf")["title"] == "A"
+    store.save(tmp_path / "a.pdf", {"title": "Edited"})
+    assert store.migrate_sidecars(sidecars) == 0
+    assert store.get(tmp_path / "a.pdf") == {"title": "Edited"}
+
+
+def test_process_metadata_only_fetches_papers_without_saved_metadata(monkeypatch):
+    from giantsmind.core import get_metadata
+
+    fetched = []
+
+    def fetch(pdf_paths, verbose, review_queue):
+        fetched.extend(pdf_paths)
+        return [
+            {
+                "title": f"Title {path}",
+                "authors": ["A"],
+                "journal": "J",
+                "publication_date": "2020-01-01",
+                "paper_id": f"doi:10.1000/{path}",
+                "url": "",
+            }
+            for path in pdf_paths
+        ]
+
+    monkeypatch.setattr(get_metadata, "fetch_and_process_metadata", fetch)
+    first = get_metadata.process_metadata(["a.pdf"], verbose=False)
+    both = get_metadata.process_metadata(["a.pdf", "b.pdf"], verbose=False)
+    assert fetched == ["a.pdf", "b.pdf"]
+    assert [metadata.title for metadata in both] == ["Title a.pdf", "Title b.pdf"]
+    assert both[0] == first[0]
@@ -0,0 +1,151 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from giantsmind.core import parse_cache
+from giantsmind.core.parse_cache import ParseCache
+from giantsmind.core.parse_documents import write_single_parsed_file
+from giantsmind.utils.hash_index import FileHashIndex
+
+
+@pytest.fixture
+def cache(tmp_path):
+    folder = tmp_path / "parsed_docs"
+    folder.mkdir()
+    return ParseCache("instruction", folder=folder, hash_index=FileHashIndex(tmp_path / "index.db"))
+
+
+def test_same_name_in_different_folders_do_not_collide(cache, tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "paper.pdf").write_bytes(b"paper a")
+    (tmp_path / "b" / "paper.pdf").write_bytes(b"paper b")
+    path_a, path_b = cache.markdown_paths([tmp_path / "a" / "paper.pdf", tmp_path / "b" / "paper.pdf"])
+    assert path_a != path_b
+
+
+def test_moved_pdf_keeps_its_parsed_document(cache, tmp_path):
+    (tmp_path / "paper.pdf").write_bytes(b"paper")
+    md_path = cache.markdown_path(tmp_path / "paper.pdf")
+    md_path.parent.mkdir(parents=True)
+    md_path.write_text("# Parsed")
+    (tmp_path / "paper.pdf").rename(tmp_path / "renamed.pdf")
+    assert cache.exist([tmp_path / "renamed.pdf"]) == [True]
+
+
+def test_instruction_is_part_of_the_key(cache, tmp_path):
+    (tmp_path / "paper.pdf").write_bytes(b"paper")
+    other = ParseCache("other instruction", folder=cache.folder, hash_index=cache.hash_index)
+    assert cache.markdown_path(tmp_path / "paper.pdf") != other.markdown_path(tmp_path / "paper.pdf")
+
+
+def test_adopt_legacy_skips_ambiguous_stems(cache, tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "paper.pdf").write_bytes(b"paper a")
+    (tmp_path / "b.pdf").write_bytes(b"paper b")
+    (tmp_path / "c.pdf").write_bytes(b"paper c")
+    (tmp_path / "paper.pdf").write_bytes(b"another paper")
+    (cache.folder / "paper.md").write_text("legacy paper")
+    (cache.folder / "b.md").write_text("legacy b")
+    pdf_paths = [tmp_path / "a" / "paper.pdf", tmp_path / "b.pdf", tmp_path / "c.pdf"]
+    assert cache.adopt_legacy(pdf_paths + [tmp_path / "paper.pdf"]) == 1
+    assert cache.markdown_path(tmp_path / "b.pdf").read_text() == "legacy b"
+    assert (cache.folder / "paper.md").exists()
+
+
+def test_document_must_match_its_checksum(cache, tmp_path):
+    (tmp_path / "paper.pdf").write_bytes(b"paper")
+    md_path = cache.markdown_path(tmp_path / "paper.pdf")
+    write_single_parsed_file([SimpleNamespace(text="# Parsed")], md_path)
+    assert parse_cache.checksum_path(md_path).read_text().endswith(f"  {md_path.name}\n")
+    assert cache.exist([tmp_path / "paper.pdf"]) == [True]
+
+    md_path.write_text("# Pars")
+    checksum_mtime = os.stat(parse_cache.checksum_path(md_path)).st_mtime_ns
+    os.utime(md_path, ns=(checksum_mtime + 10**9, checksum_mtime + 10**9))
+    assert cache.exist([tmp_path / "paper.pdf"]) == [False]
+
+
+def test_existence_checks_do_not_read_unmodified_documents(cache, tmp_path, monkeypatch):
+    (tmp_path / "paper.pdf").write_bytes(b"paper")
+    md_path = cache.markdown_path(tmp_path / "paper.pdf")
+    write_single_parsed_file([SimpleNamespace(text="# Parsed")], md_path)
+
+    def fail(document_path):
+        raise AssertionError(f"{document_path} was read")
+
+    monkeypatch.setattr(parse_cache, "verify_document", fail)
+    assert cache.exist([tmp_path / "paper.pdf"]) == [True]
+
+
+def test_document_without_checksum_is_trusted_once(cache, tmp_path):
+    (tmp_path / "paper.pdf").write_bytes(b"paper")
+    md_path = cache.markdown_path(tmp_path / "paper.pdf")
+    md_path.parent.mkdir(parents=True)
+    md_path.write_text("# Parsed before checksums")
+    assert cache.exist([tmp_path / "paper.pdf"]) == [True]
+    assert parse_cache.checksum_path(md_path).exists()
+
+
+def test_compressed_documents(cache, tmp_path):
+    (tmp_path / "paper.pdf").write_bytes(b"paper")
+    compressed = ParseCache("instruction", folder=cache.folder, hash_index=cache.hash_index, compress=True)
+    md_path = compressed.markdown_path(tmp_path / "paper.pdf")
+    assert md_path.name.endswith(".md.gz")
+
+    write_single_parsed_file([SimpleNamespace(text="page 1"), SimpleNamespace(text="page 2")], md_path)
+    assert parse_cache.read_document(md_path) == "page 1\npage 2\n"
+    # Documents are found in the format they were written in
+    assert cache.markdown_path(tmp_path / "paper.pdf") == md_path
+    assert cache.exist([tmp_path / "paper.pdf"]) == [True]
+
+
+def test_documents_are_found_under_the_configured_backend(tmp_path, monkeypatch):
+    from giantsmind.core import config, data_management
+    from giantsmind.core.local_parser import LocalPdfParser
+    from giantsmind.core.parser_backend import backend_cache_tag, create_parser_backend
+
+    assert backend_cache_tag("llamaparse", "instruction", shard_pages=0) == "instruction"
+    assert backend_cache_tag("pymupdf", shard_pages=0) == LocalPdfParser.cache_tag
+    assert (
+        backend_cache_tag("pymupdf", shard_pages=10)
+        == create_parser_backend("pymupdf", shard_pages=10).cache_tag
+    )
+    monkeypatch.setattr(config, "PARSER_BACKEND", "pymupdf")
+    monkeypatch.setattr(parse_cache, "get_parsed_docs_folder", lambda: tmp_path / "parsed_docs")
+    hash_index = FileHashIndex(tmp_path / "index.db")
+    monkeypatch.setattr(parse_cache, "FileHashIndex", lambda prefilter: hash_index)
+    pdf = tmp_path / "paper.pdf"
+    pdf.write_bytes(b"paper")
+    cache = ParseCache(backend_cache_tag("pymupdf"))
+    md_path = cache.markdown_path(pdf)
+    write_single_parsed_file([SimpleNamespace(text="# Parsed")], md_path)
+    cache.record(pdf)
+    assert data_management.convert_pdf_path_to_md_fname(str(pdf)) == str(md_path)
+    assert data_management.convert_pdf_path_to_md_fname(str(tmp_path / "other.pdf")) is None
+
+
+def test_documents_are_found_without_hashing_or_creating_folders(cache, tmp_path, monkeypatch):
+    from giantsmind.utils import file_hashing
+
+    pdf = tmp_path / "paper.pdf"
+    pdf.write_bytes(b"paper")
+    md_path = cache.markdown_path(pdf)
+    assert not md_path.parent.exists()
+    write_single_parsed_file([SimpleNamespace(text="# Parsed")], md_path)
+    cache.record(pdf, "doi:10.1000/a")
+    other = ParseCache("other instruction", folder=cache.folder, hash_index=cache.hash_index)
+    moved = pdf.rename(tmp_path / "moved.pdf")
+
+    def fail(paths, workers):
+        raise AssertionError(f"{paths} were hashed")
+
+    monkeypatch.setattr(file_hashing, "hash_files", fail)
+    # The moved PDF was never indexed, its document is found by paper ID
+    assert cache.find_documents([pdf, moved, tmp_path / "never.pdf"], [None, "doi:10.1000/a", None]) == [
+        md_path,
+        md_path,
+        None,
+    ]
+    assert other.find_documents([pdf], ["doi:10.1000/a"]) == [None]
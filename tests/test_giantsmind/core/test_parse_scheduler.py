@@ -0,0 +1,92 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from giantsmind.core import parse_scheduler as ps
+
+
+class FakeParser:
+    """Parser stand-in recording how many jobs run at the same time."""
+
+    def __init__(self, failures: int = 0, delay: float = 0.01):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def aload_data(self, file_path):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures > 0:
+                self.failures -= 1
+                raise RuntimeError("throttled")
+            return [f"parsed {file_path}"]
+        finally:
+            self.in_flight -= 1
+
+
+def make_scheduler(parser, **kwargs):
+    defaults = dict(max_concurrency=2, rate_per_minute=60000, burst=100, backoff_base=0.0)
+    defaults.update(kwargs)
+    return ps.ParseScheduler("instruction", parser=parser, **defaults)
+
+
+def test_parse_many_bounds_concurrency():
+    parser = FakeParser()
+    scheduler = make_scheduler(parser, max_concurrency=3)
+    results = asyncio.run(scheduler.parse_many([f"file_{i}.pdf" for i in range(10)]))
+    assert results == [[f"parsed file_{i}.pdf"] for i in range(10)]
+    assert parser.max_in_flight <= 3
+    assert scheduler.stats.parsed == 10
+
+
+def test_parse_retries_then_succeeds():
+    parser = FakeParser(failures=2)
+    scheduler = make_scheduler(parser, max_retries=2)
+    result = asyncio.run(scheduler.parse("file.pdf"))
+    assert result == ["parsed file.pdf"]
+    assert parser.calls == 3
+    assert scheduler.stats.retries == 2
+
+
+def test_parse_many_returns_none_after_exhausting_retries():
+    parser = FakeParser(failures=10)
+    scheduler = make_scheduler(parser, max_retries=1)
+    results = asyncio.run(scheduler.parse_many(["file.pdf"]))
+    assert results == [None]
+    assert parser.calls == 2
+    assert scheduler.stats.failed == 1
+
+
+def test_backoff_delay_is_capped():
+    with patch("giantsmind.core.parse_scheduler.random.uniform", side_effect=lambda low, high: high):
+        assert ps.backoff_delay(1, 2.0, 60.0) == 2.0
+        assert ps.backoff_delay(3, 2.0, 60.0) == 8.0
+        assert ps.backoff_delay(10, 2.0, 60.0) == 60.0
+
+
+def test_token_bucket_limits_rate():
+    now = [0.0]
+
+    async def fake_sleep(seconds):
+        now[0] += seconds
+
+    async def acquire_all():
+        bucket = ps.TokenBucket(rate=2.0, capacity=2, clock=lambda: now[0])
+        for _ in range(6):
+            await bucket.acquire()
+
+    with patch("giantsmind.core.parse_scheduler.asyncio.sleep", fake_sleep):
+        asyncio.run(acquire_all())
+    # Two tokens available immediately, the remaining four arrive at 2 per second
+    assert now[0] == pytest.approx(2.0)
+
+
+def test_scheduler_rejects_invalid_concurrency():
+    with pytest.raises(ValueError):
+        ps.ParseScheduler("instruction", max_concurrency=0, parser=FakeParser())
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from giantsmind.core.pipeline import Stage, iterate_in_thread, run_pipeline
+
+
+def test_items_flow_through_all_stages():
+    stages = [Stage("double", lambda x: 2 * x), Stage("increment", lambda x: x + 1, workers=3)]
+    result = asyncio.run(run_pipeline(range(10), stages))
+    assert sorted(result.completed) == [2 * x + 1 for x in range(10)]
+    assert result.failures == []
+
+
+def test_coroutine_stages_run_on_event_loop():
+    async def square(x):
+        await asyncio.sleep(0)
+        return x * x
+
+    result = asyncio.run(run_pipeline([1, 2, 3], [Stage("square", square, workers=2)]))
+    assert sorted(result.completed) == [1, 4, 9]
+
+
+def test_none_drops_item_and_failures_do_not_stop_pipeline():
+    def check(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x if x % 2 == 0 else None
+
+    result = asyncio.run(run_pipeline(range(6), [Stage("check", check)]))
+    assert sorted(result.completed) == [0, 2, 4]
+    assert result.dropped == 2
+    assert [(stage, item) for stage, item, _ in result.failures] == [("check", 3)]
+
+
+def test_queues_bound_items_in_flight():
+    lock = threading.Lock()
+    fed = []
+    consumed = []
+    max_gap = [0]
+
+    def items():
+        for i in range(50):
+            fed.append(i)
+            yield i
+
+    def slow_consumer(x):
+        with lock:
+            consumed.append(x)
+            max_gap[0] = max(max_gap[0], len(fed) - len(consumed))
+        return x
+
+    asyncio.run(run_pipeline(items(), [Stage("consume", slow_consumer)], queue_size=2))
+    # At most queue_size items wait in the queue, plus the item being processed and the one being fed
+    assert max_gap[0] <= 4
+
+
+def test_pipeline_requires_stages():
+    with pytest.raises(ValueError):
+        asyncio.run(run_pipeline([1], []))
+
+
+def test_items_can_be_streamed_from_a_blocking_iterator():
+    started = threading.Event()
+
+    def slow_items():
+        for i in range(3):
+            yield i
+            # The first item is processed while the next ones are produced
+            assert started.wait(timeout=5)
+
+    def mark_started(x):
+        started.set()
+        return x
+
+    result = asyncio.run(run_pipeline(iterate_in_thread(slow_items()), [Stage("mark", mark_started)]))
+    assert sorted(result.completed) == [0, 1, 2]
@@ -0,0 +1,35 @@
+import pytest
+
+from giantsmind.core import get_metadata
+from giantsmind.core.review_queue import ReviewQueue
+
+
+@pytest.fixture
+def review_queue(tmp_path):
+    return ReviewQueue(tmp_path / "review.db")
+
+
+def test_queue_persists_in_order(tmp_path, review_queue):
+    review_queue.add("b.pdf", {"title": "B"}, ["authors"])
+    review_queue.add("a.pdf", {}, ["title", "authors"])
+    review_queue.add("b.pdf", {"title": "B", "journal": "J"}, ["authors"])
+
+    items = ReviewQueue(tmp_path / "review.db").pending()
+    assert [item.pdf_path for item in items] == ["a.pdf", "b.pdf"]
+    assert items[1].metadata == {"title": "B", "journal": "J"}
+    assert items[0].missing_fields == ["title", "authors"]
+
+    review_queue.remove("a.pdf")
+    assert len(review_queue) == 1
+    assert "b.pdf" in review_queue and "a.pdf" not in review_queue
+
+
+def test_fetch_and_process_metadata_queues_incomplete_papers(monkeypatch, review_queue):
+    complete = {"title": "T", "authors": ["A"], "journal": "J", "publication_date": "2020-01-01"}
+    monkeypatch.setattr(get_metadata, "fetch_metadatas", lambda files, verbose: [complete, {"title": "T"}])
+    monkeypatch.setattr("builtins.input", lambda prompt: pytest.fail("prompted for input"))
+
+    metadatas = get_metadata.fetch_and_process_metadata(["a.pdf", "b.pdf"], False, review_queue)
+
+    assert metadatas == [complete, None]
+    assert review_queue.pending()[0].missing_fields == ["authors", "journal", "publication_date"]
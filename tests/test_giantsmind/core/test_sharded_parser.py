@@ -0,0 +1,113 @@
+import asyncio
+
+import fitz
+import pytest
+
+from giantsmind.core.parser_backend import ParserBackend, ParseStats
+from giantsmind.core.sharded_parser import ShardedParser
+from giantsmind.utils import pdf_tools
+
+
+class FakeDocument:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeBackend(ParserBackend):
+    """Backend returning one document per page, failing the first attempts at some shards."""
+
+    name = "fake"
+    cache_tag = "fake"
+    max_concurrency = 8
+
+    def __init__(self, failures=None, delay=0.01):
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.stats = ParseStats()
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def parse(self, pdf_path):
+        self.calls.append(pdf_path)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            with fitz.open(pdf_path) as document:
+                texts = [page.get_text().strip() for page in document]
+            if self.failures.get(texts[0], 0) > 0:
+                self.failures[texts[0]] -= 1
+                raise RuntimeError("timeout")
+            return [FakeDocument(text) for text in texts]
+        finally:
+            self.in_flight -= 1
+
+
+def make_pdf(path, n_pages):
+    document = fitz.open()
+    for i in range(1, n_pages + 1):
+        document.new_page().insert_text((72, 72), f"text of page {i}")
+    document.save(path)
+    document.close()
+    return str(path)
+
+
+def test_split_pdf_groups_pages(tmp_path):
+    pdf_path = make_pdf(tmp_path / "thesis.pdf", 7)
+
+    paths = pdf_tools.split_pdf(pdf_path, tmp_path / "shards", pages_per_file=3)
+
+    assert [path.name for path in paths] == [
+        "thesis_pages_1-3.pdf",
+        "thesis_pages_4-6.pdf",
+        "thesis_page_7.pdf",
+    ]
+    assert [pdf_tools.get_page_count(path) for path in paths] == [3, 3, 1]
+
+
+def test_sharded_parser_reassembles_pages_in_order(tmp_path):
+    pdf_path = make_pdf(tmp_path / "thesis.pdf", 25)
+    backend = FakeBackend()
+    parser = ShardedParser(backend, pages_per_shard=4, min_pages=10)
+
+    pages = asyncio.run(parser.parse(pdf_path))
+
+    assert len(backend.calls) == 7
+    assert backend.max_in_flight == 7
+    assert [page.page for page in pages] == list(range(1, 26))
+    assert pages[12].text == "<!-- page 13 -->\n\ntext of page 13"
+    assert parser.stats.parsed == 1
+
+
+def test_sharded_parser_retries_only_failed_shards(tmp_path):
+    pdf_path = make_pdf(tmp_path / "thesis.pdf", 12)
+    backend = FakeBackend(failures={"text of page 5": 2})
+    parser = ShardedParser(backend, pages_per_shard=4, min_pages=10, max_retries=2)
+
+    pages = asyncio.run(parser.parse(pdf_path))
+
+    assert len(backend.calls) == 5
+    assert backend.calls.count(backend.calls[1]) == 3
+    assert [page.page for page in pages] == list(range(1, 13))
+    assert parser.stats.retries == 2
+
+
+def test_sharded_parser_gives_up_after_max_retries(tmp_path):
+    pdf_path = make_pdf(tmp_path / "thesis.pdf", 12)
+    parser = ShardedParser(FakeBackend(failures={"text of page 9": 5}), pages_per_shard=4, min_pages=10)
+
+    with pytest.raises(RuntimeError, match="pages 9-12"):
+        asyncio.run(parser.parse(pdf_path))
+    assert parser.stats.failed == 1
+
+
+def test_sharded_parser_parses_small_pdfs_whole(tmp_path):
+    pdf_path = make_pdf(tmp_path / "paper.pdf", 5)
+    backend = FakeBackend()
+    parser = ShardedParser(backend, pages_per_shard=2, min_pages=10)
+
+    pages = asyncio.run(parser.parse(pdf_path))
+
+    assert backend.calls == [pdf_path]
+    assert [page.text for page in pages] == [f"text of page {i}" for i in range(1, 6)]
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+from giantsmind.core.parse_documents import LazyDocument
+from giantsmind.scripts import parse_papers
+from giantsmind.utils.scanner import ScanEntry
+
+
+def test_lazy_document_reads_markdown_on_first_access(tmp_path):
+    path = tmp_path / "paper.md"
+    path.write_text("# Title\n\nText.\n")
+    document = LazyDocument(path)
+    document.metadata = {"paper_id": "doi:10.1000/a"}
+    assert not document.loaded
+
+    assert document.page_content == "# Title\n\nText.\n"
+    assert document.loaded
+    assert document.load().metadata == {"paper_id": "doi:10.1000/a"}
+
+
+def test_papers_in_the_vector_database_are_never_loaded(tmp_path, monkeypatch):
+    new = tmp_path / "new.md"
+    new.write_text("New paper.\n")
+    # Loading the indexed paper's document would fail, since it does not exist
+    documents = [LazyDocument(tmp_path / "indexed.md"), LazyDocument(new)]
+    metadatas = [SimpleNamespace(paper_id="indexed"), SimpleNamespace(paper_id="new")]
+    client = SimpleNamespace(check_ids_exist=lambda ids: [paper_id == "indexed" for paper_id in ids])
+    processed = []
+    monkeypatch.setattr(parse_papers, "create_vector_client", lambda persist_directory: (client, None))
+    monkeypatch.setattr(
+        parse_papers,
+        "process_papers",
+        lambda client, chunks, metadatas: processed.extend(zip(chunks, metadatas)),
+    )
+
+    parse_papers.process_database_operations(documents, metadatas, tmp_path)
+    assert [metadata.paper_id for _, metadata in processed] == ["new"]
+    assert [chunk.page_content for chunk in processed[0][0]] == ["New paper."]
+    assert not documents[0].loaded
+
+
+def test_a_paper_failing_to_chunk_does_not_stop_the_others(monkeypatch):
+    added = []
+    monkeypatch.setattr(
+        parse_papers, "add_paper_to_dbs", lambda client, chunks, metadata: added.append(metadata.title)
+    )
+    metadatas = [SimpleNamespace(title=title) for title in ("a", "b", "c")]
+
+    parse_papers.process_papers(None, [[], ValueError("bad outline"), []], metadatas)
+    assert added == ["a", "c"]
+
+
+def test_jobs_are_keyed_by_absolute_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entry = ScanEntry("papers/a.pdf", 10, 1)
+    assert parse_papers._make_job(entry).pdf_path == str(tmp_path / "papers" / "a.pdf")
+    assert parse_papers._make_job(entry).scan_entry == ScanEntry(str(tmp_path / "papers" / "a.pdf"), 10, 1)
+    assert parse_papers._make_job("b.pdf").pdf_path == str(tmp_path / "b.pdf")
+
+
+def test_parse_papers_fails_when_papers_fail_to_ingest(tmp_path, monkeypatch):
+    n_failed = []
+    monkeypatch.setattr(parse_papers, "ingest_papers", lambda *args, **kwargs: n_failed.pop())
+
+    n_failed.append(2)
+    assert parse_papers.parse_papers(str(tmp_path)) == 1
+    n_failed.append(0)
+    assert parse_papers.parse_papers(str(tmp_path)) == 0
+
+
+def test_pdfs_failing_to_parse_get_no_document(tmp_path, monkeypatch):
+    from giantsmind.core import parse_documents
+    from giantsmind.core.parse_cache import ParseCache
+    from giantsmind.core.parser_backend import ParseStats
+    from giantsmind.utils.hash_index import FileHashIndex
+
+    async def parse_many(pdf_paths):
+        return [[SimpleNamespace(text="Good paper.")], None]
+
+    async def aclose():
+        pass
+
+    backend = SimpleNamespace(cache_tag="tag", stats=ParseStats(), parse_many=parse_many, aclose=aclose)
+    monkeypatch.setattr(parse_documents, "create_parser_backend", lambda name, instruction: backend)
+    monkeypatch.setattr(
+        parse_documents,
+        "ParseCache",
+        lambda tag: ParseCache(
+            tag, folder=tmp_path / "parsed_docs", hash_index=FileHashIndex(tmp_path / "index.db")
+        ),
+    )
+    pdf_paths = []
+    for name in ("good", "bad"):
+        (tmp_path / f"{name}.pdf").write_bytes(name.encode())
+        pdf_paths.append(str(tmp_path / f"{name}.pdf"))
+
+    good, bad = parse_documents.parse_pdfs(pdf_paths)
+    assert good.page_content.strip() == "Good paper."
+    assert bad is None
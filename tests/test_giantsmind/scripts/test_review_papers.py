@@ -0,0 +1,126 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from giantsmind.core import get_metadata
+from giantsmind.core.review_queue import ReviewQueue
+from giantsmind.scripts import review_papers as rp
+
+COMPLETE = {
+    "title": "Found",
+    "authors": ["A"],
+    "journal": "J",
+    "publication_date": "2020-01-01",
+    "paper_id": "doi:10.1000/good",
+    "url": "",
+}
+
+
+class FakeMetadataClient:
+    def __init__(self):
+        self.doi_lookups = []
+
+    async def resolve(self, info):
+        return dict(COMPLETE) if info.pdf_path.endswith("a.pdf") else {}
+
+    async def fetch_doi(self, doi):
+        self.doi_lookups.append(doi)
+        return dict(COMPLETE) if doi == "10.1000/good" else {}
+
+    async def fetch_arxiv(self, arxiv_id):
+        return {}
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    review_queue = ReviewQueue(tmp_path / "review.db")
+    for name in ("a", "b", "c", "d"):
+        (tmp_path / f"{name}.pdf").write_bytes(name.encode())
+        review_queue.add(str(tmp_path / f"{name}.pdf"), dict(COMPLETE, title="", paper_id=""), ["title"])
+    review_queue.add(str(tmp_path / "deleted.pdf"), {}, ["title"])
+
+    saved, ingested = {}, []
+
+    async def fake_run_ingestion(context, pdf_paths, progress=True):
+        ingested.extend(await asyncio.to_thread(list, pdf_paths))
+
+    monkeypatch.setattr(rp.parse_papers, "run_ingestion", fake_run_ingestion)
+    monkeypatch.setattr(get_metadata, "save_metadata", lambda m, p: saved.update({p: m}))
+    monkeypatch.setattr(
+        get_metadata,
+        "try_extract_local_metadata",
+        lambda p: get_metadata.LocalPdfInfo(pdf_path=p, pdf_metadata={}),
+    )
+    context = SimpleNamespace(
+        metadata_client=FakeMetadataClient(),
+        process_pool=ThreadPoolExecutor(2),
+        cache=SimpleNamespace(hash_index=SimpleNamespace(get_hash=lambda path: "abc")),
+    )
+    return review_queue, context, saved, ingested
+
+
+def test_parse_identifier():
+    assert rp.parse_identifier("https://doi.org/10.1000/ABC") == ("doi", "10.1000/abc")
+    assert rp.parse_identifier("arXiv:2101.00001v2") == ("arxiv", "2101.00001v2")
+    assert rp.parse_identifier("not an id") is None
+
+
+def test_review_session_completes_and_ingests_papers(tmp_path, session):
+    review_queue, context, saved, ingested = session
+    # b: DOI not found then typed, c: typed, d: skipped
+    answers = iter(["not an id", "10.1000/bad", "", "s", "Typed c", "Typed b"])
+
+    asyncio.run(rp.ReviewSession(context, review_queue, prompt=lambda text: next(answers)).run())
+
+    paths = {name: str(tmp_path / f"{name}.pdf") for name in "abcd"}
+    assert sorted(ingested) == [paths["a"], paths["b"], paths["c"]]
+    assert [item.pdf_path for item in review_queue.pending()] == [paths["d"]]
+    assert saved[paths["a"]]["title"] == "Found"
+    assert saved[paths["c"]]["title"] == "Typed c"
+    assert saved[paths["c"]]["paper_id"] == "sha256:abc"
+    assert saved[paths["b"]]["title"] == "Typed b"
+    assert context.metadata_client.doi_lookups == ["10.1000/bad"]
+
+
+def test_review_session_ingests_while_legacy_documents_remain(tmp_path, monkeypatch):
+    from giantsmind.core import instrumentation
+    from giantsmind.core.ingest_journal import IngestJournal
+    from giantsmind.core.parse_cache import ParseCache
+    from giantsmind.utils.hash_index import FileHashIndex
+
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"a")
+    review_queue = ReviewQueue(tmp_path / "review.db")
+    review_queue.add(str(pdf), dict(COMPLETE, title="", paper_id=""), ["title"])
+    cache = ParseCache(folder=tmp_path / "parsed_docs", hash_index=FileHashIndex(tmp_path / "index.db"))
+    (cache.folder / "a.md").write_text("# Parsed before the cache")
+    monkeypatch.setattr(instrumentation, "DEFAULT_REPORTS_PATH", tmp_path / "reports")
+    monkeypatch.setattr(get_metadata, "save_metadata", lambda m, p: None)
+    monkeypatch.setattr(
+        get_metadata,
+        "try_extract_local_metadata",
+        lambda p: get_metadata.LocalPdfInfo(pdf_path=p, pdf_metadata={}),
+    )
+    context = rp.parse_papers.IngestionContext(
+        # The paper is already in the database, so the run stops before parsing it
+        client=SimpleNamespace(check_ids_exist=lambda ids: [True] * len(ids)),
+        embeddings=None,
+        parser=SimpleNamespace(
+            resource="network", max_concurrency=1, stats=SimpleNamespace(summary=lambda: "")
+        ),
+        cache=cache,
+        process_pool=ThreadPoolExecutor(2),
+        metadata_client=FakeMetadataClient(),
+        journal=IngestJournal(tmp_path / "journal.db"),
+        review_queue=review_queue,
+    )
+
+    session = rp.ReviewSession(context, review_queue, prompt=lambda text: "q")
+    asyncio.run(asyncio.wait_for(session.run(), timeout=10))
+
+    assert session.n_completed == 1
+    assert not (cache.folder / "a.md").exists()
+    assert cache.markdown_path(pdf).read_text() == "# Parsed before the cache"
+    assert context.journal.get(str(pdf)).reached("committed")
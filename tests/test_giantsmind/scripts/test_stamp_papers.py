@@ -0,0 +1,42 @@
+from unittest.mock import patch
+
+import fitz
+
+from giantsmind.core import get_metadata
+from giantsmind.scripts import stamp_papers as sp
+from giantsmind.utils.hash_index import FileHashIndex
+
+
+def make_pdf(path):
+    document = fitz.open()
+    document.new_page().insert_text((72, 72), path.stem)
+    document.save(path)
+    document.close()
+    return str(path)
+
+
+def test_stamp_pdfs_writes_saved_metadata_in_parallel(tmp_path):
+    paths = [make_pdf(tmp_path / f"{name}.pdf") for name in ("a", "b", "c")]
+    saved = {
+        path: {
+            "title": f"Title {i}",
+            "authors": ["A"],
+            "journal": "J",
+            "publication_date": "2020",
+            "paper_id": f"doi:10.1/{i}",
+        }
+        for i, path in enumerate(paths[:2])
+    }
+    index = FileHashIndex(tmp_path / "index.db")
+    hashes = index.get_hashes(paths)
+    with patch.object(
+        get_metadata, "load_saved_metadatas", side_effect=lambda paths: list(map(saved.get, paths))
+    ):
+        assert sp.stamp_pdfs(paths, index, workers=2) == 2
+        assert sp.stamp_pdfs(paths, index, workers=2) == 0
+    titles = []
+    for path in paths:
+        with fitz.open(path) as document:
+            titles.append(document.metadata["title"])
+    assert titles == ["Title 0", "Title 1", ""]
+    assert index.get_hashes(paths) == hashes
@@ -0,0 +1,131 @@
+import sys
+
+import pytest
+
+from giantsmind.utils.folder_watcher import (
+    CREATED,
+    DELETED,
+    MODIFIED,
+    RESCAN,
+    Debouncer,
+    FileChange,
+    InotifyWatcher,
+    PollingWatcher,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def kinds(changes):
+    return sorted((change.path.rsplit("/", 1)[-1], change.kind) for change in changes)
+
+
+def test_polling_watcher_detects_changes(tmp_path):
+    (tmp_path / "kept.pdf").write_bytes(b"kept")
+    (tmp_path / "modified.pdf").write_bytes(b"v1")
+    (tmp_path / "deleted.pdf").write_bytes(b"gone")
+    watcher = PollingWatcher(tmp_path)
+
+    (tmp_path / "new.pdf").write_bytes(b"new")
+    (tmp_path / "notes.txt").write_bytes(b"ignored")
+    (tmp_path / "modified.pdf").write_bytes(b"version 2")
+    (tmp_path / "deleted.pdf").unlink()
+
+    assert kinds(watcher.read(0)) == [
+        ("deleted.pdf", DELETED),
+        ("modified.pdf", MODIFIED),
+        ("new.pdf", CREATED),
+    ]
+    assert watcher.read(0) == []
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_watcher_detects_changes(tmp_path):
+    (tmp_path / "deleted.pdf").write_bytes(b"gone")
+    watcher = InotifyWatcher(tmp_path)
+    try:
+        (tmp_path / "new.pdf").write_bytes(b"new")
+        (tmp_path / "notes.txt").write_bytes(b"ignored")
+        (tmp_path / "deleted.pdf").unlink()
+        changes = watcher.read(1.0)
+    finally:
+        watcher.close()
+    assert ("new.pdf", CREATED) in kinds(changes)
+    assert ("deleted.pdf", DELETED) in kinds(changes)
+    assert all(change.path.endswith(".pdf") for change in changes)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_watcher_requests_rescan_when_folder_goes_away(tmp_path):
+    folder = tmp_path / "papers"
+    folder.mkdir()
+    watcher = InotifyWatcher(folder)
+    try:
+        folder.rename(tmp_path / "moved")
+        changes = watcher.read(1.0)
+    finally:
+        watcher.close()
+    assert RESCAN in [change.kind for change in changes]
+
+
+def test_polling_watcher_watches_subfolders(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "deleted.pdf").write_bytes(b"gone")
+    watcher = PollingWatcher(tmp_path)
+
+    (tmp_path / "sub" / "deleted.pdf").unlink()
+    (tmp_path / "sub" / "deeper").mkdir()
+    (tmp_path / "sub" / "deeper" / "new.pdf").write_bytes(b"new")
+    assert kinds(watcher.read(0)) == [("deleted.pdf", DELETED), ("new.pdf", CREATED)]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_watcher_watches_subfolders(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "deleted.pdf").write_bytes(b"gone")
+    (tmp_path / "outside").mkdir()
+    (tmp_path / "outside" / "moved.pdf").write_bytes(b"moved")
+    watcher = InotifyWatcher(tmp_path / "sub")
+    try:
+        (tmp_path / "sub" / "deleted.pdf").unlink()
+        (tmp_path / "sub" / "new").mkdir()
+        changes = watcher.read(1.0)
+        (tmp_path / "sub" / "new" / "later.pdf").write_bytes(b"later")
+        (tmp_path / "outside").rename(tmp_path / "sub" / "new" / "moved")
+        changes += watcher.read(1.0)
+        (tmp_path / "sub" / "new").rename(tmp_path / "gone")
+        rescan = watcher.read(1.0)
+    finally:
+        watcher.close()
+    assert ("deleted.pdf", DELETED) in kinds(changes)
+    assert ("later.pdf", CREATED) in kinds(changes)
+    assert ("moved.pdf", CREATED) in kinds(changes)
+    assert RESCAN in [change.kind for change in rescan]
+
+
+def test_debouncer_waits_for_quiet_files():
+    clock = FakeClock()
+    debouncer = Debouncer(2.0, clock=clock)
+    debouncer.add([FileChange("a.pdf", CREATED)])
+    clock.now = 1.5
+    debouncer.add([FileChange("a.pdf", MODIFIED), FileChange("b.pdf", DELETED)])
+    clock.now = 3.0
+    assert debouncer.pop_ready() == []
+    clock.now = 3.5
+    assert debouncer.pop_ready() == [FileChange("a.pdf", CREATED), FileChange("b.pdf", DELETED)]
+    assert len(debouncer) == 0
+
+
+def test_debouncer_merges_changes():
+    clock = FakeClock()
+    debouncer = Debouncer(1.0, clock=clock)
+    debouncer.add([FileChange("tmp.pdf", CREATED), FileChange("tmp.pdf", DELETED)])
+    debouncer.add([FileChange("replaced.pdf", DELETED), FileChange("replaced.pdf", CREATED)])
+    clock.now = 1.0
+    assert debouncer.pop_ready() == [FileChange("replaced.pdf", MODIFIED)]
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from giantsmind.utils import file_hashing
+from giantsmind.utils.hash_index import FileHashIndex
+from giantsmind.utils.scanner import scan_files
+
+
+@pytest.fixture
+def index(tmp_path):
+    return FileHashIndex(tmp_path / "index.db")
+
+
+def write_file(path, content: bytes):
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_get_hashes_returns_sha256(index, tmp_path):
+    path = write_file(tmp_path / "a.pdf", b"content a")
+    assert index.get_hashes([path]) == [hashlib.sha256(b"content a").hexdigest()]
+
+
+def test_unchanged_files_are_not_hashed_again(index, tmp_path):
+    paths = [write_file(tmp_path / f"{i}.pdf", f"content {i}".encode()) for i in range(3)]
+    expected = index.get_hashes(paths)
+    with patch("giantsmind.utils.hash_index.file_hashing.hash_files") as mock_hashes:
+        assert index.get_hashes(paths) == expected
+        mock_hashes.assert_not_called()
+
+
+def test_modified_file_is_hashed_again(index, tmp_path):
+    path = write_file(tmp_path / "a.pdf", b"old")
+    index.get_hashes([path])
+    write_file(tmp_path / "a.pdf", b"new content")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert index.get_hash(path) == hashlib.sha256(b"new content").hexdigest()
+
+
+def test_missing_file_uses_last_indexed_hash(index, tmp_path):
+    path = write_file(tmp_path / "a.pdf", b"content")
+    expected = index.get_hash(path)
+    os.remove(path)
+    assert index.get_hash(path) == expected
+    with pytest.raises(FileNotFoundError):
+        index.get_hash(tmp_path / "never_indexed.pdf")
+
+
+def test_scanned_files_are_not_stat_again(index, tmp_path):
+    paths = [write_file(tmp_path / f"{i}.pdf", f"content {i}".encode()) for i in range(3)]
+    expected = index.get_hashes(paths)
+    entries = list(scan_files(tmp_path))
+    with patch("giantsmind.utils.hash_index.os.stat") as mock_stat:
+        hashes = dict(zip([e.path for e in entries], index.get_scanned_hashes(entries)))
+        mock_stat.assert_not_called()
+    assert [hashes[path] for path in paths] == expected
+
+
+def test_files_larger_than_a_block_are_hashed_in_parallel(tmp_path):
+    contents = [os.urandom(file_hashing.BLOCK_SIZE * 2 + i) for i in range(3)]
+    paths = [write_file(tmp_path / f"{i}.pdf", content) for i, content in enumerate(contents)]
+    digests = file_hashing.hash_files(paths, workers=3)
+    assert [d.sha256 for d in digests] == [hashlib.sha256(content).hexdigest() for content in contents]
+    assert [d.quick for d in digests] == file_hashing.quick_fingerprints(paths)
+
+
+def test_quick_fingerprint_depends_on_the_ends_of_the_file(tmp_path):
+    content = os.urandom(file_hashing.QUICK_BLOCK_SIZE * 4)
+    middle = len(content) // 2
+    original = file_hashing.quick_fingerprint(write_file(tmp_path / "a.pdf", content))
+    edited_middle = content[:middle] + b"x" + content[middle + 1 :]
+    edited_end = content[:-1] + b"x"
+    assert file_hashing.quick_fingerprint(write_file(tmp_path / "b.pdf", edited_middle)) == original
+    assert file_hashing.quick_fingerprint(write_file(tmp_path / "c.pdf", edited_end)) != original
+
+
+def test_prefilter_rehashes_files_edited_with_their_mtime_restored(tmp_path):
+    index = FileHashIndex(tmp_path / "index.db", prefilter=True)
+    content = os.urandom(file_hashing.QUICK_BLOCK_SIZE * 4)
+    path = write_file(tmp_path / "a.pdf", content)
+    untouched = write_file(tmp_path / "b.pdf", content)
+    index.get_hashes([path, untouched])
+    stat = os.stat(path)
+    edited = content[:-1] + b"x"
+    write_file(tmp_path / "a.pdf", edited)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert FileHashIndex(tmp_path / "index.db").get_hash(path) == hashlib.sha256(content).hexdigest()
+    with patch("giantsmind.utils.hash_index.file_hashing.hash_files", wraps=file_hashing.hash_files) as mock:
+        assert index.get_hashes([path, untouched]) == [
+            hashlib.sha256(edited).hexdigest(),
+            hashlib.sha256(content).hexdigest(),
+        ]
+        mock.assert_called_once_with([path], index.workers)
+
+
+def test_prefilter_never_reuses_the_hash_of_another_file(tmp_path):
+    index = FileHashIndex(tmp_path / "index.db", prefilter=True)
+    content = os.urandom(file_hashing.QUICK_BLOCK_SIZE * 4)
+    index.get_hash(write_file(tmp_path / "a.pdf", content))
+    # Same size, first and last blocks, different middle
+    middle = len(content) // 2
+    edited_middle = content[:middle] + bytes([content[middle] ^ 1]) + content[middle + 1 :]
+    other = write_file(tmp_path / "b.pdf", edited_middle)
+    copy = str(shutil.copy(tmp_path / "a.pdf", tmp_path / "copy.pdf"))
+    assert index.get_hashes([other, copy]) == [
+        hashlib.sha256(edited_middle).hexdigest(),
+        hashlib.sha256(content).hexdigest(),
+    ]
+
+
+def test_index_without_quick_fingerprints_is_migrated(tmp_path):
+    db_path = tmp_path / "index.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE file_hashes (path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+        )
+    conn.close()
+    path = write_file(tmp_path / "a.pdf", b"content")
+    assert FileHashIndex(db_path, prefilter=True).get_hash(path) == hashlib.sha256(b"content").hexdigest()
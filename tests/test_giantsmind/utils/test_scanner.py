@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from giantsmind.utils import pdf_tools
+from giantsmind.utils.scanner import scan_files
+
+
+def relative_paths(entries, root):
+    return sorted(os.path.relpath(entry.path, root) for entry in entries)
+
+
+@pytest.fixture
+def library(tmp_path):
+    for path in ["a.pdf", "B.PDF", "notes.txt", "x/c.pdf", "x/y/d.pdf", "x/y/z/e.pdf", "drafts/f.pdf"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_bytes(b"%PDF " + path.encode())
+    return tmp_path
+
+
+def test_scan_is_recursive_and_returns_stats(library):
+    entries = list(scan_files(library, workers=4))
+    assert relative_paths(entries, library) == [
+        "B.PDF",
+        "a.pdf",
+        "drafts/f.pdf",
+        "x/c.pdf",
+        "x/y/d.pdf",
+        "x/y/z/e.pdf",
+    ]
+    entry = next(e for e in entries if e.path.endswith("c.pdf"))
+    stat = os.stat(entry.path)
+    assert (entry.size, entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+
+def test_include_exclude_and_depth(library):
+    assert relative_paths(scan_files(library, exclude=["drafts", "x/y/*"]), library) == [
+        "B.PDF",
+        "a.pdf",
+        "x/c.pdf",
+    ]
+    assert relative_paths(scan_files(library, include=["*.txt"]), library) == ["notes.txt"]
+    assert relative_paths(scan_files(library, recursive=False), library) == ["B.PDF", "a.pdf"]
+
+
+def test_symlink_policies(library, tmp_path_factory):
+    outside = tmp_path_factory.mktemp("outside")
+    (outside / "linked.pdf").write_bytes(b"%PDF")
+    os.symlink(outside / "linked.pdf", library / "file-link.pdf")
+    os.symlink(outside, library / "dir-link")
+    # A cycle back to the root
+    os.symlink(library, library / "x" / "loop")
+
+    skip = relative_paths(scan_files(library, symlinks="skip"), library)
+    files = relative_paths(scan_files(library, symlinks="files"), library)
+    follow = relative_paths(scan_files(library, symlinks="follow"), library)
+    assert "file-link.pdf" not in skip
+    assert "file-link.pdf" in files and "dir-link/linked.pdf" not in files
+    assert "dir-link/linked.pdf" in follow
+    # The loop is not followed
+    assert len(follow) == 8 and not any(p.startswith("x/loop") for p in follow)
+
+    with pytest.raises(ValueError):
+        list(scan_files(library, symlinks="always"))
+
+
+def test_get_pdf_paths(library):
+    assert relative_paths_of(pdf_tools.get_pdf_paths(str(library)), library) == ["B.PDF", "a.pdf"]
+    assert len(pdf_tools.get_pdf_paths(str(library), recursive=True)) == 6
+
+
+def relative_paths_of(paths, root):
+    return sorted(os.path.relpath(path, root) for path in paths)
@@ -0,0 +1,62 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.documents.base import Document
+
+from giantsmind.core.markdown_loader import markdown_outline
+from giantsmind.vector_db import prep_docs
+
+TEXT = (
+    "<!-- page 1 -->\n# Introduction\n\n"
+    + "Intro sentence. " * 20
+    + "\n\n<!-- page 2 -->\n## Methods\n\n"
+    + "Method sentence. " * 20
+)
+
+
+def test_chunks_record_their_offsets_page_and_section():
+    pages, headings = markdown_outline(TEXT)
+    document = Document(page_content=TEXT, metadata={"paper_id": "a", "pages": pages, "headings": headings})
+    chunks = prep_docs.chunk_document(document, chunk_size=200, chunk_overlap=20)
+
+    assert len(chunks) > 2
+    for chunk in chunks:
+        start, end = chunk.metadata["start_index"], chunk.metadata["end_index"]
+        assert TEXT[start:end] == chunk.page_content
+        assert chunk.metadata["paper_id"] == "a"
+        assert "pages" not in chunk.metadata
+    assert (chunks[1].metadata["page"], chunks[1].metadata["section"]) == (1, "Introduction")
+    assert (chunks[-1].metadata["page"], chunks[-1].metadata["section"]) == (2, "Methods")
+    # The outline is found in the text when the document does not carry it
+    without_outline = prep_docs.chunk_document(
+        Document(page_content=TEXT, metadata={"paper_id": "a"}), 200, 20
+    )
+    assert without_outline == chunks
+    assert prep_docs.get_splitter(200, 20) is prep_docs.get_splitter(200, 20)
+
+
+def test_documents_are_chunked_in_order_in_a_process_pool():
+    documents = [Document(page_content=f"Paper {i}. " * 100, metadata={"i": i}) for i in range(6)]
+    expected = prep_docs.chunk_documents(documents, 300, 0)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        chunked = list(prep_docs.iter_chunked_documents(documents, 300, 0, executor, max_pending=2))
+    assert chunked == expected
+    assert [chunks[0].metadata["i"] for chunks in chunked] == list(range(6))
+
+
+def test_documents_failing_to_split_yield_their_error():
+    documents = [Document(page_content=f"Paper {i}. " * 100, metadata={"i": i}) for i in range(3)]
+    # An outline with a page offset that is not a number
+    documents[1].metadata.update(pages=[(1, "start")], headings=[])
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        chunked = list(
+            prep_docs.iter_chunked_documents(
+                documents, 300, 0, executor, max_pending=2, return_exceptions=True
+            )
+        )
+    assert isinstance(chunked[1], TypeError)
+    assert [chunks[0].metadata["i"] for chunks in (chunked[0], chunked[2])] == [0, 2]
+    assert isinstance(
+        list(prep_docs.iter_chunked_documents(documents, 300, 0, return_exceptions=True))[1], TypeError
+    )